@@ -3,3 +3,5 @@ from .zhou import Zhou_PSO
 from .aco import AntColony
 from .zhong import Zhong_PSO
 from .speedpso import SpeedPSO
+from .localsearch import LocalSearch
+from .lk import LinKernighan
@@ -1,11 +1,11 @@
 
 
-from typing import List, Tuple, Dict, Set, Optional
+from typing import Any, Iterator, List, Sequence, Tuple, Dict, Set, Optional
 
-import random
-import numpy as np # type: ignore
 import time
 
+from .common import project_tour, Termination, History, RandomStream, Solver
+
 
 
 
@@ -31,7 +31,7 @@ def _compute_distance (lst : List[int], distances : List[List[int]]) -> int:
 
 
 
-class AntColony (object):
+class AntColony (Solver):
     """
     This is the Ant Colony Optimization algorithm described by DeSanctis et al. (2018).
 
@@ -48,7 +48,9 @@ class AntColony (object):
                 evaporate : bool = False,
                 max_iter : Optional[int] = None,
                 max_noimp : int = 1000,
-                print_every : int = 100
+                print_every : int = 100,
+                rng : Any = None,
+                store : Any = None
                 ) -> None:
         """
         Initialize.
@@ -64,16 +66,24 @@ class AntColony (object):
         :attr max_iter: The number of iterations.
         :attr max_noimp: Maximum number of iterations without improvement.
         :attr print_every: The iterations between a log and the next one.
+        :attr rng: The random stream used for all the randomness.
+        :attr store: The pheromone learned on the whole warehouse (a PheromoneStore), used
+                    to initialize the pheromone instead of <pher_init> (None not to use it).
 
-        :attr pheromone: The pheromone on each arch.
+        :attr nodes: The origin followed by the picking list.
+        :attr pheromone: The pheromone on each arch between the <nodes>.
         :attr best: The best solution found so far.
         :attr vbest: the cost of the current best.
         :attr history: The history of the best solutions found.
         :attr computations: The number of solutions explored before finding the best.
 
         :param pher_init: The initial pheromone (it is always 0 on arcs (i,j) where i == j)
+        :param rng: The random stream, or a seed for it (an int, a numpy SeedSequence or Generator).
+                    By default it is seeded with fresh entropy.
         
         """
+        Solver.__init__ (self)
+
         self.distances = distances
         self.picking_list = picking_list
         self.ro = ro
@@ -85,28 +95,23 @@ class AntColony (object):
         self.max_noimp = max_noimp
         self.print_every = print_every
         self.pher_init = pher_init
+        self.rng = RandomStream.create(rng)
+        self.store = store
 
 
         # Initialize the best
         self.best : List[int] = list(self.picking_list)
-        random.shuffle(self.best)
+        self.rng.shuffle(self.best)
         self.vbest : int = _compute_distance (self.best, distances)
 
-        # Initialize the pheromone
+        # Initialize the pheromone (only the arcs between the origin and the
+        # nodes of the picking list can ever be used)
+        self.nodes : List[int] = [0] + list(self.picking_list)
         self.pheromone : Dict[int, Dict[int, float]] = {}
-        for i in distances:
-            self.pheromone[i] = {}
-            for j in distances:
-                if i != j:
-                    self.pheromone[i][j] = pher_init
-                else:
-                    self.pheromone[i][j] = 0
+        self._init_pheromone ()
 
-        # Initialize the history and the number of iterations
-        # needed to find the best.
-        self.history : List[int] = [self.vbest]
-        self.computations : int = 0
-        self.computational_time : float = 0.0
+        # Initialize the history
+        self.history = History([self.vbest], max_points=self.history_points)
 
 
 
@@ -115,14 +120,37 @@ class AntColony (object):
 
 
 
+    def _init_pheromone (self) -> None:
+        """
+        This method initializes the pheromone, from the <store> if any.
+
+        """
+        trails = self.store.submatrix(self.nodes) if self.store is not None else None
+        for a, i in enumerate(self.nodes):
+            self.pheromone[i] = {}
+            for b, j in enumerate(self.nodes):
+                if i == j:
+                    self.pheromone[i][j] = 0
+                elif trails is not None:
+                    self.pheromone[i][j] = float(trails[a, b])
+                else:
+                    self.pheromone[i][j] = self.pher_init
+
+
+
+
+
+
+
     def _evap (self) -> None:
         """
         This method evaporates the pheromone.
 
         """
-        for i in self.distances:
-            for j in self.distances:
-                self.pheromone[i][j] *= self.ro
+        for i in self.nodes:
+            row = self.pheromone[i]
+            for j in self.nodes:
+                row[j] *= self.ro
 
 
 
@@ -137,16 +165,52 @@ class AntColony (object):
         greater is the possibility to select it.
 
         """
-        for i in range (len(self.picking_list) - 1):
-            self.pheromone[self.best[i]][self.best[i + 1]] += (self.Q / self.distances[self.best[i]][self.best[i + 1]])
-        self.pheromone[0][self.best[0]] += (self.Q / self.distances[0][self.best[0]])
-        self.pheromone[self.best[-1]][0] += (self.Q / self.distances[self.best[-1]][0])
+        self._deposit (self.best)
 
 
 
 
 
-    def _next_node (self, options : List[Tuple[int,float]]) -> int:
+    def _deposit (self, tour : List[int]) -> None:
+        """
+        This method deposits the pheromone on the arcs of a tour.
+
+        """
+        for i in range (len(tour) - 1):
+            self.pheromone[tour[i]][tour[i + 1]] += (self.Q / self.distances[tour[i]][tour[i + 1]])
+        self.pheromone[0][tour[0]] += (self.Q / self.distances[0][tour[0]])
+        self.pheromone[tour[-1]][0] += (self.Q / self.distances[tour[-1]][0])
+
+
+
+
+
+    def warm_start (self, tours : Sequence[Sequence[int]]) -> int:
+        """
+        This method seeds the pheromone with the tours of similar orders already solved,
+        projected onto the picking list (see common.project_tour): the pheromone is
+        deposited on their arcs as if they were found by the colony, and the best of them
+        replaces the initial random best if it is better. It must be called after the
+        creation (or a reset) and before the run.
+
+        :param tours: The tours of the similar orders.
+        :return: The number of tours used.
+
+        """
+        projected = [project_tour(tour, self.picking_list, self.distances) for tour in tours]
+        for tour in projected:
+            self._deposit (tour)
+            cost = _compute_distance (tour, self.distances)
+            if cost < self.vbest:
+                self.best, self.vbest = tour, cost
+        self.history = History([self.vbest], max_points=self.history_points)
+        return len(projected)
+
+
+
+
+
+    def _next_node (self, options : List[Tuple[int,float]], r : Optional[float] = None) -> int:
         """
         This method returns the next node during the constructing process that 
         brings to a new solution.
@@ -167,11 +231,13 @@ class AntColony (object):
 
 
         :param options: List of tuples (node, desirability of node).
+        :param r: The random number used for the selection (by default a new one is drawn).
         :return: The selected node.
 
         """
         p : float = 0.0
-        r = random.random()
+        if r is None:
+            r = self.rng.random()
         total = sum (op[1] for op in sorted(options, key=lambda i : i[1], reverse=True))
 
         for op, prob in options:
@@ -200,9 +266,12 @@ class AntColony (object):
         tabu : Set[int] = {0}
         options : List[int] = list(self.picking_list)
 
+        # The random numbers of all the selections are drawn at once
+        rnd = self.rng.floats(len(self.picking_list))
+
         for i in range (len(self.picking_list)):
             options_params : List[Tuple[int,float]] = [(op, self.pheromone[c_node][op]**self.alpha / self.distances[c_node][op]**self.beta) for op in options]
-            n_node = self._next_node (options_params)
+            n_node = self._next_node (options_params, rnd[i])
             tabu.add (n_node)
             new_sol.append(n_node)
             options.remove (n_node)
@@ -217,20 +286,15 @@ class AntColony (object):
     def reset (self):
         # Initialize the best
         self.best = list(self.picking_list)
-        random.shuffle(self.best)
+        self.rng.shuffle(self.best)
         self.vbest = _compute_distance (self.best, self.distances)
 
         # Initialize the pheromone
-        for i in self.distances:
-            for j in self.distances:
-                if i != j:
-                    self.pheromone[i][j] = self.pher_init
-                else:
-                    self.pheromone[i][j] = 0
+        self._init_pheromone ()
 
         # Initialize the history and the number of iterations
         # needed to find the best.
-        self.history = [self.vbest]
+        self.history = History([self.vbest], max_points=self.history_points)
         self.computations = 0
         self.computational_time = 0.0
 
@@ -239,21 +303,41 @@ class AntColony (object):
 
 
 
-    def run (self, verbose : bool = False) -> Tuple[List[int], int]:
+    def _set_best (self, best : List[int], cost : int) -> None:
         """
-        This method represents the execution of the algorithm.
+        This method keeps the best solution improved by the final local search.
+
+        """
+        self.best, self.vbest = best, cost
+
+
 
-        :param verbose: If TRUE a log takes place every <print_every> iterations.
-        :return: The best solution and its cost.
 
+    def _search (self, verbose : bool, stop : Optional[Termination]) -> Iterator[Tuple[int, List[int], int]]:
         """
-        start = time.time()
+        The search of the colony (see Solver._search).
+
+        """
+        stats = self.stats
+
+        # The history starts with the run (its change points are timed from now)
+        self.history = History([self.vbest], max_points=self.history_points)
+
+        yield 0, list(self.best), self.vbest
+
         noimp : int = 0
         for i in range (self.max_iter):
-            
-            # Build a new solution
+        
+            if stats is not None:
+                t = time.perf_counter()
+
+            # Build a new solution (evaluated while it is built)
             new_sol, vnew_sol = self._new_solution ()
 
+            if stats is not None:
+                stats.evaluations += 1
+                t = stats.lap("construction", t)
+
             # Eventually evaporate pheromone
             if self.evaporate is True:
                 self._evap ()
@@ -266,6 +350,10 @@ class AntColony (object):
                 self._update ()
                 noimp = 0
                 self.computations = i
+                if stats is not None:
+                    stats.accepted += 1
+                    t = stats.lap("pheromone", t)
+                yield i + 1, list(self.best), self.vbest
             else:
                 noimp += 1
                 if noimp > self.max_noimp:
@@ -277,8 +365,12 @@ class AntColony (object):
             # Logs
             if verbose is True and i % self.print_every == 0:
                 print('Epoch', i, ' Best: ', self.vbest)
-                
-        # Set computational time
-        self.computational_time = time.time() - start
 
-        return self.best, self.vbest
+            if stats is not None:
+                if self.evaporate is True and noimp > 0:
+                    stats.lap("pheromone", t)
+                stats.iteration(i + 1, self.vbest)
+
+            if stop is not None and stop(self.vbest):
+                break
+
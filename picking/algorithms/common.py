@@ -0,0 +1,915 @@
+"""
+This file contains the data structures and the procedures shared by all
+the algorithms of the package.
+
+"""
+from typing import Any, Callable, Dict, FrozenSet, Iterator, List, Optional, Set, Tuple, Sequence, Union
+from collections import OrderedDict
+from array import array
+from bisect import bisect_right
+
+import sys
+import time
+import weakref
+import numpy as np # type: ignore
+
+
+
+# The maximum number of picking lists whose greedy solution is kept in memory
+GREEDY_MEMO_SIZE : int = 32
+
+# The memo of the greedy solutions: picking list -> (reference to the distance matrix, solution)
+_greedy_memo : "OrderedDict[Tuple[int, ...], Tuple[Any, List[int]]]" = OrderedDict()
+
+
+
+
+
+
+
+
+def submatrix (nodes : Sequence[int], distances : Any) -> np.ndarray:
+    """
+    This method extracts from the distance matrix the dense submatrix
+    of the given nodes. The element (i, j) of the result is the distance
+    from nodes[i] to nodes[j].
+
+    :param nodes: The nodes to consider (usually the origin followed by the picking list).
+    :param distances: The distance matrix.
+    :return: The submatrix as a numpy array of floats.
+
+    """
+    if isinstance(distances, np.ndarray):
+        return distances[np.ix_(nodes, nodes)].astype(np.float64)
+    return np.array([[distances[i][j] for j in nodes] for i in nodes], dtype=np.float64)
+
+
+
+
+
+
+
+
+def nearest_neighbour (matrix : np.ndarray) -> List[int]:
+    """
+    This method builds the nearest neighbour tour on a dense matrix where the
+    index 0 is the origin. At each step the row of the current node is masked
+    with the nodes already visited and the closest one is taken via argmin.
+
+    :param matrix: The dense distance matrix.
+    :return: The indexes of the matrix in the order in which they are visited (origin excluded).
+
+    """
+    work = np.array(matrix, dtype=np.float64, order="F")
+    work[:, 0] = np.inf
+    c_node : int = 0
+    tour : List[int] = []
+    for _ in range(work.shape[0] - 1):
+        c_node = int(np.argmin(work[c_node]))
+        work[:, c_node] = np.inf
+        tour.append (c_node)
+
+    return tour
+
+
+
+
+
+
+
+
+def _reference (distances : Any) -> Any:
+    """
+    This method returns a weak reference to the distance matrix, in order
+    not to keep it alive just because its greedy solutions are in the memo,
+    or None if the matrix cannot be weakly referenced (e.g. a dict).
+
+    """
+    try:
+        return weakref.ref(distances)
+    except TypeError:
+        return None
+
+
+
+
+
+
+
+
+def greedy_tour (picking_list : Sequence[int], distances : Any) -> List[int]:
+    """
+    This method returns the purely greedy solution of a picking list.
+    The solutions of the last <GREEDY_MEMO_SIZE> picking lists are memorised,
+    so that solvers and particles working on the same order share the same
+    computation (only for the matrices which can be weakly referenced, such
+    as numpy arrays).
+
+    :param picking_list: The nodes to visit.
+    :param distances: The distance matrix.
+    :return: The nodes in the order in which they should be visited.
+
+    """
+    key = tuple(picking_list)
+    entry = _greedy_memo.get(key)
+    if entry is not None and entry[0]() is distances:
+        _greedy_memo.move_to_end(key)
+        return list(entry[1])
+
+    nodes = [0] + list(picking_list)
+    tour = [nodes[i] for i in nearest_neighbour(submatrix(nodes, distances))]
+
+    reference = _reference(distances)
+    if reference is None:
+        return tour
+
+    _greedy_memo[key] = (reference, tour)
+    _greedy_memo.move_to_end(key)
+    while len(_greedy_memo) > GREEDY_MEMO_SIZE:
+        _greedy_memo.popitem(last=False)
+
+    return list(tour)
+
+
+
+
+
+
+
+
+def project_tour (tour : Sequence[int], picking_list : Sequence[int], distances : Any) -> List[int]:
+    """
+    This method projects the tour of a similar order onto a picking list, in
+    order to warm-start a solver: the nodes which are not in the picking list
+    are dropped, and the missing ones are inserted one at a time where they
+    increase the distance the least (the tour starts and ends in the origin).
+
+    :param tour: The tour of the similar order.
+    :param picking_list: The nodes to visit.
+    :param distances: The distance matrix.
+    :return: A tour visiting exactly the nodes of the picking list.
+
+    """
+    nodes = set(picking_list) - {0}
+    projected : List[int] = []
+    for node in tour:
+        if node in nodes and node not in projected:
+            projected.append (node)
+
+    kept = set(projected)
+    for node in picking_list:
+        if node == 0 or node in kept:
+            continue
+        best_pos, best_delta = 0, float("inf")
+        for pos in range(len(projected) + 1):
+            prev = projected[pos - 1] if pos > 0 else 0
+            succ = projected[pos] if pos < len(projected) else 0
+            delta = distances[prev][node] + distances[node][succ] - distances[prev][succ]
+            if delta < best_delta:
+                best_pos, best_delta = pos, delta
+        projected.insert (best_pos, node)
+        kept.add (node)
+
+    return projected
+
+
+
+
+
+
+
+
+def seed_swarm (swarm : Sequence[Any],
+                tours : Sequence[Sequence[int]],
+                picking_list : Sequence[int],
+                distances : Any,
+                share : float = 0.5
+                ) -> int:
+    """
+    This method seeds the current position and the personal best of some particles
+    with the tours of similar orders already solved, projected onto the picking list
+    (see project_tour), instead of random solutions. It must be called after the
+    creation (or a reset) of the swarm and before the run.
+
+    A particle which needs more than its position and personal best to be updated
+    (e.g. its velocity) defines a method warm_start(tour), which is called instead.
+
+    :param swarm: The particles.
+    :param tours: The tours of the similar orders (the most similar first).
+    :param picking_list: The nodes to visit.
+    :param distances: The distance matrix.
+    :param share: The maximum share of the swarm seeded (the other particles keep
+                their random solutions, so that the swarm stays diverse).
+    :return: The number of particles seeded.
+
+    """
+    projected = [project_tour(tour, picking_list, distances) for tour in tours]
+    count = min(len(projected), max(1, int(len(swarm) * share)))
+    for particle, tour in zip(swarm, projected[:count]):
+        if hasattr(particle, "warm_start"):
+            particle.warm_start (tour)
+            continue
+        cost = sum(distances[i][j] for i, j in zip([0] + tour, tour + [0]))
+        particle.current, particle.vcurrent = list(tour), cost
+        particle.pbest, particle.vpbest = list(tour), cost
+    return count
+
+
+
+
+
+
+
+
+class Problem (object):
+    """
+    An instance of this class represents the read-only data of a picking problem,
+    i.e. the distance matrix, the picking list, the paths between the nodes, and
+    the greedy solution.
+
+    It is built once per solver and referenced by all its particles, so that the
+    memory required by a swarm only depends on the number of particles and the
+    size of the picking list, and not on the size of the warehouse.
+
+    """
+
+    __slots__ = ("distances", "picking_list", "nodes", "index", "matrix", "paths", "greedy", "vgreedy")
+
+    def __init__ (self,
+                distances : Any,
+                picking_list : Sequence[int],
+                paths : Optional[Dict[int, Dict[int, Set[int]]]] = None
+                ) -> None:
+        """
+        Initialize.
+
+        :param distances: The distance matrix (it is referenced and never copied).
+        :param picking_list: The picking list.
+        :param paths: The nodes in between two others (optional).
+
+        :attr nodes: The origin followed by the picking list.
+        :attr index: The position of each node in <nodes>.
+        :attr matrix: The dense submatrix of the distances between the <nodes>.
+        :attr paths: The nodes of the picking list in between two nodes of <nodes>
+                    (only the nodes of the picking list are kept).
+        :attr greedy: The greedy solution.
+        :attr vgreedy: The cost of the greedy solution.
+
+        """
+        self.distances = distances
+        self.picking_list : Tuple[int, ...] = tuple(picking_list)
+        self.nodes : Tuple[int, ...] = (0,) + self.picking_list
+        self.index : Dict[int, int] = {node : i for i, node in enumerate(self.nodes)}
+
+        self.matrix : np.ndarray = submatrix(self.nodes, distances)
+        self.matrix.flags.writeable = False
+
+        self.paths : Optional[Dict[int, Dict[int, FrozenSet[int]]]] = None
+        if paths is not None:
+            self.paths = self._restrict_paths(paths)
+
+        self.greedy : Tuple[int, ...] = tuple(greedy_tour(self.picking_list, distances))
+        self.vgreedy : float = self.cost(self.greedy)
+
+
+
+
+    def _restrict_paths (self, paths : Dict[int, Dict[int, Set[int]]]) -> Dict[int, Dict[int, FrozenSet[int]]]:
+        """
+        This method keeps, for each pair of nodes of the problem, only the nodes
+        of the picking list which are on the path between them. The pairs missing
+        in <paths> (which may be sparse) are missing in the result too.
+
+        :param paths: The nodes in between two others.
+        :return: The restricted paths.
+
+        """
+        targets = frozenset(self.picking_list)
+        empty : FrozenSet[int] = frozenset()
+        restricted : Dict[int, Dict[int, FrozenSet[int]]] = {}
+        for i in self.nodes:
+            restricted[i] = {}
+            row = paths.get(i)
+            if row is None:
+                continue
+            for j in self.nodes:
+                between = row.get(j) if i != j else None
+                if between is None:
+                    continue
+                middle = targets.intersection(between)
+                restricted[i][j] = frozenset(middle) if len(middle) > 0 else empty
+
+        return restricted
+
+
+
+
+    def cost (self, lst : Sequence[int]) -> float:
+        """
+        This method calculates the distance ran to complete a tour of the
+        nodes of the problem, starting and finishing in the origin.
+
+        :param lst: The sequence of nodes.
+        :return: The distance ran.
+
+        """
+        index, matrix = self.index, self.matrix
+        idx = [0] + [index[node] for node in lst] + [0]
+        return float(matrix[idx[:-1], idx[1:]].sum())
+
+
+
+
+
+
+
+
+
+class Termination (object):
+    """
+    An instance of this class represents the additional stopping criteria of
+    a run: a deadline, a target cost, and an event set by another thread or
+    process to cancel the run.
+
+    """
+
+    __slots__ = ("deadline", "target_cost", "cancel_event")
+
+    def __init__ (self,
+                time_limit : Optional[float] = None,
+                target_cost : Optional[float] = None,
+                cancel_event : Optional[Any] = None,
+                start : Optional[float] = None
+                ) -> None:
+        """
+        Initialize.
+
+        :param time_limit: The seconds available for the run.
+        :param target_cost: The cost which, once reached, makes the run stop.
+        :param cancel_event: An event (threading or multiprocessing) which, once set, makes the run stop.
+        :param start: The starting time of the run (by default now).
+
+        """
+        self.deadline : Optional[float] = None
+        if time_limit is not None:
+            self.deadline = (start if start is not None else time.time()) + time_limit
+        self.target_cost = target_cost
+        self.cancel_event = cancel_event
+
+
+
+    @classmethod
+    def create (cls,
+                time_limit : Optional[float] = None,
+                target_cost : Optional[float] = None,
+                cancel_event : Optional[Any] = None,
+                start : Optional[float] = None
+                ) -> Optional["Termination"]:
+        """
+        This method returns the termination criteria, or None if there are none,
+        so that the solvers do not pay any check when they are not needed.
+
+        """
+        if time_limit is None and target_cost is None and cancel_event is None:
+            return None
+        return cls(time_limit, target_cost, cancel_event, start)
+
+
+
+    def expired (self) -> bool:
+        """
+        This method returns TRUE if the deadline is expired or the run has been cancelled.
+
+        """
+        return (self.deadline is not None and time.time() >= self.deadline) or \
+               (self.cancel_event is not None and self.cancel_event.is_set())
+
+
+
+    def __call__ (self, cost : float) -> bool:
+        """
+        This method returns TRUE if the run must stop, given the cost of the current best.
+
+        """
+        return (self.target_cost is not None and cost <= self.target_cost) or self.expired()
+
+
+
+
+
+
+
+
+class Stats (object):
+    """
+    An instance of this class collects the profiling data of the runs of a solver.
+    It is enabled by assigning it to the <stats> attribute of the solver, e.g.
+
+        solver.stats = Stats()
+        solver.run()
+        print(solver.stats.as_dict())
+
+    When the <stats> of a solver is None (the default) nothing is measured.
+
+    The phases measured are: construction, evaluation, local_search, velocity (i.e.
+    velocity update) and pheromone (i.e. pheromone update). Each solver only
+    measures the phases it has.
+
+    The hooks are functions called as hook(stats, iteration, cost) at the end of
+    every iteration ("iteration") or when the best improves ("improvement").
+
+    """
+
+    PHASES : Tuple[str, ...] = ("construction", "evaluation", "local_search", "velocity", "pheromone")
+
+    __slots__ = ("times", "calls", "evaluations", "accepted", "allocations", "records", "hooks",
+                 "_last", "_blocks", "_best")
+
+    def __init__ (self, hooks : Optional[Dict[str, List[Callable[["Stats", int, float], None]]]] = None) -> None:
+        """
+        Initialize.
+
+        :param hooks: The functions to call for each event ("iteration" or "improvement").
+
+        :attr times: The seconds spent in each phase.
+        :attr calls: The number of times each phase has been executed.
+        :attr evaluations: The number of solutions evaluated.
+        :attr accepted: The number of moves accepted (i.e. improvements of a personal
+                        best, moves accepted by the annealing, or new best of a colony).
+        :attr allocations: The net number of memory blocks allocated during the run.
+        :attr records: For each iteration, the tuple (iteration, evaluations, accepted, allocations).
+
+        """
+        self.times : Dict[str, float] = dict.fromkeys(self.PHASES, 0.0)
+        self.calls : Dict[str, int] = dict.fromkeys(self.PHASES, 0)
+        self.evaluations : int = 0
+        self.accepted : int = 0
+        self.allocations : int = 0
+        self.records : List[Tuple[int, int, int, int]] = []
+        self.hooks : Dict[str, List[Callable[["Stats", int, float], None]]] = {"iteration" : [], "improvement" : []}
+        for event, functions in (hooks or {}).items():
+            for function in functions:
+                self.on(event, function)
+
+        self._last : Tuple[int, int] = (0, 0)
+        self._blocks : int = sys.getallocatedblocks()
+        self._best : float = float("inf")
+
+
+
+    def on (self, event : str, function : Callable[["Stats", int, float], None]) -> None:
+        """
+        This method registers a hook.
+
+        :param event: The event ("iteration" or "improvement").
+        :param function: The function called as function(stats, iteration, cost).
+
+        """
+        if event not in self.hooks:
+            raise ValueError(f"Unknown event {event}")
+        self.hooks[event].append(function)
+
+
+
+    def start (self) -> None:
+        """
+        This method is called by the solver at the beginning of a run.
+
+        """
+        self._last = (self.evaluations, self.accepted)
+        self._blocks = sys.getallocatedblocks()
+        self._best = float("inf")
+
+
+
+    def lap (self, phase : str, since : float) -> float:
+        """
+        This method assigns to a phase the time passed since <since>.
+
+        :param phase: The phase.
+        :param since: The starting time of the phase (from time.perf_counter).
+        :return: The current time, i.e. the starting time of the next phase.
+
+        """
+        now = time.perf_counter()
+        self.times[phase] += now - since
+        self.calls[phase] += 1
+        return now
+
+
+
+    def iteration (self, iteration : int, cost : float) -> None:
+        """
+        This method is called by the solver at the end of every iteration.
+
+        :param iteration: The iteration.
+        :param cost: The cost of the current best.
+
+        """
+        blocks = sys.getallocatedblocks()
+        allocated, self._blocks = blocks - self._blocks, blocks
+        self.allocations += allocated
+        evaluations, accepted = self._last
+        self.records.append((iteration, self.evaluations - evaluations, self.accepted - accepted, allocated))
+        self._last = (self.evaluations, self.accepted)
+
+        for hook in self.hooks["iteration"]:
+            hook(self, iteration, cost)
+        if cost < self._best:
+            self._best = cost
+            for hook in self.hooks["improvement"]:
+                hook(self, iteration, cost)
+
+
+
+    def as_dict (self) -> Dict[str, Any]:
+        """
+        This method returns the statistics as a dictionary.
+
+        """
+        return {"times" : dict(self.times),
+                "calls" : dict(self.calls),
+                "evaluations" : self.evaluations,
+                "accepted" : self.accepted,
+                "allocations" : self.allocations,
+                "iterations" : len(self.records),
+                "records" : list(self.records)}
+
+
+
+
+
+
+
+
+class History (object):
+    """
+    An instance of this class represents the history of the cost of the best
+    solution during a run, i.e. one cost per iteration.
+
+    Only the change points are stored, in typed arrays: the iteration, the seconds
+    passed since the history started, and the new cost. The full curve is
+    reconstructed on demand by iterating over the history, indexing it, or
+    calling <full>.
+
+    If <max_points> is given, every time the change points exceed it, one out
+    of two is dropped (the first and the last are always kept), so that the
+    history never takes more than a fixed amount of memory.
+
+    """
+
+    __slots__ = ("iterations", "times", "costs", "length", "max_points", "_start")
+
+    def __init__ (self, values : Sequence[float] = (), max_points : Optional[int] = None) -> None:
+        """
+        Initialize.
+
+        :param values: The starting costs.
+        :param max_points: The maximum number of change points kept.
+
+        :attr iterations: The iterations in which the cost changed.
+        :attr times: The seconds passed when the cost changed.
+        :attr costs: The new costs.
+        :attr length: The number of iterations recorded.
+
+        """
+        self.iterations = array("l")
+        self.times = array("d")
+        self.costs = array("d")
+        self.length : int = 0
+        self.max_points = max_points
+        self._start : float = time.perf_counter()
+        for value in values:
+            self.append(value)
+
+
+
+    def append (self, cost : float) -> None:
+        """
+        This method records the cost of the best solution in a new iteration.
+
+        """
+        if self.length == 0 or cost != self.costs[-1]:
+            self.iterations.append(self.length)
+            self.times.append(time.perf_counter() - self._start)
+            self.costs.append(cost)
+            if self.max_points is not None and len(self.costs) > self.max_points:
+                self._downsample()
+        self.length += 1
+
+
+
+    def _downsample (self) -> None:
+        """
+        This method drops one change point out of two, keeping the first and the last.
+
+        """
+        keep = list(range(0, len(self.costs) - 1, 2)) + [len(self.costs) - 1]
+        self.iterations = array("l", [self.iterations[i] for i in keep])
+        self.times = array("d", [self.times[i] for i in keep])
+        self.costs = array("d", [self.costs[i] for i in keep])
+
+
+
+    def change_points (self) -> List[Tuple[int, float, float]]:
+        """
+        This method returns the change points as tuples (iteration, seconds, cost).
+
+        """
+        return list(zip(self.iterations, self.times, self.costs))
+
+
+
+    def full (self) -> List[float]:
+        """
+        This method returns the full curve, i.e. the cost in every iteration.
+
+        """
+        return list(self)
+
+
+
+    def __len__ (self) -> int:
+        return self.length
+
+
+
+    def __iter__ (self) -> Iterator[float]:
+        for k, cost in enumerate(self.costs):
+            end = self.iterations[k + 1] if k + 1 < len(self.iterations) else self.length
+            for _ in range(self.iterations[k], end):
+                yield cost
+
+
+
+    def __getitem__ (self, i : Union[int, slice]) -> Union[float, List[float]]:
+        if isinstance(i, slice):
+            return self.full()[i]
+        if i < 0:
+            i += self.length
+        if not 0 <= i < self.length:
+            raise IndexError("history index out of range")
+        return self.costs[bisect_right(self.iterations, i) - 1]
+
+
+
+    def __repr__ (self) -> str:
+        return f"History(length={self.length}, points={len(self.costs)})"
+
+
+
+
+
+
+
+
+class RandomStream (object):
+    """
+    An instance of this class is an independent stream of random numbers used by
+    a solver for all its randomness, in place of the global <random> module (whose
+    interface it mirrors: random, randint, choice, and shuffle).
+
+    The numbers are drawn from a numpy Generator in blocks of <BUFFER> at a time,
+    so that the inner loops do not pay a call to the generator for every number.
+    Streams for parallel runs are made independent by seeding them with the
+    children of a numpy SeedSequence (see SeedSequence.spawn).
+
+    """
+
+    # The number of random numbers pre-generated at once
+    BUFFER : int = 1024
+
+    __slots__ = ("generator", "_buffer")
+
+    def __init__ (self, seed : Any = None) -> None:
+        """
+        Initialize.
+
+        :param seed: An int, a numpy SeedSequence, or a numpy Generator (by default fresh entropy).
+
+        :attr generator: The numpy Generator.
+
+        """
+        self.generator : np.random.Generator
+        self._buffer : List[float]
+        self.seed(seed)
+
+
+
+    @classmethod
+    def create (cls, rng : Any = None) -> "RandomStream":
+        """
+        This method returns <rng> if it is already a stream, otherwise a new
+        stream seeded with it.
+
+        """
+        return rng if isinstance(rng, RandomStream) else cls(rng)
+
+
+
+    def seed (self, seed : Any = None) -> None:
+        """
+        This method restarts the stream from a new seed, so that whoever shares
+        the stream (e.g., the particles of a swarm) is reseeded too.
+
+        """
+        self.generator = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+        self._buffer = []
+
+
+
+    def spawn (self, n : int) -> List[np.random.SeedSequence]:
+        """
+        This method returns <n> independent seeds drawn from this stream, to seed
+        the streams of parallel runs (so that they are reproducible if this
+        stream is).
+
+        """
+        return np.random.SeedSequence(self.generator.integers(0, 2**32, size=4).tolist()).spawn(n)
+
+
+
+    def random (self) -> float:
+        """
+        This method returns a random number in [0, 1).
+
+        """
+        try:
+            return self._buffer.pop()
+        except IndexError:
+            self._buffer = self.generator.random(self.BUFFER).tolist()
+            return self._buffer.pop()
+
+
+
+    def floats (self, n : int) -> List[float]:
+        """
+        This method returns <n> random numbers in [0, 1), generated at once.
+
+        """
+        return self.generator.random(n).tolist()
+
+
+
+    def randint (self, a : int, b : int) -> int:
+        """
+        This method returns a random integer in [a, b], both included.
+
+        """
+        return a + int(self.random() * (b - a + 1))
+
+
+
+    def choice (self, seq : Sequence[Any]) -> Any:
+        """
+        This method returns a random element of a non-empty sequence.
+
+        """
+        return seq[int(self.random() * len(seq))]
+
+
+
+    def shuffle (self, lst : List[Any]) -> None:
+        """
+        This method shuffles a list in place.
+
+        """
+        if len(lst) > 1:
+            lst[:] = [lst[i] for i in self.generator.permutation(len(lst)).tolist()]
+
+
+
+
+
+
+
+
+
+class Solver (object):
+    """
+    The base class of the algorithms. Each algorithm implements its search in the
+    generator <_search>, and this class does what is common to all of them around it:
+    the termination criteria, the profiling, the final local search, and the measure
+    of the computational time.
+
+    The algorithms call Solver.__init__ before initializing their own attributes, and
+    have the attributes history (the history of the best solutions found, recreated
+    at the beginning of each run) and computations.
+
+    """
+
+    def __init__ (self) -> None:
+        """
+        Initialize.
+
+        :attr stats: The profiling data of the runs (None to disable the profiling).
+        :attr history_points: The maximum number of change points kept in the history (None to keep them all).
+        :attr post_optimizer: The local search applied to the best solution at the end of the run, e.g. a
+                            LocalSearch (None not to do it).
+        :attr computational_time: The seconds of the last run.
+
+        """
+        self.stats : Optional[Stats] = None
+        self.history_points : Optional[int] = None
+        self.post_optimizer : Optional[Callable[..., Tuple[List[int], float]]] = None
+        self.history : History
+        self.computations : int = 0
+        self.computational_time : float = 0.0
+
+
+
+    def _search (self, verbose : bool, stop : Optional[Termination]) -> Iterator[Tuple[int, List[int], Any]]:
+        """
+        This method is the search of the algorithm: a generator which yields (iteration,
+        best solution, cost of the best solution) every time the best solution improves,
+        starting from the initial one, and appends the best cost of every iteration to
+        the history.
+
+        :param verbose: If TRUE every <print_every> iterations the best is logged.
+        :param stop: The termination criteria of the run (None if there are none).
+        :return: A generator of (iteration, best, cost of the best).
+
+        """
+        raise NotImplementedError
+
+
+
+    def _set_best (self, best : List[int], cost : Any) -> None:
+        """
+        This method is called when the final local search improves the best solution,
+        for the algorithms which keep it as an attribute.
+
+        """
+        pass
+
+
+
+    def run (self,
+            verbose : bool = False,
+            time_limit : Optional[float] = None,
+            target_cost : Optional[float] = None,
+            cancel_event : Optional[Any] = None
+            ) -> Tuple[List[int], Any]:
+        """
+        This method represents the execution of the algorithm.
+        It finally returns the best solution found and its cost.
+        The parameters are the same of <run_iter>.
+
+        :return: The best solution and its cost.
+
+        """
+        best : List[int] = []
+        cost : Any = float("inf")
+        for _, _, best, cost in self.run_iter (verbose, time_limit, target_cost, cancel_event):
+            pass
+
+        return best, cost
+
+
+
+    def run_iter (self,
+            verbose : bool = False,
+            time_limit : Optional[float] = None,
+            target_cost : Optional[float] = None,
+            cancel_event : Optional[Any] = None
+            ) -> Iterator[Tuple[int, float, List[int], Any]]:
+        """
+        This method executes the algorithm step by step: it is a generator which yields
+        (iteration, elapsed seconds, best solution, cost of the best solution) every time
+        the best solution improves, starting from the initial one.
+
+        :param verbose: If TRUE every <print_every> iterations the best is logged.
+        :param time_limit: The maximum seconds of the run (final local search included).
+        :param target_cost: If a solution at least as good is found the run stops.
+        :param cancel_event: An event which, once set by another thread or process, stops the run.
+        :return: A generator of (iteration, elapsed, best, cost of the best).
+
+        """
+        start = time.time()
+        stop = Termination.create(time_limit, target_cost, cancel_event, start)
+        stats = self.stats
+        if stats is not None:
+            stats.start()
+
+        try:
+            best : List[int] = []
+            cost : Any = float("inf")
+            for iteration, best, cost in self._search (verbose, stop):
+                yield iteration, time.time() - start, list(best), cost
+
+            # Final local search
+            if self.post_optimizer is not None and (stop is None or not stop.expired()):
+                if stats is not None:
+                    t = time.perf_counter()
+                tour, vtour = self.post_optimizer(best, stop)
+                if stats is not None:
+                    stats.lap("local_search", t)
+                if vtour < cost:
+                    self._set_best (list(tour), vtour)
+                    iteration = len(self.history)
+                    self.history.append (vtour)
+                    yield iteration, time.time() - start, list(tour), vtour
+
+        finally:
+            # Set the computational time
+            self.computational_time = time.time() - start
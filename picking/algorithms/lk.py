@@ -0,0 +1,337 @@
+from typing import Any, Iterator, List, Optional, Sequence, Set, Tuple
+
+import time
+
+from .common import greedy_tour, project_tour, Termination, History, RandomStream, Solver
+from .localsearch import LocalSearch, EPSILON
+
+
+
+
+
+
+
+
+class _LinKernighanSearch (LocalSearch):
+    """
+    The local search of the Lin-Kernighan: a variable-depth sequence of 2-Opt
+    moves (flips of the array-based tour), followed by Or-Opt moves.
+
+    """
+
+    def __init__ (self,
+                distances : Any,
+                picking_list : Sequence[int],
+                neighbours : int = 8,
+                max_depth : int = 25,
+                breadth : int = 5
+                ) -> None:
+        """
+        Initialize.
+
+        :param max_depth: The maximum number of flips of a move.
+        :param breadth: The number of alternatives tried for the first flip of a move.
+
+        """
+        super().__init__(distances, picking_list, neighbours, moves=("lk", "oropt"))
+        self.max_depth = max_depth
+        self.breadth = breadth
+
+
+
+    def _improve (self, a : int) -> Optional[Sequence[int]]:
+        if self.symmetric:
+            touched = self._lin_kernighan(a)
+            if touched is not None:
+                return touched
+        return self._or_opt(a)
+
+
+
+    def _candidates (self, t1 : int, t2 : int, g : float, used : Set[int]) -> List[Tuple[float, int]]:
+        """
+        This method returns the nodes t3 which can follow t2 in a flip (i.e. the new edge
+        (t2, t3) keeps the partial gain positive), the most promising first.
+
+        """
+        M = self.matrix
+        forward = self._succ(t1) == t2
+        candidates = []
+        for t3 in self.neighbour_lists[t2]:
+            g1 = g - M[t2, t3]
+            if g1 <= EPSILON:
+                break
+            if t3 == t1 or t3 in used:
+                continue
+            t4 = self._pred(t3) if forward else self._succ(t3)
+            if t4 == t2:
+                continue
+            candidates.append((M[t4, t3] - M[t2, t3], t3))
+        candidates.sort(reverse=True)
+        return candidates
+
+
+
+    def _flip (self, t1 : int, t2 : int, t3 : int) -> int:
+        """
+        This method replaces the edges (t1, t2) and (t4, t3) with (t2, t3) and (t1, t4),
+        where t4 is the neighbour of t3 on the side of t2.
+
+        :return: t4.
+
+        """
+        if self._succ(t1) == t2:
+            t4 = self._pred(t3)
+            self._reverse(t2, t4)
+        else:
+            t4 = self._succ(t3)
+            self._reverse(t4, t2)
+        return t4
+
+
+
+    def _lin_kernighan (self, t1 : int) -> Optional[Sequence[int]]:
+        """
+        The Lin-Kernighan move starting from t1: the edge (t1, t2) is removed, and a
+        sequence of flips is built while the partial gain stays positive; the move is
+        then cut at the flip where closing the tour gives the best improvement.
+
+        """
+        M = self.matrix
+        for t2 in (self._succ(t1), self._pred(t1)):
+            g0 = M[t1, t2]
+            for _, first in self._candidates(t1, t2, g0, set())[:self.breadth]:
+                flips : List[Tuple[int, int]] = []
+                touched = [t1, t2]
+                used = {first}
+                g, best_gain, best_depth = g0, EPSILON, 0
+                a2, a3 = t2, first
+                while True:
+                    t4 = self._flip(t1, a2, a3)
+                    flips.append((t4, a3))
+                    touched.extend((a3, t4))
+                    g += M[t4, a3] - M[a2, a3]
+                    if g - M[t4, t1] > best_gain:
+                        best_gain, best_depth = g - M[t4, t1], len(flips)
+                    if len(flips) >= self.max_depth:
+                        break
+                    candidates = self._candidates(t1, t4, g, used)
+                    if len(candidates) == 0:
+                        break
+                    a2, a3 = t4, candidates[0][1]
+                    used.add(a3)
+
+                # Undo the flips after the best closure
+                for t4, t3 in reversed(flips[best_depth:]):
+                    self._flip(t1, t4, t3)
+                if best_depth > 0:
+                    return touched[:2 * best_depth + 2]
+        return None
+
+
+
+    def kick (self, rng : RandomStream, max_segment : int = 50) -> List[int]:
+        """
+        This method perturbs the tour with a double bridge, i.e. exchanging two
+        consecutive segments (of at most <max_segment> nodes each).
+
+        :return: The nodes whose edges changed.
+
+        """
+        tour, n = self._tour, len(self._tour)
+        p1 = rng.randint(1, n - 3)
+        p2 = min(p1 + rng.randint(1, max_segment), n - 2)
+        p3 = min(p2 + rng.randint(1, max_segment), n - 1)
+        touched = [tour[p1 - 1], tour[p1], tour[p2 - 1], tour[p2], tour[p3 - 1], tour[p3 % n]]
+        self._set(tour[:p1] + tour[p2:p3] + tour[p1:p2] + tour[p3:])
+        return touched
+
+
+
+
+
+
+
+
+class LinKernighan (Solver):
+    """
+    This is an iterated Lin-Kernighan in the style of the Or-LK: a fast and strong
+    baseline for large picking lists.
+
+    The starting tour (greedy) is improved by Lin-Kernighan moves, i.e. variable-depth
+    sequences of 2-Opt flips on an array-based tour, and Or-Opt moves, considering as new
+    neighbours of each location only its closest ones (neighbour lists) and searching
+    only around the locations whose edges changed (don't-look bits). Then, at each
+    iteration, the best tour is perturbed by a double bridge and improved again, and the
+    result is kept if it is better.
+
+    The distance matrix is assumed symmetric (as those of the warehouses); on asymmetric
+    matrices the algorithm still works, since the tours are always evaluated exactly,
+    but it is less effective.
+
+    """
+
+    def __init__ (self,
+                distances : Any,
+                picking_list : List[int],
+                neighbours : int = 8,
+                max_depth : int = 25,
+                breadth : int = 5,
+                max_iter : int = 1000,
+                max_noimp : int = 200,
+                print_every : int = 100,
+                rng : Any = None
+                ) -> None:
+        """
+        Initialize.
+
+        :param distances: The distance matrix.
+        :param picking_list: The picking list.
+        :param neighbours: The length of the neighbour lists.
+        :param max_depth: The maximum number of flips of a Lin-Kernighan move.
+        :param breadth: The number of alternatives tried for the first flip of a move.
+        :param max_iter: The number of iterations (i.e. perturbations).
+        :param max_noimp: The maximum number of iterations without improvement.
+        :param print_every: The iterations between a log and the next one.
+        :param rng: The random stream, or a seed for it (an int, a numpy SeedSequence or Generator).
+                    By default it is seeded with fresh entropy.
+
+        :attr rng: The random stream used for all the randomness.
+        :attr search: The local search (with the dense matrix and the neighbour lists of the picking list).
+        :attr start: The starting tour (the greedy one, unless warm-started).
+        :attr best: The best solution found so far.
+        :attr vbest: The cost of the best.
+        :attr history: The history of the best solutions found.
+        :attr computations: The number of iterations needed to find the best.
+
+        """
+        Solver.__init__ (self)
+
+        self.distances = distances
+        self.picking_list = picking_list
+        self.max_iter = max_iter
+        self.max_noimp = max_noimp
+        self.print_every = print_every
+        self.rng = RandomStream.create(rng)
+
+        self.search = _LinKernighanSearch(distances, picking_list, neighbours, max_depth, breadth)
+        self.start : List[int] = greedy_tour(self.search.nodes[1:], distances)
+        self.best : List[int] = list(self.start)
+        self.vbest : float = self.search.cost(self.best)
+
+        self.history = History([self.vbest], max_points=self.history_points)
+
+
+
+    def reset (self):
+        self.start = greedy_tour(self.search.nodes[1:], self.distances)
+        self.best = list(self.start)
+        self.vbest = self.search.cost(self.best)
+        self.history = History([self.vbest], max_points=self.history_points)
+        self.computations = 0
+        self.computational_time = 0.0
+
+
+
+    def warm_start (self, tours : Sequence[Sequence[int]]) -> int:
+        """
+        This method starts the search from the best of the tours of similar orders
+        already solved, projected onto the picking list (see common.project_tour), if
+        it is better than the greedy tour. It must be called after the creation (or a
+        reset) and before the run.
+
+        :param tours: The tours of the similar orders.
+        :return: The number of tours used.
+
+        """
+        for tour in tours:
+            projected = project_tour(tour, self.search.nodes[1:], self.distances)
+            cost = self.search.cost(projected)
+            if cost < self.vbest:
+                self.start, self.best, self.vbest = projected, list(projected), cost
+        self.history = History([self.vbest], max_points=self.history_points)
+        return len(tours)
+
+
+
+    def _set_best (self, best : List[int], cost : float) -> None:
+        """
+        This method keeps the best solution improved by the final local search.
+
+        """
+        self.best, self.vbest = best, cost
+
+
+
+
+    def _search (self, verbose : bool, stop : Optional[Termination]) -> Iterator[Tuple[int, List[int], float]]:
+        """
+        The search of the Lin-Kernighan (see Solver._search): the descent from the
+        starting tour, followed by the iterations of perturbation and descent.
+
+        """
+        stats = self.stats
+
+        search = self.search
+        search._set([0] + [search.index[node] for node in self.start])
+        self.best, self.vbest = list(self.start), search.cost(self.start)
+        self.history = History([self.vbest], max_points=self.history_points)
+
+        yield 0, list(self.best), self.vbest
+
+        if len(search._tour) < 4:
+            return
+
+        # The first descent from the starting tour
+        if stats is not None:
+            t = time.perf_counter()
+        search._descend(list(search._tour), stop)
+        best_tour = list(search._tour)
+        tour, cost = search._result()
+        if stats is not None:
+            stats.evaluations += 1
+            stats.lap("local_search", t)
+        if cost < self.vbest:
+            self.best, self.vbest = tour, cost
+            yield 0, list(self.best), self.vbest
+
+        noimp : int = 0
+        for i in range (self.max_iter if len(search._tour) >= 8 else 0):
+
+            if stop is not None and stop(self.vbest):
+                break
+
+            if stats is not None:
+                t = time.perf_counter()
+
+            # Perturb the best tour and improve it
+            search._set(list(best_tour))
+            touched = search.kick(self.rng)
+            if stats is not None:
+                t = stats.lap("construction", t)
+            search._descend(touched, stop)
+            tour, cost = search._result()
+            if stats is not None:
+                stats.evaluations += 1
+                stats.lap("local_search", t)
+
+            if cost < self.vbest - EPSILON:
+                self.best, self.vbest = tour, cost
+                best_tour = list(search._tour)
+                noimp = 0
+                self.computations = i + 1
+                if stats is not None:
+                    stats.accepted += 1
+                yield i + 1, list(self.best), self.vbest
+            else:
+                noimp += 1
+                if noimp > self.max_noimp:
+                    break
+
+            self.history.append (self.vbest)
+
+            if verbose is True and i % self.print_every == 0:
+                print('Epoch', i, ' Best: ', self.vbest)
+
+            if stats is not None:
+                stats.iteration(i + 1, self.vbest)
@@ -0,0 +1,445 @@
+"""
+This file contains a local-search engine which improves a given tour, to be used on
+its own or as a post-optimizer of any algorithm of the package (see the attribute
+<post_optimizer> of the algorithms).
+
+The moves are 2-Opt, Or-Opt (the relocation of a segment of up to <max_segment>
+locations, possibly reversed), and the 3-Opt moves which reconnect three edges
+reversing one or both segments in between (or exchanging them). All the moves are
+evaluated in constant time (delta evaluation), only the <neighbours> closest
+locations are considered as new neighbours of a location (neighbour lists), and the
+locations whose neighbourhood did not improve the tour are not searched again until
+one of their edges changes (don't-look bits).
+
+The moves which reverse a part of the tour are used only on symmetric matrices.
+
+"""
+from typing import Any, Deque, List, Optional, Sequence, Tuple
+from collections import deque
+
+import numpy as np # type: ignore
+
+from .common import submatrix, Termination
+
+
+
+
+# The minimum improvement of a move
+EPSILON : float = 1e-9
+
+
+
+
+
+
+
+
+class LocalSearch (object):
+    """
+    An instance of this class is the local search of a picking list, e.g.
+
+        search = LocalSearch(distances, picking_list)
+        tour, cost = search(tour)
+
+    or, as a post-optimizer,
+
+        solver.post_optimizer = LocalSearch(distances, picking_list)
+
+    """
+
+    def __init__ (self,
+                distances : Any,
+                picking_list : Sequence[int],
+                neighbours : int = 8,
+                moves : Sequence[str] = ("2opt", "oropt", "3opt"),
+                max_segment : int = 3,
+                max_moves : Optional[int] = None
+                ) -> None:
+        """
+        Initialize.
+
+        :param distances: The distance matrix.
+        :param picking_list: The nodes to visit.
+        :param neighbours: The length of the neighbour lists.
+        :param moves: The moves used ("2opt", "oropt", "3opt").
+        :param max_segment: The maximum length of the segments relocated by the Or-Opt.
+        :param max_moves: The maximum number of moves applied (None for no limit).
+
+        :attr nodes: The origin followed by the picking list (the matrix is indexed by their positions).
+        :attr matrix: The dense distance matrix of the <nodes>.
+        :attr symmetric: TRUE if the matrix is symmetric (otherwise the reversals are not used).
+        :attr neighbour_lists: The indexes of the closest nodes of each node.
+        :attr applied: The number of moves applied in the last search.
+
+        """
+        self.nodes : List[int] = [0] + [node for node in dict.fromkeys(picking_list) if node != 0]
+        self.index = {node : i for i, node in enumerate(self.nodes)}
+        self.matrix : np.ndarray = submatrix(self.nodes, distances)
+        self.symmetric : bool = bool(np.allclose(self.matrix, self.matrix.T))
+        self.moves = tuple(moves)
+        self.max_segment = max_segment
+        self.max_moves = max_moves
+
+        n = len(self.nodes)
+        k = max(1, min(neighbours, n - 1))
+        ranked = np.argsort(self.matrix + np.diag(np.full(n, np.inf)), axis=1, kind="stable")
+        self.neighbour_lists : List[List[int]] = ranked[:, :k].tolist()
+
+        self.applied : int = 0
+
+        # The current tour as indexes of the matrix (origin included) and their positions
+        self._tour : List[int] = []
+        self._pos : List[int] = []
+
+
+
+    def __call__ (self, tour : Sequence[int], stop : Optional[Termination] = None) -> Tuple[List[int], float]:
+        """
+        This method improves a tour until no move improves it any more.
+
+        :param tour: The tour (origin excluded).
+        :param stop: The termination criteria of the run (they interrupt the search).
+        :return: The improved tour and its cost.
+
+        """
+        return self.run(tour, stop)
+
+
+
+    def cost (self, tour : Sequence[int]) -> float:
+        """
+        This method returns the cost of a tour, starting and finishing in the origin.
+
+        """
+        idx = [0] + [self.index[node] for node in tour] + [0]
+        return float(self.matrix[idx[:-1], idx[1:]].sum())
+
+
+
+    def run (self, tour : Sequence[int], stop : Optional[Termination] = None) -> Tuple[List[int], float]:
+        """
+        This method improves a tour until no move improves it any more (or the
+        maximum number of moves is reached, or the run is stopped).
+
+        :param tour: The tour (origin excluded).
+        :param stop: The termination criteria of the run.
+        :return: The improved tour and its cost.
+
+        """
+        self._set([0] + [self.index[node] for node in tour])
+        self.applied = 0
+        if len(self._tour) < 4:
+            return list(tour), self.cost(tour)
+
+        self._descend(self._tour, stop)
+        return self._result()
+
+
+
+    def _descend (self, nodes : Sequence[int], stop : Optional[Termination] = None) -> None:
+        """
+        This method applies improving moves to the current tour until none is found,
+        starting from the neighbourhoods of the given <nodes> (the don't-look bits of
+        all the others are set).
+
+        """
+        active = [False] * len(self._tour)
+        for node in nodes:
+            active[node] = True
+        queue : Deque[int] = deque(nodes)
+        while len(queue) > 0:
+            if self.max_moves is not None and self.applied >= self.max_moves:
+                break
+            if stop is not None and stop.expired():
+                break
+            a = queue.popleft()
+            active[a] = False
+            touched = self._improve(a)
+            if touched is not None:
+                self.applied += 1
+                for node in touched:
+                    if not active[node]:
+                        active[node] = True
+                        queue.append(node)
+
+
+
+    def _result (self) -> Tuple[List[int], float]:
+        """
+        This method returns the current tour (starting after the origin) and its cost.
+
+        """
+        i = self._pos[0]
+        result = [self.nodes[j] for j in self._tour[i + 1:] + self._tour[:i]]
+        return result, self.cost(result)
+
+
+
+    def _set (self, tour : List[int]) -> None:
+        self._tour = tour
+        self._pos = [0] * len(tour)
+        for i, node in enumerate(tour):
+            self._pos[node] = i
+
+
+
+    def _succ (self, node : int) -> int:
+        return self._tour[(self._pos[node] + 1) % len(self._tour)]
+
+
+
+    def _pred (self, node : int) -> int:
+        return self._tour[self._pos[node] - 1]
+
+
+
+    def _offset (self, a : int, b : int) -> int:
+        """
+        The number of steps forward from <a> to <b>.
+
+        """
+        return (self._pos[b] - self._pos[a]) % len(self._tour)
+
+
+
+    def _path (self, a : int, b : int) -> List[int]:
+        """
+        The nodes from <a> to <b> going forward (both included).
+
+        """
+        i, j, tour = self._pos[a], self._pos[b], self._tour
+        return tour[i:j + 1] if i <= j else tour[i:] + tour[:j + 1]
+
+
+
+    def _improve (self, a : int) -> Optional[Sequence[int]]:
+        """
+        This method looks for an improving move around the node <a> and applies
+        the first one found.
+
+        :return: The nodes whose edges changed, or None if no move was found.
+
+        """
+        for move in self.moves:
+            if move == "2opt" and self.symmetric:
+                touched = self._two_opt(a)
+            elif move == "oropt":
+                touched = self._or_opt(a)
+            elif move == "3opt":
+                touched = self._three_opt(a)
+            else:
+                continue
+            if touched is not None:
+                return touched
+        return None
+
+
+
+    def _two_opt (self, a : int) -> Optional[Sequence[int]]:
+        """
+        The 2-Opt: the edges (a, b) and (c, d) are replaced by (a, c) and (b, d).
+
+        """
+        M = self.matrix
+        for forward in (True, False):
+            b = self._succ(a) if forward else self._pred(a)
+            d_ab = M[a, b]
+            for c in self.neighbour_lists[a]:
+                g1 = d_ab - M[a, c]
+                if g1 <= EPSILON:
+                    break
+                d = self._succ(c) if forward else self._pred(c)
+                if c == b or d == a:
+                    continue
+                if g1 + M[c, d] - M[b, d] > EPSILON:
+                    if forward:
+                        self._reverse(b, c)
+                    else:
+                        self._reverse(a, d)
+                    return (a, b, c, d)
+        return None
+
+
+
+    def _reverse (self, b : int, c : int) -> None:
+        """
+        This method reverses the path from <b> to <c> (going forward), or the rest
+        of the tour if it is shorter (which gives the same tour run backward).
+
+        """
+        n = len(self._tour)
+        inner = self._offset(b, c) + 1
+        if 2 * inner > n:
+            b, c = self._succ(c), self._pred(b)
+            inner = n - inner
+        tour, pos = self._tour, self._pos
+        i, j = pos[b], pos[c]
+        for _ in range(inner // 2):
+            tour[i], tour[j] = tour[j], tour[i]
+            pos[tour[i]], pos[tour[j]] = i, j
+            i, j = (i + 1) % n, (j - 1) % n
+
+
+
+    def _or_opt (self, a : int) -> Optional[Sequence[int]]:
+        """
+        The Or-Opt: the segment from <a> to <s2> (up to <max_segment> nodes) is moved
+        between two other consecutive nodes, possibly reversed.
+
+        """
+        M, n = self.matrix, len(self._tour)
+        s2 = a
+        for length in range(1, self.max_segment + 1):
+            if length > 1:
+                s2 = self._succ(s2)
+            if length + 3 > n:
+                break
+            p, nx = self._pred(a), self._succ(s2)
+            if s2 == p:
+                break
+            gain = M[p, a] + M[s2, nx] - M[p, nx]
+            if gain <= EPSILON:
+                continue
+            segment = self._path(a, s2)
+            inside = set(segment)
+
+            # (c, d): the edge where the segment is inserted, first and last: its ends next to c and d
+            candidates : List[Tuple[int, int, int, int]] = []
+            for end in (a, s2):
+                for c in self.neighbour_lists[end]:
+                    if c in inside:
+                        continue
+                    other = s2 if end == a else a
+                    # c before the segment (c, end ... other, d) or after it (e, other ... end, c)
+                    d = self._succ(c)
+                    if d not in inside:
+                        candidates.append((c, d, end, other))
+                    e = self._pred(c)
+                    if e not in inside:
+                        candidates.append((e, c, other, end))
+
+            for c, d, first, last in candidates:
+                if first != a and length > 1 and not self.symmetric:
+                    continue
+                if c == p and d == nx:
+                    continue
+                if gain - (M[c, first] + M[last, d] - M[c, d]) > EPSILON:
+                    rest = self._path(nx, p)
+                    k = rest.index(c)
+                    block = segment if first == a else segment[::-1]
+                    self._set(rest[:k + 1] + block + rest[k + 1:])
+                    return (p, nx, c, d, a, s2)
+        return None
+
+
+
+    def _three_opt (self, a : int) -> Optional[Sequence[int]]:
+        """
+        The 3-Opt on the tour a, b ... c, d ... e, f: the edges (a, b), (c, d) and (e, f)
+        are replaced so that the two segments are exchanged and/or reversed:
+
+            a - d ... e - b ... c - f       (exchange)
+            a - d ... e - c ... b - f       (exchange, first segment reversed)
+            a - e ... d - b ... c - f       (second segment reversed)
+            a - c ... b - e ... d - f       (both segments reversed)
+
+        """
+        M = self.matrix
+        b = self._succ(a)
+        d_ab = M[a, b]
+        for x in self.neighbour_lists[a]:
+            g1 = d_ab - M[a, x]
+            if g1 <= EPSILON or x == b:
+                if g1 <= EPSILON:
+                    break
+                continue
+
+            # New edge (a, d): d starts the second segment
+            d = x
+            c = self._pred(d)
+            if c != a and d != a:
+                for y, option in ((b, 0), (c, 1)):
+                    if option == 1 and not self.symmetric:
+                        continue
+                    for e in self.neighbour_lists[y]:
+                        # e must be in d ... (pred of a)
+                        if self._offset(d, e) >= self._offset(d, a):
+                            continue
+                        f = self._succ(e)
+                        if option == 0:
+                            delta = M[a, d] + M[e, b] + M[c, f] - d_ab - M[c, d] - M[e, f]
+                        else:
+                            delta = M[a, d] + M[e, c] + M[b, f] - d_ab - M[c, d] - M[e, f]
+                        if delta < -EPSILON:
+                            seg1, seg2 = self._path(b, c), self._path(d, e)
+                            self._exchange(f, a, seg2 + (seg1 if option == 0 else seg1[::-1]))
+                            return (a, b, c, d, e, f)
+
+            if not self.symmetric:
+                continue
+
+            # New edge (a, e): e ends the second segment, which is reversed
+            e = x
+            if self._offset(b, e) < 2:
+                continue
+            f = self._succ(e)
+            if f == a:
+                continue
+            for d in self.neighbour_lists[b]:
+                # d must be in (succ of b) ... e
+                if d == b or self._offset(b, d) > self._offset(b, e) or self._offset(b, d) == 0:
+                    continue
+                c = self._pred(d)
+                delta = M[a, e] + M[d, b] + M[c, f] - d_ab - M[c, d] - M[e, f]
+                if delta < -EPSILON:
+                    seg1, seg2 = self._path(b, c), self._path(d, e)
+                    self._exchange(f, a, seg2[::-1] + seg1)
+                    return (a, b, c, d, e, f)
+
+            # New edge (a, c): c ends the first segment, both segments are reversed
+            c = x
+            d = self._succ(c)
+            if d == a or self._offset(b, c) >= self._offset(b, a):
+                continue
+            for e in self.neighbour_lists[b]:
+                # e must be in d ... (pred of a)
+                if self._offset(d, e) >= self._offset(d, a):
+                    continue
+                f = self._succ(e)
+                delta = M[a, c] + M[b, e] + M[d, f] - d_ab - M[c, d] - M[e, f]
+                if delta < -EPSILON:
+                    seg1, seg2 = self._path(b, c), self._path(d, e)
+                    self._exchange(f, a, seg1[::-1] + seg2[::-1])
+                    return (a, b, c, d, e, f)
+        return None
+
+
+
+    def _exchange (self, f : int, a : int, middle : List[int]) -> None:
+        """
+        This method rebuilds the tour as the path from <f> to <a> followed by <middle>.
+
+        """
+        self._set(self._path(f, a) + middle)
+
+
+
+
+
+
+
+
+def post_optimize (tour : Sequence[int], distances : Any, picking_list : Optional[Sequence[int]] = None,
+                   stop : Optional[Termination] = None, **kwargs : Any) -> Tuple[List[int], float]:
+    """
+    This method improves a tour with a new LocalSearch.
+
+    :param tour: The tour.
+    :param distances: The distance matrix.
+    :param picking_list: The nodes to visit (by default those of the tour).
+    :param stop: The termination criteria of the run.
+    :param kwargs: The parameters of the LocalSearch.
+    :return: The improved tour and its cost.
+
+    """
+    return LocalSearch(distances, picking_list if picking_list is not None else tour, **kwargs)(tour, stop)
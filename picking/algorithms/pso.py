@@ -1,11 +1,12 @@
 
-from typing import Dict, List, Tuple, Union, Callable, Set, cast
+from typing import Any, Dict, Iterator, List, Sequence, Tuple, Union, Callable, Set, FrozenSet, Optional, cast
 
 
 import random
 import math
 import time
 
+from .common import greedy_tour, seed_swarm, Problem, Termination, Stats, History, RandomStream, Solver
 
 
 
@@ -13,28 +14,31 @@ import time
 
 
 
-def _bra (lst : List[int], beta : float = 0.3) -> int:
+
+def _bra (lst : List[int], beta : float = 0.3, rng : Any = random) -> int:
     """
     The estraction of an item from a list, by using a biased randomisation based
     on a quasi-geometric distribution (i.e. f(x) = (1-beta)^x).
 
     :param beta: The parameter of the quasi-geometric.
+    :param rng: The source of random numbers (a RandomStream or the random module).
     :return: The estracted element.
 
     """
-    return lst[int(math.log(random.random(), 1 - beta)) % len(lst)]
+    return lst[int(math.log(rng.random(), 1 - beta)) % len(lst)]
 
 
 
 
 
-def _triangular (lst : List[int]) -> int:
+def _triangular (lst : List[int], rng : Any = random) -> int:
     """
     The estraction of an item from a list, by using a triangular distribution.
+    :param rng: The source of random numbers (a RandomStream or the random module).
     :return: The estracted element.
 
     """
-    return lst[int(len(lst) - len(lst)*random.random()/2) % len(lst)]
+    return lst[int(len(lst) - len(lst)*rng.random()/2) % len(lst)]
 
 
 
@@ -145,13 +149,7 @@ def _greedy (lst : List[int], distances : List[List[int]]) -> List[int]:
     :return: The nodes in the order in which they should be visited.
     
     """
-    c_node = 0; sol : List[int] = []; options = list(lst)
-    while len(options) > 0:
-        options = sorted(options, key=lambda i: distances[c_node][i])
-        c_node = options.pop(0)
-        sol.append (c_node)
-
-    return sol
+    return greedy_tour (lst, distances)
 
 
 
@@ -164,12 +162,17 @@ class Particle (object):
     """
     An instance of this class represents a particle used in this algorithm.
 
+    The data of the problem (i.e. distances, picking list, paths, and greedy
+    solution) are shared by all the particles of the swarm and never copied.
+
     """
 
+    __slots__ = ("problem", "rng", "greediness", "beta", "check_paths", "deepsearch", "fulldeepsearch", "max_depth",
+                 "current", "pbest", "intention", "vcurrent", "vpbest", "vintention", "explorations")
+
     def __init__(self, *,
-                distances : Dict[int, Dict[int,int]],
-                picking_list : List[int],
-                paths : Dict[int,Dict[int, Set[int]]],
+                problem : Problem,
+                rng : Optional[RandomStream] = None,
                 greediness : float = 0.1,
                 beta : float = 0.7,
                 check_paths : float = 0.1,
@@ -180,9 +183,8 @@ class Particle (object):
                 ) -> None:
 
         '''
-        :param distances: The distance matrix
-        :param picking_list: The picking list.
-        :param paths: The nodes in between two others
+        :param problem: The shared data of the problem (distances, picking list, paths and greedy solution).
+        :param rng: The random stream (shared by the swarm).
         
         :param greediness: The importance given to the greedy solution. To the random intention is given a weigth 
                             equal to (1 - alpha).
@@ -207,9 +209,8 @@ class Particle (object):
         '''
 
         # set parameters
-        self.distances = dict(distances)
-        self.picking_list = list(picking_list)
-        self.paths = dict(paths)
+        self.problem = problem
+        self.rng = rng if rng is not None else RandomStream()
         
         self.greediness = greediness
         self.beta = beta
@@ -221,26 +222,44 @@ class Particle (object):
 
 
         # starting solutions
-        self.current = list(picking_list)
-        random.shuffle(self.current)
+        self.current = list(problem.picking_list)
+        self.rng.shuffle(self.current)
 
         self.pbest = list(self.current)
 
         self.intention = list(self.current)
-        random.shuffle(self.intention)
+        self.rng.shuffle(self.intention)
 
 
         # evaluate solutions (i.e., distances)
         self.vpbest, self.vcurrent, self.vintention = cast(int,float("inf")), 0, 0
         self.update_dist ()
-
-        # greedy solution
-        self.greedy = _greedy (picking_list, distances)
-        self.vgreedy = _compute_distance (self.greedy, distances)
         
         # The number of solutions explored
         self.explorations : int = 0
 
+
+
+    @property
+    def distances (self) -> Dict[int, Dict[int,int]]:
+        return self.problem.distances
+
+    @property
+    def picking_list (self) -> Tuple[int, ...]:
+        return self.problem.picking_list
+
+    @property
+    def paths (self) -> Optional[Dict[int, Dict[int, FrozenSet[int]]]]:
+        return self.problem.paths
+
+    @property
+    def greedy (self) -> Tuple[int, ...]:
+        return self.problem.greedy
+
+    @property
+    def vgreedy (self) -> float:
+        return self.problem.vgreedy
+
         
         
         
@@ -249,39 +268,60 @@ class Particle (object):
         This method updates the cost of the solutions kept in memory, i.e. current, intention, and pbest.
 
         """
+        distances, current, intention = self.problem.distances, self.current, self.intention
         self.vcurrent, self.vintention = 0, 0
-        for i in range(len(self.picking_list) - 1):
-            self.vcurrent += self.distances[self.current[i]][self.current[i+1]]
-            self.vintention += self.distances[self.intention[i]][self.intention[i+1]]
-        self.vcurrent += self.distances[0][self.current[0]]
-        self.vintention += self.distances[0][self.intention[0]]
-        self.vcurrent += self.distances[self.current[-1]][0]
-        self.vintention += self.distances[self.intention[-1]][0]
+        for i in range(len(current) - 1):
+            self.vcurrent += distances[current[i]][current[i+1]]
+            self.vintention += distances[intention[i]][intention[i+1]]
+        self.vcurrent += distances[0][current[0]]
+        self.vintention += distances[0][intention[0]]
+        self.vcurrent += distances[current[-1]][0]
+        self.vintention += distances[intention[-1]][0]
 
         if self.vcurrent < self.vpbest:
             self.vpbest, self.pbest = self.vcurrent, list(self.current)
+
+
+
+
+    def warm_start (self, tour : List[int]) -> None:
+        """
+        This method replaces the current position and the personal best with a given tour.
+
+        """
+        self.current = list(tour)
+        self.pbest, self.vpbest = list(tour), cast(int, float("inf"))
+        self.update_dist ()
             
             
             
             
             
 
-    def move (self, gbest : List[int], vgbest : int) -> Tuple[List[int], int]:
+    def move (self, gbest : List[int], vgbest : int, stop : Optional[Termination] = None, stats : Optional[Stats] = None) -> Tuple[List[int], int]:
         """
         This method represents the movement of the particle that explores a new solution.
 
         :param gbest: The global best of the whole swarm.
         :param vgbest: The cost of the gbest.
+        :param stop: The termination criteria of the run (they interrupt the deepsearch).
+        :param stats: The profiling data (if None nothing is measured).
         :return: the personal best and its cost.
 
         """
+        if stats is not None:
+            t = time.perf_counter()
+            vpbest, explorations = self.vpbest, self.explorations
+
         # Reset the current -> !!! To remove if we want to consider it in the 
         #                          construction process.
         self.current = []
 
 
         # Initialize variables used in the construction process
-        nodes : Set[int] = set(self.picking_list)
+        problem, rng = self.problem, self.rng
+        distances, paths, greedy = problem.distances, problem.paths, problem.greedy
+        nodes : Set[int] = set(problem.picking_list)
         c_node : int = 0
         n_node : int
         options : List[Tuple[int,float]]
@@ -293,23 +333,23 @@ class Particle (object):
             options = []
             if c_node == 0:
                 options = [(self.intention[0], 1.0 - self.greediness),
-                           (self.greedy[0], self.greediness),
+                           (greedy[0], self.greediness),
                            (self.pbest[0], 1.0),
                            (gbest[0], 1.0)
                           ]
                 
             else:
                 options = [(sol[sol.index(c_node) + 1], w)
-                           for sol, w in ((self.intention, 1.0 - self.greediness), (self.greedy, self.greediness),(self.pbest, 1.0), (gbest, 1.0))
+                           for sol, w in ((self.intention, 1.0 - self.greediness), (greedy, self.greediness),(self.pbest, 1.0), (gbest, 1.0))
                            if sol.index(c_node) != len(sol) - 1 and sol[sol.index(c_node) + 1] in nodes]
 
 
             if len(options) == 0:
-                n_node = random.choice(list(nodes))
+                n_node = rng.choice(list(nodes))
             elif len (options) == 1:
                 n_node = options[0][0]
             else:
-                n_node = _bra (sorted(options, key=lambda i: self.distances[c_node][i[0]]/i[1]), self.beta)[0]
+                n_node = _bra (sorted(options, key=lambda i: distances[c_node][i[0]]/i[1]), self.beta, rng)[0]
 
 
             nodes.remove (n_node)
@@ -317,14 +357,14 @@ class Particle (object):
 
             # Eventually include before the new node the nodes on the shortest path
             # between the last visited node and the new one.
-            r = random.random()
-            if r < self.check_paths:
+            r = rng.random()
+            if r < self.check_paths and paths is not None:
 
-                in_middle = [i for i in nodes if i in self.paths[c_node][n_node]]
+                in_middle = [i for i in paths[c_node][n_node] if i in nodes]
 
                 while len(in_middle) > 0:
 
-                    in_middle = sorted (in_middle, key=lambda i: self.distances[c_node][i])
+                    in_middle = sorted (in_middle, key=lambda i: distances[c_node][i])
                     c_node = in_middle.pop(0)
                     self.current.append (c_node)
                     nodes.remove (c_node)
@@ -338,32 +378,44 @@ class Particle (object):
         self.explorations += 1
         
         # Shuffle the intention
-        random.shuffle(self.intention)
+        rng.shuffle(self.intention)
+
+        if stats is not None:
+            t = stats.lap("construction", t)
 
         # Update the personal best if needed, the cost of the current
         # and the cost of the new intention
         self.update_dist ()
 
+        if stats is not None:
+            stats.evaluations += 2
+            t = stats.lap("evaluation", t)
+
         # Eventually do a deepsearch
-        r = random.random()
-        if len(self.picking_list) > 3 and r < self.deepsearch:
-            r2 = random.random ()
+        r = rng.random()
+        if len(problem.picking_list) > 3 and r < self.deepsearch:
+            r2 = rng.random ()
             if r2 < self.fulldeepsearch:
-                self.deep_search(list(self.current), full=True)
+                self.deep_search(list(self.current), full=True, stop=stop)
             else:
-                self.deep_search(list(self.current), full=False)
+                self.deep_search(list(self.current), full=False, stop=stop)
 
             if self.vcurrent < self.vpbest:
                 self.pbest, self.vpbest = list(self.current), self.vcurrent
 
+            if stats is not None:
+                stats.evaluations += self.explorations - explorations - 1
+                stats.lap("local_search", t)
 
+        if stats is not None and self.vpbest < vpbest:
+            stats.accepted += 1
 
         return self.pbest, self.vpbest
 
     
     
     
-    def deep_search(self, lst : List[int], full : bool = False, starting_depth : int = 0) -> None:
+    def deep_search(self, lst : List[int], full : bool = False, starting_depth : int = 0, stop : Optional[Termination] = None) -> None:
         """
         This method does a deepsearch via 2-Opt in the neighbourhood of the 
         current solution.
@@ -372,21 +424,26 @@ class Particle (object):
         :param full: If TRUE every time there is an improvement and the maximum depth has
                     not been reached the deepsearch goes on.
         :param starting_depth: Used in case of full == TRUE to control the depth.
+        :param stop: The termination criteria of the run: if the deadline expires or the run
+                    is cancelled, the deepsearch is interrupted.
 
         """
+        distances = self.problem.distances
         edges = [(i,j) for i in range(0,len(lst)-2) for j in range(i+2,len(lst))]
-        random.shuffle(edges)
+        self.rng.shuffle(edges)
         self.explorations += len(edges)
 
         for i, j in edges:
+            if stop is not None and stop.expired():
+                return
             sol = _two_opt (lst, i, j)
-            cost = _compute_distance (sol, self.distances)
+            cost = _compute_distance (sol, distances)
             if cost < self.vcurrent:
                 self.current, self.vcurrent = list(sol), cost
 
                 if full is True and starting_depth < self.max_depth:
                     starting_depth += 1
-                    self.deep_search(sol, True, starting_depth)
+                    self.deep_search(sol, True, starting_depth, stop)
 
                     
                     
@@ -396,7 +453,7 @@ class Particle (object):
                     
                     
                     
-class Mattia_PSO:
+class Mattia_PSO (Solver):
     """
     An instance of this class represents the Particle Swarm Optimization published by Neroni, Mezzogori,
     Zammori in 2021.
@@ -421,29 +478,37 @@ class Mattia_PSO:
     def __init__ (self,*,
                 distances : Dict[int, Dict[int,int]],
                 picking_list : List[int],
-                paths : Dict[int, Dict[int, Set[int]]],
+                paths : Optional[Dict[int, Dict[int, Set[int]]]] = None,
                 era : int = 10_000,
                 particles : int = 40,
                 max_noimp : int = 1000,
                 print_every : int = 100,
                 finalsearch : bool = True,
-                particle_data : Dict[str, Union[int, float, Callable[[int], float], Dict[str,float], Tuple[float,float], List[int], List[List[int]]]]
+                particle_data : Dict[str, Union[int, float, Callable[[int], float], Dict[str,float], Tuple[float,float], List[int], List[List[int]]]],
+                rng : Any = None
 
         ) -> None:
         """
         Initialize.
         
         :param distances: The distance matrix.
+        :param paths: The nodes in between two others (None if no node is ever in between two others).
         :param era: The number of iterations.
         :param particles: The number of particles.
         :param max_noimp: The maximum number of iterations with no getting any improvement.
         :param print_every: The number of iterations between a log and the next one.
+        :param rng: The random stream used for all the randomness, or a seed for it (an int, a numpy
+                    SeedSequence or Generator). By default it is seeded with fresh entropy.
 
+        :attr problem: The data of the problem shared by all the particles.
+        :attr rng: The random stream shared by all the particles.
         :attr history: The history of the best solutions found by the algorithm.
         :attr computations: The number of solutions explored before finding the best.
 
         """
 
+        Solver.__init__ (self)
+
         self.era = era
         self.max_noimp = max_noimp
         self.print_every = print_every
@@ -451,17 +516,12 @@ class Mattia_PSO:
 
 
 
-        particle_data["distances"] = distances
-        particle_data["picking_list"] = picking_list
-        particle_data["paths"] = paths
-
-        self.particle_data = particle_data
+        self.problem = Problem(distances, picking_list, paths)
+        self.rng = RandomStream.create(rng)
+        self.particle_data = dict(particle_data, problem=self.problem, rng=self.rng)
 
-        self.swarm : List[Particle] = [Particle(**particle_data) for _ in range(particles)]
+        self.swarm : List[Particle] = [Particle(**self.particle_data) for _ in range(particles)]
 
-        self.history : List[int]
-        self.computations : int = 0
-        self.computational_time : float = 0.0
 
     
     def reset(self):
@@ -469,21 +529,27 @@ class Mattia_PSO:
 
         self.swarm = [Particle(**self.particle_data) for _ in range(particles)]
 
-        self.history = []
+        self.history = History(max_points=self.history_points)
         self.computations = 0
 
-   
-    def run (self, verbose : bool = False) -> Tuple[List[int], int]:
+
+    def warm_start (self, tours : Sequence[Sequence[int]], share : float = 0.5) -> int:
+        """
+        This method warm-starts some particles with the tours of similar orders
+        (see common.seed_swarm).
+
         """
-        This is the method to execute the algorithm.
-        It finally returns the best solution found and its cost.
+        return seed_swarm(self.swarm, tours, self.problem.picking_list, self.problem.distances, share)
 
-        :return: gbest, vgbest
+   
+    def _search (self, verbose : bool, stop : Optional[Termination]) -> Iterator[Tuple[int, List[int], int]]:
+        """
+        The search of the swarm (see Solver._search): the iterations of the particles,
+        followed by the final deepsearch of each of them.
 
         """
-        # Initialize starting time
-        start = time.time()
-        
+        stats = self.stats
+
         # Initilaize the best starting position
         gbest : List[int]
         vgbest : int = cast(int, float("inf"))
@@ -494,14 +560,16 @@ class Mattia_PSO:
         new_vgbest : int = vgbest
         new_gbest : List[int] = list(gbest)
 
-        self.history = [vgbest]
+        self.history = History([vgbest], max_points=self.history_points)
         
+        yield 0, list(gbest), vgbest
 
         # Iterations
-        noimp = 0
+        noimp = 0; iteration = 0
         for i in range(self.era):
+            iteration = i + 1
             for particle in self.swarm:
-                pbest, vpbest = particle.move (gbest, vgbest)
+                pbest, vpbest = particle.move (gbest, vgbest, stop, stats)
                 if vpbest < new_vgbest:
                     new_gbest, new_vgbest = list(pbest), vpbest
 
@@ -509,6 +577,7 @@ class Mattia_PSO:
                 gbest, vgbest = new_gbest, new_vgbest
                 noimp = 0
                 self.computations = sum(p.explorations for p in self.swarm)
+                yield iteration, list(gbest), vgbest
             else:
                 noimp += 1
                 if noimp > self.max_noimp:
@@ -518,18 +587,27 @@ class Mattia_PSO:
 
             if i % self.print_every == 0 and verbose is True:
                 print('Epoch', i, ' Best: ', vgbest)
+
+            if stats is not None:
+                stats.iteration(iteration, vgbest)
+
+            if stop is not None and stop(vgbest):
+                break
         
         # Final deepsearch
         if self.finalsearch is True:
             for particle in self.swarm:
-                particle.deep_search (list(particle.current), True, 0)
+                if stop is not None and stop(vgbest):
+                    break
+                if stats is not None:
+                    t, explorations = time.perf_counter(), particle.explorations
+                particle.deep_search (list(particle.current), True, 0, stop)
+                if stats is not None:
+                    stats.evaluations += particle.explorations - explorations
+                    stats.lap("local_search", t)
                 if particle.vcurrent < particle.vpbest:
                     particle.pbest, particle.vpbest = list(particle.current), particle.vcurrent
                     if particle.vpbest < vgbest:
                         gbest, vgbest = list(particle.current), particle.vcurrent
                         self.computations = sum(p.explorations for p in self.swarm)
-        
-        # Set computational time
-        self.computational_time = time.time() - start
-
-        return gbest, vgbest
+                        yield iteration, list(gbest), vgbest
@@ -1,11 +1,11 @@
 
-from typing import Dict, List, Tuple, Union, Callable, Set, cast
+from typing import Any, Iterator, Dict, List, Sequence, Tuple, Optional, cast
 
 
-import random
-import math
 import time
 
+from .common import seed_swarm, Problem, Termination, Stats, History, RandomStream, Solver
+
 
 
 
@@ -39,18 +39,25 @@ class Particle (object):
     """
     An instance of this class represents a particle used in this algorithm.
 
+    The data of the problem (i.e. distances, picking list and greedy solution)
+    are shared by all the particles of the swarm and never copied.
+
     """
+
+    __slots__ = ("problem", "rng", "w", "C1", "C2", "no_imp", "current", "pbest", "vpbest", "greedy_speed", "speed")
     
     def __init__(self,
-                distances : Dict[int, Dict[int,int]],
-                picking_list : List[int],
+                problem : Problem,
                 w : float,
                 C1 : float,
-                C2 : float
+                C2 : float,
+                rng : Optional[RandomStream] = None
 
                 ) -> None:
 
         '''
+        :param problem: The shared data of the problem (distances, picking list and greedy solution).
+        :param rng: The random stream (shared by the swarm).
         :param deepsearch: Probability to do deep search and, if so, probability to do full deep search  
         :param max_depth: Maximum number of iteration in case of deep search
         :param w: Velocity weigths {'g' for the gbest, 'gr' for the greedy, 'p' for the pbest, 'i' for the intention}
@@ -69,8 +76,8 @@ class Particle (object):
         '''
         
         # set parameters
-        self.distances = dict(distances)
-        self.picking_list = list(picking_list)
+        self.problem = problem
+        self.rng = rng if rng is not None else RandomStream()
 
         self.w = w
         self.C1 = C1
@@ -81,26 +88,52 @@ class Particle (object):
 
 
         # starting solutions
-        self.current = list(picking_list)
-        random.shuffle(self.current)
+        self.current = list(problem.picking_list)
+        self.rng.shuffle(self.current)
 
         # personal best
         self.pbest = list(self.current)
-        self.vpbest = _compute_distance(self.pbest, distances)
+        self.vpbest = _compute_distance(self.pbest, problem.distances)
 
 
         # greedy solution
-        self.greedy = self.greedy_solution()
-        self.greedy_speed = self.difference (self.current, self.greedy)
+        self.greedy_speed = self.difference (self.current, problem.greedy)
 
 
         # speed
-        rnd = list(picking_list)
-        random.shuffle(rnd)
+        rnd = list(problem.picking_list)
+        self.rng.shuffle(rnd)
         self.speed = self.difference (self.current, rnd)
 
 
 
+    @property
+    def distances (self) -> Dict[int, Dict[int,int]]:
+        return self.problem.distances
+
+    @property
+    def picking_list (self) -> Tuple[int, ...]:
+        return self.problem.picking_list
+
+    @property
+    def greedy (self) -> Tuple[int, ...]:
+        return self.problem.greedy
+
+
+
+
+    def warm_start (self, tour : List[int]) -> None:
+        """
+        This method replaces the current position and the personal best with a given tour.
+
+        """
+        self.current = list(tour)
+        self.pbest = list(tour)
+        self.vpbest = _compute_distance(self.pbest, self.problem.distances)
+        self.greedy_speed = self.difference (self.current, self.problem.greedy)
+
+
+
 
     @staticmethod
     def difference (sol1 : List[int], sol2 : List[int]) -> Dict[int,int]:
@@ -132,16 +165,7 @@ class Particle (object):
         This method calculates the greedy solution.
 
         """
-        c_node : int = 0
-        sol : List[int] = []
-        options = list(self.picking_list)
-
-        while len(options) > 0:
-            c_node = sorted(options, key=lambda i: self.distances[c_node][i])[0]
-            options.remove(c_node)
-            sol.append (c_node)
-
-        return sol
+        return list(self.problem.greedy)
 
 
 
@@ -150,39 +174,58 @@ class Particle (object):
     
 
 
-    def move (self, gbest : List[int], vgbest : int) -> Tuple[List[int], int]:
+    def move (self, gbest : List[int], vgbest : int, stats : Optional[Stats] = None) -> Tuple[List[int], int]:
         """
         This method represents the movement of the particle.
 
+        :param gbest: The global best of the whole swarm.
+        :param vgbest: The cost of the gbest.
+        :param stats: The profiling data (if None nothing is measured).
+        :return: The personal best and its cost.
+
         """
-        new_solution = [-1 for i in range(len(self.picking_list))]
+        if stats is not None:
+            t = time.perf_counter()
+
+        picking_list = self.problem.picking_list
+        last = len(picking_list) - 1
+        new_solution = [-1 for i in range(len(picking_list))]
         
         for pos, node in enumerate(self.current):
             
-            i, j = max(0, min(pos + self.speed[node], len(self.picking_list) - 1)), max(0, min(pos + self.speed[node], len(self.picking_list) - 1))
+            i, j = max(0, min(pos + self.speed[node], last)), max(0, min(pos + self.speed[node], last))
             
             
             while new_solution[i] != -1 and new_solution[j] != -1:
-                i, j = max(i - 1, 0), min(j + 1, len(self.picking_list) - 1)
+                i, j = max(i - 1, 0), min(j + 1, last)
 
 
             if new_solution[i] == -1 and new_solution[j] == -1:
-                selected = random.choice([i, j])
+                selected = self.rng.choice([i, j])
                 new_solution[selected] = node
             elif new_solution[i] == -1 and new_solution[j] != -1:
                 new_solution[i] = node
             else:
                 new_solution[j] = node
 
+        if stats is not None:
+            t = stats.lap("construction", t)
+
         # Calculate the cost of the new solution
         self.current = new_solution
-        cost = _compute_distance (self.current, self.distances)
+        cost = _compute_distance (self.current, self.problem.distances)
 
 
 
         # Eventually update pbest
         if cost < self.vpbest:
             self.pbest, self.vpbest = list(self.current), cost
+            if stats is not None:
+                stats.accepted += 1
+
+        if stats is not None:
+            stats.evaluations += 1
+            t = stats.lap("evaluation", t)
 
 
         # Update speed
@@ -191,9 +234,12 @@ class Particle (object):
 
         new_speed : Dict[int,int] = {}
 
-        for node in self.picking_list:
-            c1 = random.random() * self.C1
-            c2 = random.random() * self.C2 
+        # The random weights of all the nodes are drawn at once
+        rnd = self.rng.floats(2 * len(picking_list))
+
+        for k, node in enumerate(picking_list):
+            c1 = rnd[2*k] * self.C1
+            c2 = rnd[2*k + 1] * self.C2 
             winner = max (self.w, c1, c2)
 
             if winner == self.w:
@@ -205,6 +251,8 @@ class Particle (object):
 
         self.speed = new_speed
 
+        if stats is not None:
+            stats.lap("velocity", t)
                 
                 
 
@@ -223,7 +271,7 @@ class Particle (object):
             
 
 
-class SpeedPSO:
+class SpeedPSO (Solver):
     """
     An instance of this class represents the Particle Swarm Optimization designed by Mattia in December 2019.
 
@@ -254,6 +302,7 @@ class SpeedPSO:
                 C2 : float = 2.0,
                 max_noimp : int = 1000,
                 print_every : int = 100,
+                rng : Any = None
         ) -> None:
         """
         Initialize.
@@ -263,12 +312,18 @@ class SpeedPSO:
         :param particles: The number of particles.
         :param max_noimp: The maximum number of iterations with no getting any improvement.
         :param print_every: The number of iterations between a log and the next one.
+        :param rng: The random stream used for all the randomness, or a seed for it (an int, a numpy
+                    SeedSequence or Generator). By default it is seeded with fresh entropy.
 
+        :attr problem: The data of the problem shared by all the particles.
+        :attr rng: The random stream shared by all the particles.
         :attr history: The history of the best solutions found by the algorithm.
         :attr computations: The number of iterations needed to find the best.
 
         """
 
+        Solver.__init__ (self)
+
         self.era = era
         self.max_noimp = max_noimp
         self.print_every = print_every
@@ -280,30 +335,36 @@ class SpeedPSO:
         self.C1 = C1
         self.C2 = C2
         
-        self.swarm : List[Particle] = [Particle(distances, picking_list, w, C1, C2) for _ in range(particles)]        
+        self.problem = Problem(distances, picking_list)
+        self.rng = RandomStream.create(rng)
+        self.swarm : List[Particle] = [Particle(self.problem, w, C1, C2, self.rng) for _ in range(particles)]
 
-        self.history : List[int]
-        self.computations : int = 0
-        self.computational_time : float = 0.0
     
     
     def reset (self):
-        self.swarm = [Particle(self.distances, self.picking_list, self.w, self.C1, self.C2) for _ in range(self.particles)]
-        self.history = []
+        self.swarm = [Particle(self.problem, self.w, self.C1, self.C2, self.rng) for _ in range(self.particles)]
+        self.history = History(max_points=self.history_points)
         self.computations = 0
         self.computational_time = 0.0
+
+
+
+    def warm_start (self, tours : Sequence[Sequence[int]], share : float = 0.5) -> int:
+        """
+        This method warm-starts some particles with the tours of similar orders
+        (see common.seed_swarm).
+
+        """
+        return seed_swarm(self.swarm, tours, self.problem.picking_list, self.problem.distances, share)
     
     
     
-    def run (self, verbose : bool = False) -> Tuple[List[int], int]:
+    def _search (self, verbose : bool, stop : Optional[Termination]) -> Iterator[Tuple[int, List[int], int]]:
         """
-        This is the method to execute the algorithm.
-        It finally returns the best solution found and its cost.
-
-        :return: gbest, vgbest
+        The search of the swarm (see Solver._search).
 
         """
-        start = time.time()
+        stats = self.stats
 
         # Initilaize the best starting position
         gbest : List[int]
@@ -315,13 +376,15 @@ class SpeedPSO:
         new_vgbest : int = vgbest
         new_gbest : List[int] = list(gbest)
         
-        self.history = [vgbest]
+        self.history = History([vgbest], max_points=self.history_points)
+
+        yield 0, list(gbest), vgbest
 
         # Iterations
         noimp = 0
         for i in range(self.era):
             for particle in self.swarm:
-                pbest, vpbest = particle.move (gbest, vgbest)
+                pbest, vpbest = particle.move (gbest, vgbest, stats)
                 if vpbest < new_vgbest:
                     new_gbest, new_vgbest = list(pbest), vpbest
 
@@ -329,6 +392,7 @@ class SpeedPSO:
                 gbest, vgbest = new_gbest, new_vgbest
                 noimp = 0
                 self.computations = i * len(self.swarm)
+                yield i + 1, list(gbest), vgbest
             else:
                 noimp += 1
                 if noimp > self.max_noimp:
@@ -338,8 +402,9 @@ class SpeedPSO:
 
             if i % self.print_every == 0 and verbose is True:
                 print('Epoch', i, ' Best: ', vgbest)
-                
-        # Set the computational time
-        self.computational_time = time.time() - start
 
-        return gbest, vgbest
\ No newline at end of file
+            if stats is not None:
+                stats.iteration(i + 1, vgbest)
+
+            if stop is not None and stop(vgbest):
+                break
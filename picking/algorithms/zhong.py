@@ -1,10 +1,13 @@
 from __future__ import annotations
-from typing import Dict, List, Tuple, Union, Optional, cast, NewType
+from typing import Any, Iterator, Dict, List, Sequence, Tuple, Optional, cast, NewType
 
 import random
+import functools
 import numpy as np # type: ignore
 import time
 
+from .common import seed_swarm, Termination, Stats, History, RandomStream, Solver
+
 
 
 
@@ -116,13 +119,14 @@ def _reverse_edge_sequence (edge_seq : List[Tuple[int,int]]) -> List[int]:
 
 
 
-def _triangular (lst : List[int]) -> int:
+def _triangular (lst : List[int], rng : Any = random) -> int:
     """
     The estraction of an item from a list, by using a triangular distribution.
+    :param rng: The source of random numbers (a RandomStream or the random module).
     :return: The estracted element.
 
     """
-    return lst[int(len(lst) - len(lst)*random.random()/2) % len(lst)]
+    return lst[int(len(lst) - len(lst)*rng.random()/2) % len(lst)]
 
 
 
@@ -210,7 +214,7 @@ class Particle (object):
     An instance of this class represents a particle used in the algorithm by Zhong.
 
     """
-    def __init__ (self, distances : Dict[int, Dict[int,int]], picking_list : List[int], w : float, lt : int) -> None:
+    def __init__ (self, distances : Dict[int, Dict[int,int]], picking_list : List[int], w : float, lt : int, rng : Optional[RandomStream] = None) -> None:
         """
         Initialize.
 
@@ -218,6 +222,7 @@ class Particle (object):
         :attr picking_list: The picking list
         :attr w: The weight assigned to the greedy velocity.
         :attr lt: The different temperatures considered.
+        :attr rng: The random stream (shared by the swarm).
 
         :attr current: The current position
         :attr pbest: The personal best
@@ -236,9 +241,10 @@ class Particle (object):
         self.distances = distances
         self.picking_list = picking_list
         self.w = w
+        self.rng = rng if rng is not None else RandomStream()
 
         self.current : List[int] = list(picking_list)
-        random.shuffle (self.current)
+        self.rng.shuffle (self.current)
         self.vcurrent = _compute_distance(self.current, distances)
 
         self.pbest, self.vpbest = list(self.current), self.vcurrent
@@ -253,17 +259,18 @@ class Particle (object):
 
         x = list(self.current)
         x_cost = self.vcurrent
+        operators = (self._swap, functools.partial(self._insert, rng=self.rng), self._inverse)
 
         while len(self.temperatures) < lt:
 
-            edge_indexes = (random.randint(0, len(picking_list) - 1), random.randint(0, len(picking_list) - 1))
+            edge_indexes = (self.rng.randint(0, len(picking_list) - 1), self.rng.randint(0, len(picking_list) - 1))
             if edge_indexes[0] > edge_indexes[1]:
                 edge_indexes = tuple(reversed(edge_indexes))
                 
             
             edge = (x[edge_indexes[0]], x[edge_indexes[1]])
 
-            func = random.choice([self._swap, self._insert, self._inverse])
+            func = self.rng.choice(operators)
             candidate : List[int]; candidate_cost : int
 
 
@@ -340,7 +347,7 @@ class Particle (object):
         options = [0] + list(self.picking_list)
         v : Velocity = []
         for i in range (len(self.picking_list) + 1):
-            j = _triangular (sorted(options, key=lambda x: self.distances[options[i]][x])[1:])
+            j = _triangular (sorted(options, key=lambda x: self.distances[options[i]][x])[1:], self.rng)
             v.append ( ((options[i], j), self.w) )
         
         return v
@@ -411,13 +418,14 @@ class Particle (object):
 
 
     @staticmethod
-    def _insert (edge : Tuple[int, int], solution : List[int], distances : List[List[int]]) -> Tuple[List[int], int]:
+    def _insert (edge : Tuple[int, int], solution : List[int], distances : List[List[int]], rng : Any = random) -> Tuple[List[int], int]:
         """
         The insert operation introduced by Zhong.
 
         :param edge: The edge suggesting the modification.
         :param solution: The current solution formalised as an edge sequence.
         :param distances: The distance matrix.
+        :param rng: The source of random numbers (a RandomStream or the random module).
         :return: A new edge sequence and its cost.
 
         """
@@ -430,7 +438,7 @@ class Particle (object):
         if i > j or j == 0:
             return (s:=sol[1:-1]), _compute_distance(s, distances)
 
-        r = random.randint (1, len(sol) - j - 1)
+        r = rng.randint (1, len(sol) - j - 1)
         sol = sol[:i+1] + sol[j:j+r] + sol[i+1:j] + sol[j+r:]
 
         return (s := sol[1:-1]), _compute_distance(s, distances)
@@ -471,16 +479,21 @@ class Particle (object):
 
 
 
-    def move (self, gbest : List[int], vgbest : int) -> Tuple[List[int], int]:
+    def move (self, gbest : List[int], vgbest : int, stats : Optional[Stats] = None) -> Tuple[List[int], int]:
         """
         This method represents the movement of the particle, followed by 
         its velocity update.
 
         :param gbest: The global best of the whole swarm.
         :param vgbest: The cost of the gbest.
+        :param stats: The profiling data (if None nothing is measured).
         :return: The pbest of the particle and its cost.
 
         """
+        if stats is not None:
+            t0 = time.perf_counter()
+            accepted = 0
+
         t_count = [0, 0]
 
         # Move particle
@@ -488,28 +501,37 @@ class Particle (object):
 
             # Try all three options: swap, insert, and inverse
             options : List[Tuple[List[int], int]] = [self._swap(edge, self.current, self.distances),
-                                                    self._insert(edge, self.current, self.distances),
+                                                    self._insert(edge, self.current, self.distances, self.rng),
                                                     self._inverse(edge, self.current, self.distances)]
 
             # Select the best one
             bopt, bopt_cost = sorted(options, key=lambda i: i[1])[0]
-            rnd = random.random()
+            rnd = self.rng.random()
 
             # If better than current update
             if bopt_cost < self.vcurrent:
                 self.current, self.vcurrent = bopt, bopt_cost
                 if self.vcurrent < self.vpbest:
                     self.pbest, self.vpbest = list(self.current), self.vcurrent
+                if stats is not None:
+                    accepted += 1
             # Otherwise there is a certain possibility to update as well
             elif ( delta:=(bopt_cost - self.vcurrent) / max(t_count[0], 1) ) < 0.000001 or rnd < np.exp(-delta):
                 t = - (bopt_cost - self.vcurrent) / np.log(rnd)
                 t_count[0] += 1
                 t_count[1] += t
                 self.current, self.vcurrent = bopt, bopt_cost
+                if stats is not None:
+                    accepted += 1
         
         # Update the solutions explored
         self.explorations += 3 * len(self.velocity)
 
+        if stats is not None:
+            stats.evaluations += 3 * len(self.velocity)
+            stats.accepted += accepted
+            t0 = stats.lap("local_search", t0)
+
         # Temperature update
         if t_count[0] != 0 or t_count[1] != 0:
             self.temperatures.pop (0) 
@@ -521,9 +543,12 @@ class Particle (object):
         # Velocity update
         greedy : Velocity = self._greedy_velocity()
         learning : Velocity = _subtract_positions (self.dual.edge_pbest, self.edge_current)
-        rnd = random.random()
+        rnd = self.rng.random()
         self.velocity = _sum (_multiply (self.w, greedy), _multiply(rnd, learning))
 
+        if stats is not None:
+            stats.lap("velocity", t0)
+
         return self.pbest, self.vpbest
 
 
@@ -548,7 +573,7 @@ class Particle (object):
 
 
 
-class Zhong_PSO (object):
+class Zhong_PSO (Solver):
     '''
     Solutions are coded with a ‘edge-based’ notation where the  value j in position i indicate node visited after i (i.e., the edge ij).
     For instance, using a tuple-based notation, the following sequence {0 - 2 - 3 - 1- 5 - 6 - 4 - 0}  would be coded in the following way:
@@ -585,7 +610,8 @@ class Zhong_PSO (object):
                 lt : int = 1000, 
                 max_iter : int = 10000,
                 max_noimp : int = 1000,
-                print_every : int = 100
+                print_every : int = 100,
+                rng : Any = None
 
                 ) -> None:
         """
@@ -594,14 +620,20 @@ class Zhong_PSO (object):
         :attr max_iter: The number of iterations.
         :attr max_noimp: The max number of iterations with no improvement.
         :attr print_every: The number of iterations between a log and the next.
+        :attr rng: The random stream shared by all the particles.
         :attr history: The history of the best solutions found.
         :attr computations: The number of solutions explored before finding the best.
         
         :param particles: The number of particles.
         :param distances: The distance matrix.
+        :param rng: The random stream used for all the randomness, or a seed for it (an int, a numpy
+                    SeedSequence or Generator). By default it is seeded with fresh entropy.
 
         """
-        self.swarm : List[Particle] = [Particle(distances, picking_list, w, lt) for _ in range(particles)]
+        Solver.__init__ (self)
+
+        self.rng = RandomStream.create(rng)
+        self.swarm : List[Particle] = [Particle(distances, picking_list, w, lt, self.rng) for _ in range(particles)]
         
         self.max_iter = max_iter
         self.max_noimp = max_noimp
@@ -613,33 +645,36 @@ class Zhong_PSO (object):
         self.w = w
         self.lt = lt
 
-        self.history : List[int]
-        self.computations : int = 0
-        self.computational_time : float = 0.0
             
     
     
     
     def reset (self):
-        self.history = []
+        self.history = History(max_points=self.history_points)
         self.computations = 0
         self.computational_time = 0.0
-        self.swarm = [Particle(self.distances, self.picking_list, self.w, self.lt) for _ in range(self.particles)]
+        self.swarm = [Particle(self.distances, self.picking_list, self.w, self.lt, self.rng) for _ in range(self.particles)]
 
 
 
+    def warm_start (self, tours : Sequence[Sequence[int]], share : float = 0.5) -> int:
+        """
+        This method warm-starts some particles with the tours of similar orders
+        (see common.seed_swarm).
 
-    def run (self, verbose : bool = False) -> Tuple[List[int], int]:
         """
-        This method represents the execution of the algorithm.
-        
-        :param verbose: If TRUE evey <print_every> iterations the current 
-                        best is logged.
-        :return: The best solution found and its cost.
+        return seed_swarm(self.swarm, tours, self.picking_list, self.distances, share)
+
+
+
+
+    def _search (self, verbose : bool, stop : Optional[Termination]) -> Iterator[Tuple[int, List[int], int]]:
+        """
+        The search of the swarm (see Solver._search): at each move, every particle
+        is paired with another one (its dual).
 
         """
-        # Initialize the starting time
-        start = time.time()
+        stats = self.stats
         
         # Initialize the best
         gbest : List[int]; vgbest : int = cast(int,float("inf"))
@@ -648,7 +683,9 @@ class Zhong_PSO (object):
                 gbest, vgbest = particle.pbest, particle.vpbest
 
         new_gbest, new_vgbest = list(gbest), vgbest
-        self.history = [vgbest]
+        self.history = History([vgbest], max_points=self.history_points)
+
+        yield 0, list(gbest), vgbest
 
         # Iterate
         noimp : int = 0
@@ -657,14 +694,14 @@ class Zhong_PSO (object):
             # Move particles
             for particle in self.swarm:
                 # Select another particle pbest and pass it to this particle
-                other : Particle = random.choice (self.swarm)
+                other : Particle = self.rng.choice (self.swarm)
                 while other is particle:
-                    other = random.choice (self.swarm)
+                    other = self.rng.choice (self.swarm)
 
                 particle.set_dual (other)
 
                 # Move
-                sol, cost = particle.move (gbest, vgbest)
+                sol, cost = particle.move (gbest, vgbest, stats)
 
                 # For each particle, in case of improvement, we keep track of it
                 # to update the gbest without doing a further for loop
@@ -676,6 +713,7 @@ class Zhong_PSO (object):
                 noimp = 0
                 self.computations = sum(p.explorations for p in self.swarm)
                 gbest, vgbest = list(new_gbest), new_vgbest
+                yield i + 1, list(gbest), vgbest
             else:
                 noimp += 1
                 # Eventually breaks if no improvement for long time
@@ -688,8 +726,10 @@ class Zhong_PSO (object):
             # Eventually log the results
             if verbose is True and i % self.print_every == 0:
                 print ('Epoch', i, ' Best: ', vgbest)
-        
-        # Set the computational time
-        self.computational_time = time.time() - start
 
-        return gbest, vgbest
+            if stats is not None:
+                stats.iteration(i + 1, vgbest)
+
+            if stop is not None and stop(vgbest):
+                break
+
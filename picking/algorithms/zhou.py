@@ -1,21 +1,24 @@
-from typing import List, Dict, Tuple, Callable, Set, Union, cast
+from typing import Any, Iterator, List, Dict, Sequence, Tuple, Set, Optional, cast
 
 import random
 import numpy as np # type: ignore
 import itertools
 import time
 
+from .common import seed_swarm, Termination, Stats, History, RandomStream, Solver
 
 
 
 
 
-def _random_velocity (nodes : int) -> List[Tuple[int,int]]:
+
+def _random_velocity (nodes : int, rng : Any = random) -> List[Tuple[int,int]]:
     """
     This method is used to generate a random velocity: a list of swaps
     to change a solution.
 
     :param nodes: The number of nodes that might be swapped.
+    :param rng: The source of random numbers (a RandomStream or the random module).
     :return: A list of swaps, represented by tuples. Each tuple reports
             the index in the picking list of the swapped nodes.
 
@@ -23,7 +26,7 @@ def _random_velocity (nodes : int) -> List[Tuple[int,int]]:
     tabu : Set[Tuple[int,int]] = {(i, i) for i in range (nodes)}
     swaps : List[Tuple[int,int]] = []
     while len(swaps) < nodes:
-        sw = (random.randint(0, nodes-1), random.randint(0, nodes-1))
+        sw = (rng.randint(0, nodes-1), rng.randint(0, nodes-1))
         if not sw in tabu:
             swaps.append (sw)
             tabu.add (sw)
@@ -160,7 +163,8 @@ class Particle (object):
                 alpha : float,
                 beta : float,
                 gamma : float,
-                new_version : bool = True
+                new_version : bool = True,
+                rng : Optional[RandomStream] = None
                 ) -> None:
         """
         Initialize.
@@ -171,6 +175,7 @@ class Particle (object):
         :attr beta: The parameter <beta> (i.e. probability to turn into the pbest).
         :attr gamma: The parameter <gamma> (i.e. probability relative to the current velocity).
         :attr new_version: If TRUE the new version of the algorithm is used, otherwise is used Zhou2007
+        :attr rng: The random stream (shared by the swarm).
 
         :attr current: The current solution.
         :attr pbest: The personal best found so far.
@@ -185,49 +190,58 @@ class Particle (object):
         self.beta = beta
         self.gamma = gamma
         self.new_version = new_version
+        self.rng = rng if rng is not None else RandomStream()
 
         self.current : List[int] = list(picking_list)
-        random.shuffle (self.current)
+        self.rng.shuffle (self.current)
         self.vcurrent = _compute_distance (self.current, distances)
 
         self.pbest : List[int] = list(self.current)
         self.vpbest : int = self.vcurrent
 
-        self.velocity : List[Tuple[int,int]] = _random_velocity(len(picking_list))
-
-
-
-
+        self.velocity : List[Tuple[int,int]] = _random_velocity(len(picking_list), self.rng)
 
 
 
 
-    def move (self, gbest : List[int], vgbest : int) -> Tuple[List[int], int]:
+    def move (self, gbest : List[int], vgbest : int, stats : Optional[Stats] = None) -> Tuple[List[int], int]:
         """
         This method represents the movement of the particle.
 
         :param gbest: The current globar best.
         :param vgbest: The cost of the current global best.
+        :param stats: The profiling data (if None nothing is measured).
 
         :return: The current personal best and its cost.
 
         """
+        if stats is not None:
+            t = time.perf_counter()
         
         # Move according to the current velocity
         for i, j in self.velocity:
             self.current[i], self.current[j] = self.current[j], self.current[i]
 
+        if stats is not None:
+            t = stats.lap("construction", t)
+
         # Evaluate the new solution and eventually update the pbest
         self.vcurrent = _compute_distance (self.current, self.distances)
         if self.vcurrent < self.vpbest:
             self.pbest, self.vpbest = list(self.current), self.vcurrent
+            if stats is not None:
+                stats.accepted += 1
+
+        if stats is not None:
+            stats.evaluations += 1
+            t = stats.lap("evaluation", t)
 
         # Calculate the new velocity
         gamma : float; beta : float; alpha : float
         if self.new_version is True:
             gamma = self.gamma
-            alpha = self.alpha * random.random()
-            beta = self.beta * random.random()
+            alpha = self.alpha * self.rng.random()
+            beta = self.beta * self.rng.random()
         else:
             gamma = 1.0
             alpha = self.alpha
@@ -243,6 +257,9 @@ class Particle (object):
         # Calculate the new velocity using the minimum number of swaps needed
         self.velocity = _subtract (self.current, intention)
 
+        if stats is not None:
+            stats.lap("velocity", t)
+
         return self.pbest, self.vpbest
 
 
@@ -260,7 +277,7 @@ class Particle (object):
 
 
 
-class Zhou_PSO (object):
+class Zhou_PSO (Solver):
     '''
     A Particle Swarm Optimization designed for the Travelling Salesman Problem.
 
@@ -291,7 +308,8 @@ class Zhou_PSO (object):
                 max_iter : int = 10000,
                 max_noimp : int = 1000,
                 print_every : int = 100,
-                new_version : bool = True
+                new_version : bool = True,
+                rng : Any = None
 
                 ) -> None:
         """
@@ -300,14 +318,20 @@ class Zhou_PSO (object):
         :attr max_iter: The number of iterations.
         :attr max_noimp: The max number of iterations with no improvement.
         :attr print_every: The number of iterations between a log and the next.
+        :attr rng: The random stream shared by all the particles.
         :attr history: The history of the best solutions found.
         :attr computations: The number of iterations needed to find the best.
         
         :param particles: The number of particles.
         :param distances: The distance matrix.
+        :param rng: The random stream used for all the randomness, or a seed for it (an int, a numpy
+                    SeedSequence or Generator). By default it is seeded with fresh entropy.
 
         """
-        self.swarm : List[Particle] = [Particle(distances, picking_list, alpha, beta, gamma, new_version) for _ in range(particles)]
+        Solver.__init__ (self)
+
+        self.rng = RandomStream.create(rng)
+        self.swarm : List[Particle] = [Particle(distances, picking_list, alpha, beta, gamma, new_version, self.rng) for _ in range(particles)]
         
         self.max_iter = max_iter
         self.max_noimp = max_noimp
@@ -319,35 +343,40 @@ class Zhou_PSO (object):
                               "alpha":alpha,
                               "beta": beta,
                               "gamma": gamma,
-                              "new_version": new_version
+                              "new_version": new_version,
+                              "rng": self.rng
                              }
 
-        self.history : List[int]
-        self.computations : int = 0
-        self.computational_time : float = 0.0
             
             
     
     def reset (self):
-        self.history = []
+        self.history = History(max_points=self.history_points)
         self.computations = 0
         self.computational_time = 0.0
         self.swarm = [Particle(**self.particle_data) for _ in range(self.particles)]
 
 
 
+    def warm_start (self, tours : Sequence[Sequence[int]], share : float = 0.5) -> int:
+        """
+        This method warm-starts some particles with the tours of similar orders
+        (see common.seed_swarm).
 
-
-    def run (self, verbose : bool = False) -> Tuple[List[int], int]:
         """
-        This method represents the execution of the algorithm.
+        data = self.particle_data
+        return seed_swarm(self.swarm, tours, data["picking_list"], data["distances"], share)
+
+
+
 
-        :param verbose: If TRUE every <print_every> iterations a log takes place.
-        :return: The gbest and its cost.
 
+    def _search (self, verbose : bool, stop : Optional[Termination]) -> Iterator[Tuple[int, List[int], int]]:
         """
-        # Initialise the starting time
-        start = time.time()
+        The search of the swarm (see Solver._search).
+
+        """
+        stats = self.stats
 
         # Initialize the gbest
         gbest : List[int]; vgbest : int = cast(int, float("inf"))
@@ -355,7 +384,9 @@ class Zhou_PSO (object):
             if p.vpbest < vgbest:
                 gbest, vgbest = list(p.pbest), p.vpbest
         new_gbest, new_vgbest = list(gbest), vgbest
-        self.history = [vgbest]
+        self.history = History([vgbest], max_points=self.history_points)
+
+        yield 0, list(gbest), vgbest
 
         # Iterate
         noimp : int = 0
@@ -363,7 +394,7 @@ class Zhou_PSO (object):
 
             # Move particles
             for p in self.swarm:
-                sol, cost = p.move (gbest, vgbest)
+                sol, cost = p.move (gbest, vgbest, stats)
                 if cost < new_vgbest:
                     new_gbest, new_vgbest = list(sol), cost
 
@@ -372,6 +403,7 @@ class Zhou_PSO (object):
                 self.computations = i * len(self.swarm)
                 noimp = 0
                 gbest, vgbest = list(new_gbest), new_vgbest
+                yield i + 1, list(gbest), vgbest
             else:
                 noimp += 1
                 # Eventually breaks if no improvement for long time
@@ -384,8 +416,9 @@ class Zhou_PSO (object):
             # Logs
             if i % self.print_every == 0 and verbose is True:
                 print('Epoch', i, ' Best: ', vgbest)
-                
-        # Set the computational time
-        self.computational_time = time.time() - start
 
-        return gbest, vgbest
\ No newline at end of file
+            if stats is not None:
+                stats.iteration(i + 1, vgbest)
+
+            if stop is not None and stop(vgbest):
+                break
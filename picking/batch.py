@@ -0,0 +1,311 @@
+# The class Router written in this file routes a whole batch of orders
+# (e.g., the picking lists of a shift) on the same warehouse.
+#
+# Identical orders (i.e., visiting the same locations) are solved once
+# (the routes are kept in a RouteCache, which may outlive the batch), the
+# locations at zero distance are collapsed before solving (see Reduction),
+# the solvers may be warm-started from the routes of the most similar orders,
+# the solver is chosen according to the size of each order, and the
+# orders are spread over a pool of processes which share the distance
+# matrix. The orders are consumed lazily and at most <window> of them are
+# in flight at the same time, so that the memory needed does not depend
+# on the size of the batch, and the routes are streamed back as soon as
+# they are computed.
+#
+
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from multiprocessing import Pool
+
+import itertools
+import os
+import queue
+import time
+import numpy as np
+
+from .algorithms import AntColony, LinKernighan, SpeedPSO
+from .algorithms.common import greedy_tour
+from .utils import SharedMatrix, _as_array
+from .cache import RouteCache, fingerprint
+from .preprocess import Reduction
+
+
+# A solver: function(distances, picking_list, rng[, tours]) -> (tour, cost), where
+# the optional tours are the routes of similar orders to warm-start from
+Solver = Callable[..., Tuple[List[int], float]]
+
+
+def _cost(tour : Sequence[int], distances : Any) -> float:
+    """
+    Return the distance ran to visit the nodes of <tour> starting and finishing in the origin.
+
+    """
+    if len(tour) == 0:
+        return 0.0
+    return float(sum(distances[tour[i]][tour[i + 1]] for i in range(len(tour) - 1)) + distances[0][tour[0]] + distances[tour[-1]][0])
+
+
+def exhaustive(distances : Any, picking_list : List[int], rng : Any = None) -> Tuple[List[int], float]:
+    """
+    The optimal tour, by trying every permutation (only for very small orders).
+
+    """
+    best = min(itertools.permutations(picking_list), key=lambda tour: _cost(tour, distances))
+    return list(best), _cost(best, distances)
+
+
+def nearest_neighbour(distances : Any, picking_list : List[int], rng : Any = None) -> Tuple[List[int], float]:
+    """
+    The greedy tour, which always moves to the closest location not yet visited.
+
+    """
+    tour = greedy_tour(picking_list, distances)
+    return tour, _cost(tour, distances)
+
+
+def ant_colony(distances : Any, picking_list : List[int], rng : Any = None, tours : Sequence[List[int]] = ()) -> Tuple[List[int], float]:
+    colony = AntColony(distances, picking_list, max_iter=200, max_noimp=50, rng=rng)
+    if len(tours) > 0:
+        colony.warm_start(tours)
+    tour, cost = colony.run()
+    return list(tour), float(cost)
+
+
+def speed_pso(distances : Any, picking_list : List[int], rng : Any = None, tours : Sequence[List[int]] = ()) -> Tuple[List[int], float]:
+    swarm = SpeedPSO(distances=distances, picking_list=picking_list, era=200, particles=20, max_noimp=50, rng=rng)
+    if len(tours) > 0:
+        swarm.warm_start(tours)
+    tour, cost = swarm.run()
+    return list(tour), float(cost)
+
+
+def lin_kernighan(distances : Any, picking_list : List[int], rng : Any = None, tours : Sequence[List[int]] = ()) -> Tuple[List[int], float]:
+    solver = LinKernighan(distances, picking_list, max_iter=200, max_noimp=50, rng=rng)
+    if len(tours) > 0:
+        solver.warm_start(tours)
+    tour, cost = solver.run()
+    return list(tour), float(cost)
+
+
+# The default policy: (maximum size of the order, solver), the first fitting the order is used
+POLICY : List[Tuple[Optional[int], Solver]] = [(6, exhaustive), (50, ant_colony), (None, lin_kernighan)]
+
+
+def choose(policy : Sequence[Tuple[Optional[int], Solver]], size : int) -> Solver:
+    """
+    Return the solver of the policy for an order of the given size.
+
+    """
+    for max_size, solver in policy:
+        if max_size is None or size <= max_size:
+            return solver
+    raise ValueError(f"No solver in the policy for orders of {size} locations")
+
+
+def canonical(order : Iterable[int]) -> Tuple[int, ...]:
+    """
+    Return the canonical form of an order, i.e. its locations sorted (the
+    duplicates and the origin are removed), which is the same for all the
+    orders visiting the same locations.
+
+    """
+    return tuple(sorted(set(order) - {0}))
+
+
+# The distance matrix and the policy known by a worker process
+_distances : Any = None
+_policy : List[Tuple[Optional[int], Solver]] = []
+
+
+def _init_worker(distances : Any, policy : List[Tuple[Optional[int], Solver]]) -> None:
+    global _distances, _policy
+    _distances, _policy = distances, policy
+    if isinstance(distances, tuple):
+        _distances = SharedMatrix(*distances)
+
+
+def _route_worker(task : Tuple[Tuple[int, ...], Optional[np.random.SeedSequence], List[List[int]]]) -> Tuple[Tuple[int, ...], List[int], float, str, float]:
+    key, seed, tours = task
+    return _solve(_distances, _policy, key, seed, tours)
+
+
+def _solve(distances : Any, policy : List[Tuple[Optional[int], Solver]], key : Tuple[int, ...], seed : Any,
+           tours : Sequence[List[int]] = ()) -> Tuple[Tuple[int, ...], List[int], float, str, float]:
+    start = time.perf_counter()
+    reduction = Reduction(key, distances)
+    if len(reduction) == 0:
+        return key, reduction.expand([]), 0.0, "", time.perf_counter() - start
+    solver = choose(policy, len(reduction))
+    if len(tours) > 0:
+        tour, cost = solver(distances, reduction.picking_list, seed, tours)
+    else:
+        tour, cost = solver(distances, reduction.picking_list, seed)
+    return key, reduction.expand(tour), cost, solver.__name__, time.perf_counter() - start
+
+
+class Router:
+    """
+    An instance of this class routes batches of orders on the same warehouse.
+    It can be used as a context manager, so that the pool of processes is kept
+    alive for several batches, e.g.
+
+        with Router(distances) as router:
+            for result in router.route(orders):
+                ...
+
+    """
+    def __init__(self, distances : Any, policy : Optional[List[Tuple[Optional[int], Solver]]] = None, processes : Optional[int] = None,
+                 window : Optional[int] = None, memo : int = 10_000, seed : Any = None, cache : Optional[RouteCache] = None,
+                 warm_start : int = 0):
+        """
+        Initialize.
+
+        :param distances: The distance matrix.
+        :param policy: The solver to use for each size of order (by default <POLICY>).
+        :param processes: The number of processes (by default the number of cores, 0 to route in this process).
+        :param window: The maximum number of orders in flight (by default 4 per process).
+        :param memo: The number of routes kept to answer the identical orders (if no cache is given).
+        :param seed: The root seed of the solvers (an int or a numpy SeedSequence).
+        :param cache: The cache of the routes (e.g., shared by several routers, or saved to disk).
+        :param warm_start: The number of routes of similar orders in the cache used to warm-start
+                        the solvers (0 to always start from scratch).
+
+        :attr routed: The number of orders routed.
+        :attr solved: The number of orders actually solved (the others were identical to one already solved).
+        :attr fingerprint: The fingerprint of the distance matrix in the cache.
+
+        """
+        self.distances = distances
+        self.policy = policy or POLICY
+        self.processes = (os.cpu_count() or 1) if processes is None else processes
+        self.window = window or 4 * max(self.processes, 1)
+        self.cache = cache if cache is not None else RouteCache(maxsize=memo)
+        self.fingerprint = fingerprint(distances)
+        self.warm_start = warm_start
+        self.seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+
+        self.routed : int = 0
+        self.solved : int = 0
+        self.__pool = None
+        self.__shared : Optional[SharedMatrix] = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def open(self):
+        """
+        Start the pool of processes, placing the distance matrix in shared memory.
+
+        """
+        if self.__pool is None and self.processes > 0:
+            array = _as_array(self.distances)
+            shared = self.distances
+            if array is not None:
+                self.__shared = SharedMatrix.create(array)
+                shared = (self.__shared.name, self.__shared.shape, self.__shared.dtype)
+            self.__pool = Pool(self.processes, initializer=_init_worker, initargs=(shared, self.policy))
+        return self
+
+    def close(self):
+        """
+        Close the pool of processes and free the shared memory.
+
+        """
+        if self.__pool is not None:
+            self.__pool.close()
+            self.__pool.join()
+            self.__pool = None
+        if self.__shared is not None:
+            self.__shared.release()
+            self.__shared = None
+
+    def route(self, orders : Iterable[Sequence[int]]) -> Iterator[Dict[str, Any]]:
+        """
+        Route a batch of orders, yielding the results in the order in which they are computed.
+
+        :param orders: The orders (any iterable, consumed lazily).
+        :return: A generator of dictionaries with the index of the order in the batch, the
+                tour, its cost, the solver used, the seconds needed, and whether the order
+                was identical to another one (i.e., the route has not been computed again).
+
+        """
+        owner = self.__pool is None
+        self.open()
+        try:
+            if self.__pool is None:
+                yield from self._route_here(orders)
+            else:
+                yield from self._route_pool(orders)
+        finally:
+            if owner:
+                self.close()
+
+    def _result(self, index : int, key : Tuple[int, ...], route : Tuple[List[int], float, str], elapsed : float, duplicate : bool) -> Dict[str, Any]:
+        self.routed += 1
+        tour, cost, solver = route
+        return {"index" : index, "tour" : list(tour), "cost" : cost, "solver" : solver, "time" : elapsed, "duplicate" : duplicate}
+
+    def _similar(self, key : Tuple[int, ...]) -> List[List[int]]:
+        if self.warm_start <= 0:
+            return []
+        return [tour for _, tour, _ in self.cache.similar(key, self.fingerprint, self.warm_start)]
+
+    def _route_here(self, orders : Iterable[Sequence[int]]) -> Iterator[Dict[str, Any]]:
+        for index, order in enumerate(orders):
+            key = canonical(order)
+            cached = self.cache.get(key, self.fingerprint)
+            if cached is not None:
+                yield self._result(index, key, cached, 0.0, True)
+                continue
+            _, tour, cost, solver, elapsed = _solve(self.distances, self.policy, key, self.seed_sequence.spawn(1)[0], self._similar(key))
+            self.solved += 1
+            self.cache.put(key, self.fingerprint, tour, cost, solver)
+            yield self._result(index, key, (tour, cost, solver), elapsed, False)
+
+    def _route_pool(self, orders : Iterable[Sequence[int]]) -> Iterator[Dict[str, Any]]:
+        done : "queue.Queue[Any]" = queue.Queue()
+        pending : Dict[Tuple[int, ...], List[int]] = {}
+        orders = iter(orders)
+        index, exhausted = 0, False
+        while True:
+            # Submit new orders until the window is full
+            while not exhausted and len(pending) < self.window:
+                order = next(orders, None)
+                if order is None:
+                    exhausted = True
+                    break
+                key = canonical(order)
+                cached = self.cache.get(key, self.fingerprint) if key not in pending else None
+                if cached is not None:
+                    yield self._result(index, key, cached, 0.0, True)
+                elif key in pending:
+                    pending[key].append(index)
+                else:
+                    pending[key] = [index]
+                    self.__pool.apply_async(_route_worker, ((key, self.seed_sequence.spawn(1)[0], self._similar(key)),), callback=done.put, error_callback=done.put)
+                index += 1
+
+            if len(pending) == 0:
+                return
+
+            # Wait for a route and answer all the orders waiting for it
+            result = done.get()
+            if isinstance(result, BaseException):
+                raise result
+            key, tour, cost, solver, elapsed = result
+            self.solved += 1
+            self.cache.put(key, self.fingerprint, tour, cost, solver)
+            for k, i in enumerate(pending.pop(key)):
+                yield self._result(i, key, (tour, cost, solver), elapsed if k == 0 else 0.0, k > 0)
+
+
+def route(orders : Iterable[Sequence[int]], distances : Any, **kwargs : Any) -> Iterator[Dict[str, Any]]:
+    """
+    Route a batch of orders (see Router for the parameters).
+
+    """
+    with Router(distances, **kwargs) as router:
+        yield from router.route(orders)
@@ -0,0 +1,311 @@
+# The class Benchmark written in this file measures the performance of
+# the algorithms of picking.algorithms on families of instances (see
+# picking.instances) of increasing size, over several seeds.
+#
+# For every run it records the wall time, the number of solutions
+# evaluated per second, the peak memory (via tracemalloc, in a separate
+# run so that the timings are not affected), and the gap to the exact
+# cost (for small picking lists) or to the best cost known.
+#
+# The results, with the time-to-target distributions and the scaling
+# curves, are saved as JSON, and two results (e.g. of two commits) can
+# be compared with <compare>, also from the command line:
+#
+#   python -m picking.bench run --sizes 5 10 25 50 --seeds 5 --out new.json
+#   python -m picking.bench compare old.json new.json
+#
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import argparse
+import json
+import math
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+from .algorithms import Mattia_PSO, Zhou_PSO, AntColony, Zhong_PSO, SpeedPSO, LinKernighan
+from .algorithms.common import Stats
+from .instances import Instance, family
+
+
+# The largest picking list whose exact cost is computed
+EXACT_SIZE : int = 12
+
+# The relative gaps to the best cost for which the time-to-target is measured
+TARGETS : Tuple[float, ...] = (0.0, 0.01, 0.05)
+
+
+# The default solvers: name -> function(distances, picking_list, rng) -> solver
+SOLVERS : Dict[str, Callable[[Any, List[int], Any], Any]] = {
+    "Mattia_PSO" : lambda d, pl, rng: Mattia_PSO(distances=d, picking_list=pl, era=200, particles=20, max_noimp=50, particle_data={}, rng=rng),
+    "SpeedPSO" : lambda d, pl, rng: SpeedPSO(distances=d, picking_list=pl, era=200, particles=20, max_noimp=50, rng=rng),
+    "Zhou_PSO" : lambda d, pl, rng: Zhou_PSO(distances=d, picking_list=pl, particles=20, max_iter=200, max_noimp=50, rng=rng),
+    "Zhong_PSO" : lambda d, pl, rng: Zhong_PSO(distances=d, picking_list=pl, particles=10, lt=100, max_iter=200, max_noimp=50, rng=rng),
+    "AntColony" : lambda d, pl, rng: AntColony(d, pl, max_iter=200, max_noimp=50, rng=rng),
+    "LinKernighan" : lambda d, pl, rng: LinKernighan(d, pl, max_iter=200, max_noimp=50, rng=rng),
+}
+
+
+def exact_cost(distances : Any, picking_list : Sequence[int]) -> float:
+    """
+    Return the cost of the optimal tour, by dynamic programming (Held-Karp).
+    The time needed grows as n^2 * 2^n, hence it is only used for small picking lists.
+
+    """
+    nodes = [0] + list(picking_list)
+    n = len(picking_list)
+    d = np.array([[distances[i][j] for j in nodes] for i in nodes], dtype=np.float64)
+
+    # cost[S][j]: the shortest path from the depot visiting the set S and ending in j
+    cost = np.full((1 << n, n), np.inf)
+    for j in range(n):
+        cost[1 << j, j] = d[0, j + 1]
+    for S in range(1, 1 << n):
+        row = cost[S]
+        if not np.isfinite(row).any():
+            continue
+        for k in range(n):
+            if S & (1 << k):
+                continue
+            T = S | (1 << k)
+            candidate = (row + d[1:, k + 1]).min()
+            if candidate < cost[T, k]:
+                cost[T, k] = candidate
+    return float((cost[(1 << n) - 1] + d[1:, 0]).min())
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _median(values : List[float]) -> Optional[float]:
+    return statistics.median(values) if len(values) > 0 else None
+
+
+class Benchmark:
+    """
+    An instance of this class runs every solver on every picking list of an
+    instance, once per seed.
+
+    """
+    def __init__(self, instance : Instance, solvers : Optional[Dict[str, Callable[[Any, List[int], Any], Any]]] = None,
+                 seeds : Sequence[int] = (0, 1, 2), time_limit : Optional[float] = None, memory : bool = True,
+                 best_known : Optional[Dict[int, float]] = None, callback : Optional[Callable[[Dict[str, Any]], None]] = None):
+        """
+        Initialize.
+
+        :param instance: The picking lists and their warehouse.
+        :param solvers: The solvers as name -> function(distances, picking_list, rng) (by default <SOLVERS>).
+        :param seeds: The seeds of the runs.
+        :param time_limit: The maximum seconds of each run.
+        :param memory: If TRUE the peak memory of every solver is measured on every picking list.
+        :param best_known: The best cost known of some picking lists (by their index in the instance).
+        :param callback: A function called as callback(run) every time a run is completed.
+
+        :attr runs: The results of the runs.
+        :attr best: The best cost known (or exact) of each picking list.
+
+        """
+        self.instance = instance
+        self.solvers = solvers or SOLVERS
+        self.seeds = list(seeds)
+        self.time_limit = time_limit
+        self.memory = memory
+        self.callback = callback
+
+        self.runs : List[Dict[str, Any]] = []
+        self.best : Dict[int, float] = dict(best_known or {})
+        self.exact : Dict[int, bool] = {}
+
+    def _run(self, name : str, order : int, seed : int) -> Dict[str, Any]:
+        """
+        Run a solver once, recording the improvements of the best.
+
+        """
+        picking_list = self.instance[order]
+        solver = self.solvers[name](self.instance.distances, picking_list, seed)
+        solver.stats = Stats()
+
+        trace : List[Tuple[float, float]] = []
+        start = time.perf_counter()
+        for _, _, _, cost in solver.run_iter(time_limit=self.time_limit):
+            trace.append((time.perf_counter() - start, float(cost)))
+        wall = time.perf_counter() - start
+
+        evaluations = solver.stats.evaluations
+        return {"solver" : name, "order" : order, "size" : len(picking_list), "seed" : seed,
+                "cost" : trace[-1][1], "wall" : wall, "evaluations" : evaluations,
+                "evaluations_per_second" : evaluations / wall if wall > 0 else None, "trace" : trace}
+
+    def _peak_memory(self, name : str, order : int) -> int:
+        """
+        Return the peak memory (bytes) allocated by a solver, from its construction
+        to the end of a run on a picking list.
+
+        """
+        tracemalloc.start()
+        try:
+            tracemalloc.reset_peak()
+            solver = self.solvers[name](self.instance.distances, self.instance[order], self.seeds[0])
+            solver.run(time_limit=self.time_limit)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def __call__(self):
+        """
+        Run the benchmark.
+
+        """
+        self.runs = []
+        for order, picking_list in enumerate(self.instance):
+            if order not in self.best and len(picking_list) <= EXACT_SIZE:
+                self.best[order] = exact_cost(self.instance.distances, picking_list)
+                self.exact[order] = True
+            for name in self.solvers:
+                peak = self._peak_memory(name, order) if self.memory else None
+                for seed in self.seeds:
+                    run = self._run(name, order, seed)
+                    run["peak_memory"] = peak
+                    self.runs.append(run)
+                    if self.callback is not None:
+                        self.callback(run)
+
+        # Where the exact cost is unknown, the best cost found by any run is used
+        for run in self.runs:
+            if run["cost"] < self.best.get(run["order"], math.inf):
+                self.best[run["order"]] = run["cost"]
+        for run in self.runs:
+            best = self.best[run["order"]]
+            run["gap"] = (run["cost"] - best) / best if best > 0 else 0.0
+        return self
+
+    def time_to_target(self, targets : Sequence[float] = TARGETS) -> Dict[str, Dict[str, Dict[str, List[Optional[float]]]]]:
+        """
+        Return, for every solver, size, and target gap, the seconds each run needed
+        to reach a cost within the gap from the best (None if never reached), sorted,
+        i.e. the empirical time-to-target distribution.
+
+        """
+        ttt : Dict[str, Dict[str, Dict[str, List[Optional[float]]]]] = {}
+        for run in self.runs:
+            best = self.best[run["order"]]
+            per_size = ttt.setdefault(run["solver"], {}).setdefault(str(run["size"]), {})
+            for target in targets:
+                reached = next((t for t, cost in run["trace"] if cost <= best * (1 + target) + 1e-9), None)
+                per_size.setdefault(str(target), []).append(reached)
+        for per_size in ttt.values():
+            for per_target in per_size.values():
+                for target, times in per_target.items():
+                    per_target[target] = sorted(times, key=lambda t: math.inf if t is None else t)
+        return ttt
+
+    def scaling(self) -> Dict[str, Dict[str, Dict[str, Optional[float]]]]:
+        """
+        Return, for every solver and size, the median wall time, gap, evaluations per
+        second, and peak memory of the runs.
+
+        """
+        groups : Dict[Tuple[str, int], List[Dict[str, Any]]] = {}
+        for run in self.runs:
+            groups.setdefault((run["solver"], run["size"]), []).append(run)
+        curves : Dict[str, Dict[str, Dict[str, Optional[float]]]] = {}
+        for (name, size), runs in sorted(groups.items()):
+            curves.setdefault(name, {})[str(size)] = {
+                key : _median([r[key] for r in runs if r.get(key) is not None])
+                for key in ("wall", "gap", "evaluations_per_second", "peak_memory")}
+        return curves
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Return the results, ready to be saved as JSON.
+
+        """
+        return {"meta" : {"commit" : _git_commit(), "python" : platform.python_version(), "numpy" : np.__version__,
+                          "machine" : platform.platform(), "time" : time.strftime("%Y-%m-%dT%H:%M:%S"),
+                          "seeds" : self.seeds, "time_limit" : self.time_limit, "params" : self.instance.params},
+                "best" : {str(order) : {"cost" : cost, "exact" : self.exact.get(order, False)} for order, cost in self.best.items()},
+                "runs" : [{k : v for k, v in run.items() if k != "trace"} for run in self.runs],
+                "time_to_target" : self.time_to_target(),
+                "scaling" : self.scaling()}
+
+    def save(self, path : str) -> None:
+        with open(path, "w") as file:
+            json.dump(self.as_dict(), file, indent=1)
+
+
+def compare(old : Dict[str, Any], new : Dict[str, Any], tolerance : float = 0.05) -> List[Dict[str, Any]]:
+    """
+    Compare the scaling curves of two benchmarks.
+
+    :param old: The first results (see Benchmark.as_dict).
+    :param new: The second results.
+    :param tolerance: The relative change of the wall time beyond which a solver is
+                    considered slower (or faster).
+    :return: For every solver and size in both, the medians of both and their ratio,
+            with "verdict" set to "slower", "faster", or "same".
+
+    """
+    rows = []
+    for name, sizes in new["scaling"].items():
+        for size, after in sizes.items():
+            before = old["scaling"].get(name, {}).get(size)
+            if before is None:
+                continue
+            ratio = after["wall"] / before["wall"] if before["wall"] and after["wall"] is not None else None
+            verdict = "same"
+            if ratio is not None and ratio > 1 + tolerance:
+                verdict = "slower"
+            elif ratio is not None and ratio < 1 - tolerance:
+                verdict = "faster"
+            rows.append({"solver" : name, "size" : int(size), "wall" : (before["wall"], after["wall"]), "ratio" : ratio,
+                         "gap" : (before["gap"], after["gap"]), "verdict" : verdict})
+    return rows
+
+
+def main(argv : Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m picking.bench", description="Benchmark the picking algorithms.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the benchmark and save the results")
+    run.add_argument("--sizes", type=int, nargs="+", default=[5, 10, 25, 50])
+    run.add_argument("--orders", type=int, default=2, help="picking lists per size")
+    run.add_argument("--seeds", type=int, default=3, help="runs per solver and picking list")
+    run.add_argument("--solvers", nargs="+", default=list(SOLVERS), choices=list(SOLVERS))
+    run.add_argument("--time-limit", type=float, default=None)
+    run.add_argument("--instance", default=None, help="an .npz instance (see picking.instances)")
+    run.add_argument("--no-memory", action="store_true")
+    run.add_argument("--out", required=True)
+
+    cmp = commands.add_parser("compare", help="compare two results")
+    cmp.add_argument("old")
+    cmp.add_argument("new")
+    cmp.add_argument("--tolerance", type=float, default=0.05)
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        instance = Instance.load(args.instance) if args.instance else family(sizes=args.sizes, orders=args.orders, seed=0)
+        bench = Benchmark(instance, {name : SOLVERS[name] for name in args.solvers}, range(args.seeds), args.time_limit,
+                          memory=not args.no_memory, callback=lambda r: print(f"{r['solver']} size {r['size']} seed {r['seed']}: cost {r['cost']} in {r['wall']:.3f}s"))
+        bench().save(args.out)
+    else:
+        with open(args.old) as file:
+            old = json.load(file)
+        with open(args.new) as file:
+            new = json.load(file)
+        for row in compare(old, new, args.tolerance):
+            ratio = f"x{row['ratio']:.2f}" if row["ratio"] is not None else "n/a"
+            before, after = (f"{wall:.3f}s" if wall is not None else "n/a" for wall in row["wall"])
+            print(f"{row['solver']:<12} {row['size']:>5}  {before} -> {after}  {ratio}  {row['verdict']}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,231 @@
+# The class RouteCache written in this file remembers the best routes
+# found for the orders, so that an order visiting the same locations of
+# one already routed (e.g., replenishment waves, popular bundles) gets
+# its route back instantly instead of running a solver from scratch.
+#
+# The key of a route is the set of locations visited by the order and the
+# fingerprint of the distance matrix, so that routes computed on different
+# warehouses (or on a modified one) are never mixed up. The cache is a
+# LRU bounded in the number of routes and, optionally, in the number of
+# locations stored, and it can be saved to disk and loaded back.
+#
+# An inverted index (location -> routes visiting it) finds the routes of
+# the orders most similar to a new one, which are used to warm-start the
+# solvers (see the method warm_start of the algorithms).
+#
+
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+from collections import OrderedDict
+
+import hashlib
+import heapq
+import os
+import pickle
+import tempfile
+import numpy as np
+
+from .utils import _as_array
+
+
+# The key of a route: (fingerprint of the distance matrix, locations)
+Key = Tuple[str, FrozenSet[int]]
+
+
+def fingerprint(distances : Any) -> str:
+    """
+    Return a fingerprint of a distance matrix, i.e. a digest of its shape and values,
+    which is the same for equal matrices whatever their type.
+
+    """
+    array = _as_array(distances)
+    if array is None and isinstance(distances, dict):
+        array = np.array([[distances[i][j] for j in distances] for i in distances])
+    elif array is None:
+        array = np.asarray(distances)
+    array = np.ascontiguousarray(array, dtype=np.float64)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(array.shape).encode())
+    digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+class RouteCache:
+    """
+    An instance of this class is a LRU cache of routes, e.g.
+
+        cache = RouteCache(path="routes.cache")
+        fp = fingerprint(distances)
+        route = cache.get(order, fp)
+        if route is None:
+            tour, cost = solver.run()
+            cache.put(order, fp, tour, cost)
+        cache.save()
+
+    """
+    def __init__(self, maxsize : Optional[int] = 10_000, max_locations : Optional[int] = None, path : Optional[str] = None):
+        """
+        Initialize.
+
+        :param maxsize: The maximum number of routes (None for no limit).
+        :param max_locations: The maximum number of locations in all the routes (None for no limit).
+        :param path: The file where the cache is saved (if it exists, the cache is loaded from it;
+                    the file is unpickled, so it must come from a trusted source).
+
+        :attr hits: The number of routes found.
+        :attr misses: The number of routes not found.
+        :attr evictions: The number of routes dropped to stay within the limits.
+
+        """
+        self.maxsize = maxsize
+        self.max_locations = max_locations
+        self.path = path
+
+        self.hits : int = 0
+        self.misses : int = 0
+        self.evictions : int = 0
+        self.locations : int = 0
+        self._routes : "OrderedDict[Key, Tuple[List[int], float, str]]" = OrderedDict()
+        self._index : Dict[int, Set[Key]] = {}
+
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    @staticmethod
+    def key(order : Iterable[int], fp : str) -> Key:
+        """
+        Return the key of an order, i.e. the fingerprint and the set of its locations (origin excluded).
+
+        """
+        return fp, frozenset(order) - {0}
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+    def __contains__(self, key : Key) -> bool:
+        return key in self._routes
+
+    def get(self, order : Iterable[int], fp : str) -> Optional[Tuple[List[int], float, str]]:
+        """
+        Return the route of an order as (tour, cost, solver), or None if it is not in the cache.
+
+        :param order: The locations of the order.
+        :param fp: The fingerprint of the distance matrix.
+
+        """
+        key = self.key(order, fp)
+        route = self._routes.get(key)
+        if route is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._routes.move_to_end(key)
+        return list(route[0]), route[1], route[2]
+
+    def put(self, order : Iterable[int], fp : str, tour : List[int], cost : float, solver : str = "") -> None:
+        """
+        Store the route of an order, unless a better one is already stored.
+
+        :param order: The locations of the order.
+        :param fp: The fingerprint of the distance matrix.
+        :param tour: The tour.
+        :param cost: The cost of the tour.
+        :param solver: The name of the solver which found it.
+
+        """
+        key = self.key(order, fp)
+        old = self._routes.get(key)
+        if old is not None:
+            self._routes.move_to_end(key)
+            if old[1] <= cost:
+                return
+            self.locations -= len(old[0])
+        else:
+            for location in key[1]:
+                self._index.setdefault(location, set()).add(key)
+        self._routes[key] = (list(tour), cost, solver)
+        self.locations += len(tour)
+        self._evict()
+
+    def _evict(self) -> None:
+        """
+        Drop the least recently used routes until the cache is within its limits.
+
+        """
+        while len(self._routes) > 0 and ((self.maxsize is not None and len(self._routes) > self.maxsize) or
+                                         (self.max_locations is not None and self.locations > self.max_locations)):
+            key, (tour, _, _) = self._routes.popitem(last=False)
+            self.locations -= len(tour)
+            for location in key[1]:
+                keys = self._index[location]
+                keys.discard(key)
+                if len(keys) == 0:
+                    del self._index[location]
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._routes.clear()
+        self._index.clear()
+        self.locations = 0
+
+    def similar(self, order : Iterable[int], fp : str, k : int = 3, min_similarity : float = 0.5) -> List[Tuple[float, List[int], float]]:
+        """
+        Return the routes of the orders most similar to an order, i.e. whose sets of
+        locations have the highest Jaccard similarity with its own (the order itself
+        included, if it is in the cache). The statistics are not affected.
+
+        :param order: The locations of the order.
+        :param fp: The fingerprint of the distance matrix.
+        :param k: The maximum number of routes.
+        :param min_similarity: The minimum similarity of the routes.
+        :return: The routes as (similarity, tour, cost), the most similar first.
+
+        """
+        _, locations = self.key(order, fp)
+        overlap : Dict[Key, int] = {}
+        for location in locations:
+            for key in self._index.get(location, ()):
+                if key[0] == fp:
+                    overlap[key] = overlap.get(key, 0) + 1
+        scored = ((n / (len(locations) + len(key[1]) - n), key) for key, n in overlap.items())
+        best = heapq.nlargest(k, (s for s in scored if s[0] >= min_similarity), key=lambda s: s[0])
+        return [(similarity, list(self._routes[key][0]), self._routes[key][1]) for similarity, key in best]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return the statistics of the cache.
+
+        """
+        lookups = self.hits + self.misses
+        return {"routes" : len(self._routes), "locations" : self.locations, "hits" : self.hits, "misses" : self.misses,
+                "evictions" : self.evictions, "hit_rate" : self.hits / lookups if lookups > 0 else 0.0}
+
+    def save(self, path : Optional[str] = None) -> None:
+        """
+        Save the routes to disk (the file is replaced atomically).
+
+        :param path: The file (by default the one given at the creation).
+
+        """
+        path = path or self.path
+        if path is None:
+            raise ValueError("No file where to save the cache")
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".routes-")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                pickle.dump(list(self._routes.items()), file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def load(self, path : str) -> None:
+        """
+        Add the routes saved in a file (the most recently used last), keeping the best
+        route of every order.
+
+        """
+        with open(path, "rb") as file:
+            routes = pickle.load(file)
+        for (fp, locations), (tour, cost, solver) in routes:
+            self.put(locations, fp, tour, cost, solver)
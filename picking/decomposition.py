@@ -0,0 +1,251 @@
+# The class Decomposition written in this file routes very large picking
+# lists (e.g., store replenishment orders with hundreds of picks), on
+# which every metaheuristic of the package is too slow.
+#
+# The picks are partitioned in zones: groups of adjacent aisles when the
+# positions of the locations are known, otherwise consecutive stretches
+# of the greedy tour. Each zone is solved independently, and in parallel,
+# by the solvers of a policy (see batch.Router), the sub-tours are
+# stitched in the order of the zones choosing where to open each one and
+# in which direction to run it so that the connections (through the cross
+# aisles) are as short as possible, and a short global 2-Opt pass finally
+# smooths the joints.
+#
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import time
+import numpy as np
+
+from .algorithms.common import greedy_tour, submatrix
+from .batch import Router, Solver, _cost
+
+
+def zones_by_aisle(picking_list : Sequence[int], positions : Any, zone_size : int) -> List[List[int]]:
+    """
+    Partition the picks in zones of adjacent aisles, from left to right. An aisle is
+    the set of locations with the same x coordinate; an aisle with more than <zone_size>
+    picks is split along y.
+
+    :param picking_list: The locations to visit.
+    :param positions: The (x, y) coordinates of each node.
+    :param zone_size: The maximum number of picks in a zone.
+    :return: The zones.
+
+    """
+    aisles : Dict[float, List[int]] = {}
+    for node in picking_list:
+        aisles.setdefault(round(float(positions[node][0]), 6), []).append(node)
+
+    zones : List[List[int]] = [[]]
+    for x in sorted(aisles):
+        nodes = sorted(aisles[x], key=lambda node: float(positions[node][1]))
+        if len(zones[-1]) + len(nodes) > zone_size and len(zones[-1]) > 0:
+            zones.append([])
+        for node in nodes:
+            if len(zones[-1]) == zone_size:
+                zones.append([])
+            zones[-1].append(node)
+    return [zone for zone in zones if len(zone) > 0]
+
+
+def zones_by_tour(picking_list : Sequence[int], distances : Any, zone_size : int) -> List[List[int]]:
+    """
+    Partition the picks in zones of consecutive locations of the greedy tour (when
+    the positions of the locations are unknown).
+
+    """
+    tour = greedy_tour(picking_list, distances)
+    return [tour[i:i + zone_size] for i in range(0, len(tour), zone_size)]
+
+
+def _openings(cycle : np.ndarray, matrix : np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Return the ways to run a cyclic sub-tour as a path, i.e. opening it between two
+    consecutive locations and running it forward or backward, as the arrays of the
+    first location, the last location, and the cost of the path.
+
+    """
+    succ = np.roll(cycle, -1)
+    forward = matrix[cycle, succ]
+    backward = matrix[succ, cycle]
+    # Opening r: forward from cycle[r] to cycle[r - 1], backward from cycle[r - 1] to cycle[r]
+    pred = np.roll(cycle, 1)
+    first = np.concatenate((cycle, pred))
+    last = np.concatenate((pred, cycle))
+    cost = np.concatenate((forward.sum() - matrix[pred, cycle], backward.sum() - matrix[cycle, pred]))
+    return first, last, cost
+
+
+def stitch(paths : List[List[int]], distances : Any) -> List[int]:
+    """
+    Join the sub-tours of the zones, in their order. Each sub-tour is considered as
+    a cycle which can be opened between any two consecutive locations and run in
+    either direction: the openings which minimise the whole tour (connections from
+    the origin, between consecutive zones and back to the origin included) are found
+    by dynamic programming.
+
+    :param paths: The sub-tours (without the origin).
+    :param distances: The distance matrix.
+    :return: The tour.
+
+    """
+    paths = [path for path in paths if len(path) > 0]
+    if len(paths) == 0:
+        return []
+
+    nodes = [0] + [node for path in paths for node in path]
+    matrix = submatrix(nodes, distances)
+    cycles, offset = [], 1
+    for path in paths:
+        cycles.append(np.arange(offset, offset + len(path)))
+        offset += len(path)
+
+    # cost[s]: the cost of the best join ending with the last zone opened in the way s
+    openings = [_openings(cycle, matrix) for cycle in cycles]
+    first, last, internal = openings[0]
+    cost = matrix[0, first] + internal
+    choices : List[np.ndarray] = []
+    for k in range(1, len(cycles)):
+        first, last_k, internal = openings[k]
+        options = cost[:, np.newaxis] + matrix[np.ix_(last, first)]
+        choice = np.argmin(options, axis=0)
+        cost = options[choice, np.arange(len(first))] + internal
+        choices.append(choice)
+        last = last_k
+
+    # Close the tour and go back through the choices
+    s = int(np.argmin(cost + matrix[last, 0]))
+    ways = [s]
+    for choice in reversed(choices):
+        s = int(choice[s])
+        ways.append(s)
+    ways.reverse()
+
+    tour : List[int] = []
+    for path, cycle, s in zip(paths, cycles, ways):
+        r = s % len(path)
+        opened = path[r:] + path[:r]
+        tour.extend(opened if s < len(path) else reversed(opened))
+    return tour
+
+
+def two_opt(tour : List[int], distances : Any, passes : int = 5, deadline : Optional[float] = None) -> List[int]:
+    """
+    Improve a tour with 2-Opt moves: at each position the best reversal is found on a
+    dense submatrix (vectorized) and applied if it really shortens the tour.
+
+    :param tour: The tour (without the origin).
+    :param distances: The distance matrix.
+    :param passes: The maximum number of passes over the tour.
+    :param deadline: The time (in seconds since the epoch) when the search stops.
+    :return: The improved tour.
+
+    """
+    nodes = [0] + list(tour)
+    matrix = submatrix(nodes, distances)
+    # The route as indexes of the matrix, starting and finishing in the origin
+    route = np.arange(len(nodes) + 1)
+    route[-1] = 0
+    cost = float(matrix[route[:-1], route[1:]].sum())
+
+    for _ in range(passes):
+        improved = False
+        for i in range(len(route) - 3):
+            if deadline is not None and time.time() > deadline:
+                return [nodes[k] for k in route[1:-1]]
+            a, b = route[i], route[i + 1]
+            c, d = route[i + 2:-1], route[i + 3:]
+            delta = matrix[a, c] + matrix[b, d] - matrix[a, b] - matrix[c, d]
+            j = int(np.argmin(delta))
+            if delta[j] >= -1e-9:
+                continue
+            candidate = route.copy()
+            candidate[i + 1:i + j + 3] = route[i + 1:i + j + 3][::-1]
+            new_cost = float(matrix[candidate[:-1], candidate[1:]].sum())
+            if new_cost < cost - 1e-9:
+                route, cost, improved = candidate, new_cost, True
+        if not improved:
+            break
+
+    return [nodes[k] for k in route[1:-1]]
+
+
+class Decomposition:
+    """
+    An instance of this class routes a very large picking list by decomposition, e.g.
+
+        tour, cost = Decomposition(distances, picking_list, positions=positions).run()
+
+    """
+    def __init__(self, distances : Any, picking_list : List[int], positions : Any = None, zone_size : int = 50,
+                 policy : Optional[List[Tuple[Optional[int], Solver]]] = None, processes : Optional[int] = None,
+                 passes : int = 5, seed : Any = None):
+        """
+        Initialize.
+
+        :param distances: The distance matrix.
+        :param picking_list: The locations to visit.
+        :param positions: The (x, y) coordinates of each node (None to partition along the greedy tour).
+        :param zone_size: The maximum number of picks in a zone.
+        :param policy: The solver to use for each size of zone (by default batch.POLICY).
+        :param processes: The number of processes solving the zones (0 to solve them in this process).
+        :param passes: The maximum number of passes of the final 2-Opt.
+        :param seed: The root seed of the solvers.
+
+        :attr zones: The zones of the last run.
+        :attr computational_time: The seconds of the last run.
+
+        """
+        self.distances = distances
+        self.picking_list = picking_list
+        self.positions = positions
+        self.zone_size = zone_size
+        self.policy = policy
+        self.processes = processes
+        self.passes = passes
+        self.seed = seed
+
+        self.zones : List[List[int]] = []
+        self.computational_time : float = 0.0
+
+    def partition(self) -> List[List[int]]:
+        """
+        Return the zones of the picking list.
+
+        """
+        picking_list = list(dict.fromkeys(node for node in self.picking_list if node != 0))
+        if self.positions is not None:
+            return zones_by_aisle(picking_list, self.positions, self.zone_size)
+        return zones_by_tour(picking_list, self.distances, self.zone_size)
+
+    def run(self, time_limit : Optional[float] = None) -> Tuple[List[int], float]:
+        """
+        Route the picking list.
+
+        :param time_limit: The maximum seconds of the final 2-Opt (None for no limit).
+        :return: The tour and its cost.
+
+        """
+        start = time.time()
+        self.zones = self.partition()
+
+        paths : List[List[int]] = [[] for _ in self.zones]
+        router = Router(self.distances, policy=self.policy, processes=self.processes, seed=self.seed)
+        for result in router.route(self.zones):
+            paths[result["index"]] = result["tour"]
+
+        tour = stitch(paths, self.distances)
+        deadline = start + time_limit if time_limit is not None else None
+        tour = two_opt(tour, self.distances, self.passes, deadline)
+
+        self.computational_time = time.time() - start
+        return tour, _cost(tour, self.distances)
+
+
+def decomposition(distances : Any, picking_list : List[int], rng : Any = None) -> Tuple[List[int], float]:
+    """
+    A solver for the policies of batch.Router (the zones are solved in the same process).
+
+    """
+    return Decomposition(distances, picking_list, processes=0, seed=rng).run()
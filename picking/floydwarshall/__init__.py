@@ -1,3 +1,3 @@
-from .floydwarshall import floyd_warshall
 from .fast_floyd_warshall import fast_floyd_warshall
-from .warehouse import Warehouse
+from .generator import layout, storage_locations, minimum_distances
+from .backends import BACKENDS, select, calibrate, load_calibration
@@ -0,0 +1,203 @@
+"""
+%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+This file contains the backends used to calculate the matrix of minimum distances of a
+warehouse graph (all-pairs shortest paths), a benchmark to measure their time and peak memory
+on layouts of increasing size, and the selection of the fastest backend for a graph.
+
+    - networkx: the Floyd-Warshall of networkx (floyd_warshall_numpy);
+    - numpy: the Floyd-Warshall of fast_floyd_warshall, on the dense adjacency matrix;
+    - sparse: a Bellman-Ford from all the sources at once, on the adjacency lists, whose
+              cost grows as n^2 * (edges per node) * (hops of the longest shortest path),
+              i.e. much less than n^3 for the sparse graphs of the warehouses;
+    - scipy: the Dijkstra of scipy.sparse.csgraph (only if scipy is installed).
+
+The selection uses the results of <calibrate> (if any), otherwise a rule of thumb.
+
+Run as python -m picking.floydwarshall.backends to benchmark the backends on this machine.
+%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+"""
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import json
+import math
+import time
+import tracemalloc
+import networkx as nx
+import networkx.algorithms.shortest_paths.dense as nxalg
+import numpy as np
+
+from .fast_floyd_warshall import fast_floyd_warshall
+
+try:
+    from scipy.sparse.csgraph import shortest_path as _scipy_shortest_path
+except ImportError:
+    _scipy_shortest_path = None
+
+
+def _networkx(G : nx.Graph) -> np.ndarray:
+    return np.asarray(nxalg.floyd_warshall_numpy(G, nodelist=sorted(G.nodes)))
+
+
+def _numpy(G : nx.Graph) -> np.ndarray:
+    return fast_floyd_warshall(nx.to_numpy_array(G, nodelist=sorted(G.nodes), nonedge=np.inf), inplace=True)
+
+
+def _sparse(G : nx.Graph) -> np.ndarray:
+    nodes = sorted(G.nodes)
+    n = len(nodes)
+    index = {node : i for i, node in enumerate(nodes)}
+
+    # The neighbours of each node (padded with the node itself at an infinite distance)
+    degree = max((d for _, d in G.degree), default=0)
+    neighbours = np.tile(np.arange(n)[:, np.newaxis], (1, max(degree, 1)))
+    weights = np.full((n, max(degree, 1)), np.inf)
+    for node in nodes:
+        for c, (other, data) in enumerate(G[node].items()):
+            neighbours[index[node], c] = index[other]
+            weights[index[node], c] = data.get("weight", 1)
+
+    D = np.full((n, n), np.inf)
+    np.fill_diagonal(D, 0)
+    candidates = np.empty_like(D)
+    previous = np.empty_like(D)
+    while True:
+        previous[...] = D
+        # D[s, v] = min(D[s, v], D[s, u] + w(u, v)) for every neighbour u of v
+        for c in range(neighbours.shape[1]):
+            np.take(D, neighbours[:, c], axis=1, out=candidates)
+            candidates += weights[:, c][np.newaxis, :]
+            np.minimum(D, candidates, out=D)
+        if np.array_equal(previous, D):
+            return D
+
+
+def _scipy(G : nx.Graph) -> np.ndarray:
+    return _scipy_shortest_path(nx.to_scipy_sparse_array(G, nodelist=sorted(G.nodes)), method="D", directed=False)
+
+
+# The available backends: name -> function(G) -> distance matrix
+BACKENDS : Dict[str, Callable[[nx.Graph], np.ndarray]] = {"networkx" : _networkx, "numpy" : _numpy, "sparse" : _sparse}
+if _scipy_shortest_path is not None:
+    BACKENDS["scipy"] = _scipy
+
+# The results of the calibration: (nodes, density, fastest backend)
+CALIBRATION : List[Tuple[int, float, str]] = []
+
+
+def density(G : nx.Graph) -> float:
+    """
+    Return the density of a graph, i.e. the share of the pairs of nodes which are adjacent.
+
+    """
+    n = G.number_of_nodes()
+    return 2 * G.number_of_edges() / (n * (n - 1)) if n > 1 else 1.0
+
+
+def select(nodes : int, dens : float) -> str:
+    """
+    Return the backend expected to be the fastest for a graph.
+
+    :param nodes: The number of nodes.
+    :param dens: The density of the graph.
+    :return: The name of the backend.
+
+    """
+    available = [(n, d, name) for n, d, name in CALIBRATION if name in BACKENDS]
+    if len(available) > 0:
+        # The backend which was the fastest on the most similar graph
+        return min(available, key=lambda c: abs(math.log(c[0] / max(nodes, 1))) + abs(math.log(max(c[1], 1e-9) / max(dens, 1e-9))))[2]
+    if nodes < 300 or dens > 0.1:
+        return "numpy"
+    return "scipy" if "scipy" in BACKENDS else "sparse"
+
+
+def distance_matrix(G : nx.Graph, backend : str = "auto") -> np.ndarray:
+    """
+    Return the matrix of minimum distances between the nodes of a graph, in the
+    order of their ids.
+
+    :param G: The graph.
+    :param backend: The backend (see <BACKENDS>), or "auto" to select the fastest one.
+
+    """
+    if backend == "auto":
+        backend = select(G.number_of_nodes(), density(G))
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend}")
+    return BACKENDS[backend](G)
+
+
+def measure(G : nx.Graph, backend : str) -> Dict[str, Any]:
+    """
+    Measure the time and the peak memory needed by a backend on a graph.
+    The peak memory is measured in a second run, since tracing the memory slows it down.
+
+    """
+    start = time.perf_counter()
+    distance_matrix(G, backend)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        distance_matrix(G, backend)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"backend" : backend, "nodes" : G.number_of_nodes(), "edges" : G.number_of_edges(), "density" : density(G),
+            "time" : elapsed, "peak_memory" : peak}
+
+
+def benchmark(aisles : Sequence[int] = (5, 10, 20, 40), backends : Optional[Sequence[str]] = None, **layout : Any) -> List[Dict[str, Any]]:
+    """
+    Measure every backend on layouts with an increasing number of aisles.
+
+    :param aisles: The numbers of aisles.
+    :param backends: The backends (by default all those available).
+    :param layout: The other parameters of the layout (see generator.layout).
+    :return: The measures.
+
+    """
+    from .generator import layout as build
+    results = []
+    for n in aisles:
+        G, _ = build(aisles=n, **layout)
+        for backend in (backends or list(BACKENDS)):
+            results.append(measure(G, backend))
+    return results
+
+
+def calibrate(aisles : Sequence[int] = (5, 10, 20, 40), path : Optional[str] = None, **layout : Any) -> List[Dict[str, Any]]:
+    """
+    Benchmark the backends on this machine and use the results for the selection.
+
+    :param aisles: The numbers of aisles of the layouts measured.
+    :param path: A JSON file where to save the calibration (see <load_calibration>).
+    :return: The measures.
+
+    """
+    results = benchmark(aisles, **layout)
+    best : Dict[Tuple[int, float], Dict[str, Any]] = {}
+    for r in results:
+        key = (r["nodes"], r["density"])
+        if key not in best or r["time"] < best[key]["time"]:
+            best[key] = r
+    CALIBRATION[:] = [(n, d, r["backend"]) for (n, d), r in sorted(best.items())]
+    if path is not None:
+        with open(path, "w") as file:
+            json.dump(CALIBRATION, file)
+    return results
+
+
+def load_calibration(path : str) -> None:
+    """
+    Use for the selection a calibration saved by <calibrate>.
+
+    """
+    with open(path) as file:
+        CALIBRATION[:] = [(int(n), float(d), str(name)) for n, d, name in json.load(file)]
+
+
+if __name__ == '__main__':
+    for r in calibrate():
+        print(f"{r['backend']:<10} nodes {r['nodes']:>6}  density {r['density']:.4f}  {r['time']:8.3f}s  {r['peak_memory'] / 2**20:8.1f} MiB")
+    print("Selection:", CALIBRATION)
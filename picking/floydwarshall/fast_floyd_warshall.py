@@ -1,27 +1,34 @@
 import numpy as np
 
-def fast_floyd_warshall (A):
+def fast_floyd_warshall (A, inplace = False):
   """
   A must be a numpy matrix of distances.
   Thanks to numpy the execution of this algorithm is extremely fast.
-  
+  The result is computed on a copy of A, unless <inplace> is TRUE (then A
+  is updated and returned), using a single buffer for the candidate distances.
+
   """
+  if not inplace:
+    A = np.array(A)
   n, _ = A.shape
   np.fill_diagonal(A, 0)  # diagonal elements should be zero
-  
+
+  candidates = np.empty_like(A)
   for i in range(n):
-      A = np.minimum(A, A[i, :][np.newaxis, :] + A[:, i][:, np.newaxis])
-  
+      np.add(A[:, i][:, np.newaxis], A[i, :][np.newaxis, :], out=candidates)
+      np.minimum(A, candidates, out=A)
+
   return A
-  
-  
+
+
 if __name__ == '__main__':
   import itertools
-  
-  A = np.random.random_integers(1, 30, (4,4))
-  
+
+  n = 4
+  A = np.random.randint(1, 31, (n, n)).astype(float)
+
   for i, j in itertools.product(range(n), repeat = 2):
     A[i][j] = A[j][i]
-    
+
   print("Matrix: ", A)
   print("After algorithm :", fast_floyd_warshall(A))
@@ -1,16 +1,22 @@
 """
 %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
 This file contains the implementation of a warehouse for picking.
-Once defined the warehouse characteristics, the graph of possible paths (i.e., G) is instantiated
-and the matrix of minimum distances (i.e., distance_matrix) is calculated using Floyd-Warshall
-algorithm.
+Once defined the warehouse characteristics, the graph of possible paths is built by <layout>
+and the matrix of minimum distances is calculated by <minimum_distances>.
+The graph of the default warehouse (i.e., G), the positions of its nodes (i.e., pos) and its
+matrix of minimum distances (i.e., distance_matrix) are still available as attributes of the
+module, computed at their first access.
 Author: Mattia Neroni, Ph.D., Eng. (May 2021).
 %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
 """
+from typing import Any, Dict, List, Tuple
+
 import networkx as nx
-import networkx.algorithms.shortest_paths.dense as nxalg
+import numpy as np
 #import matplotlib.pyplot as plt
 
+from . import backends
+
 # Warehouse characteristics
 LOCATION_X = 1
 LOCATION_Y = 1
@@ -20,40 +26,119 @@ AISLE_SIZE = 3
 CROSS_AISLE_SIZE = 6
 LOCATIONS = 10
 
-# The graph instance
-G = nx.Graph()
-
-# Calculate cross points
-cross_points = [0]
-old = 0
-for _ in range(CROSS_AISLES + 1):
-    cross_points.append(old + LOCATIONS + 1)
-    old += LOCATIONS + 1
-
-# Calculate total nodes per side Y
-locations_per_longaisle = LOCATIONS * (CROSS_AISLES + 1) + CROSS_AISLES + 2
-
-# Populate the graph
-node_id = 0
-pos = dict()
-current_pos = [0, 0]
-for x in range(AISLES):
-    current_pos[1] = 0
-    for y in range(locations_per_longaisle):
-        G.add_node(node_id)
-        pos[node_id] = tuple(pos)
-        if y > 0:
-            weight = LOCATION_Y/2 + CROSS_AISLE_SIZE/2 if y in cross_points[1:-1] or (y - 1) in cross_points[1:-1] else LOCATION_Y
-            current_pos[1] += weight
-            G.add_edge(node_id, node_id - 1, weight=weight)
-        if x > 0 and y in cross_points:
-            G.add_edge(node_id, node_id - locations_per_longaisle, weight=LOCATION_X*2)
-        node_id += 1
-    current_pos[0] += LOCATION_X*2
-
-# Plot the graph
-#nx.draw(G, pos=pos, with_labels=True, font_weight='bold')
-#plt.show()
-
-# Set the distance matrix
-distance_matrix = nxalg.floyd_warshall_numpy(G)
+
+def _cross_points(cross_aisles : int = CROSS_AISLES, locations : int = LOCATIONS) -> List[int]:
+    """
+    Return the positions along a long aisle where it meets a cross aisle
+    (the first and the last are the front and the back of the warehouse).
+
+    :param cross_aisles: The number of cross aisles (front and back excluded).
+    :param locations: The number of storage locations in each block of a long aisle.
+
+    """
+    points = [0]
+    old = 0
+    for _ in range(cross_aisles + 1):
+        points.append(old + locations + 1)
+        old += locations + 1
+    return points
+
+
+def layout(location_x : float = LOCATION_X,
+           location_y : float = LOCATION_Y,
+           aisles : int = AISLES,
+           cross_aisles : int = CROSS_AISLES,
+           cross_aisle_size : float = CROSS_AISLE_SIZE,
+           locations : int = LOCATIONS
+           ) -> Tuple[nx.Graph, Dict[int, Tuple[float, float]]]:
+    """
+    Build the graph of a warehouse with parallel long aisles and <cross_aisles>
+    cross aisles. The nodes are numbered aisle after aisle, and node 0 (the front
+    of the first aisle) is the depot.
+
+    :param location_x: The width of a storage location.
+    :param location_y: The depth of a storage location.
+    :param aisles: The number of long aisles.
+    :param cross_aisles: The number of cross aisles (front and back excluded).
+    :param cross_aisle_size: The width of a cross aisle.
+    :param locations: The number of storage locations in each block of a long aisle.
+    :return: The graph and the position of each node.
+
+    """
+    G = nx.Graph()
+    points = _cross_points(cross_aisles, locations)
+
+    # Calculate total nodes per side Y
+    locations_per_longaisle = locations * (cross_aisles + 1) + cross_aisles + 2
+
+    # Populate the graph
+    node_id = 0
+    pos = dict()
+    current_pos = [0.0, 0.0]
+    for x in range(aisles):
+        current_pos[1] = 0.0
+        for y in range(locations_per_longaisle):
+            G.add_node(node_id)
+            if y > 0:
+                weight = location_y/2 + cross_aisle_size/2 if y in points[1:-1] or (y - 1) in points[1:-1] else location_y
+                current_pos[1] += weight
+                G.add_edge(node_id, node_id - 1, weight=weight)
+            pos[node_id] = tuple(current_pos)
+            if x > 0 and y in points:
+                G.add_edge(node_id, node_id - locations_per_longaisle, weight=location_x*2)
+            node_id += 1
+        current_pos[0] += location_x*2
+
+    return G, pos
+
+
+def storage_locations(aisles : int = AISLES, cross_aisles : int = CROSS_AISLES, locations : int = LOCATIONS) -> List[int]:
+    """
+    Return the nodes of a layout which are storage locations, i.e. all the
+    nodes except those on the cross aisles.
+
+    """
+    points = set(_cross_points(cross_aisles, locations))
+    locations_per_longaisle = locations * (cross_aisles + 1) + cross_aisles + 2
+    return [x * locations_per_longaisle + y for x in range(aisles) for y in range(locations_per_longaisle) if y not in points]
+
+
+def minimum_distances(G : nx.Graph, backend : str = "auto") -> np.ndarray:
+    """
+    Return the matrix of minimum distances between the nodes of a layout.
+
+    :param backend: The backend used (see backends.BACKENDS), by default the
+                    one expected to be the fastest for the size of the layout.
+
+    """
+    return backends.distance_matrix(G, backend)
+
+
+def __getattr__(name : str) -> Any:
+    """
+    The attributes of the previous versions of this module, i.e. the default warehouse,
+    which are computed at the first access (not at the import).
+
+    """
+    if name in ("G", "pos", "distance_matrix"):
+        G, pos = layout()
+        globals().update(G=G, pos=pos, distance_matrix=minimum_distances(G))
+    elif name == "cross_points":
+        globals()["cross_points"] = _cross_points()
+    elif name == "locations_per_longaisle":
+        globals()["locations_per_longaisle"] = LOCATIONS * (CROSS_AISLES + 1) + CROSS_AISLES + 2
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return globals()[name]
+
+
+if __name__ == '__main__':
+    # The graph instance
+    G, pos = layout()
+
+    # Plot the graph
+    #nx.draw(G, pos=pos, with_labels=True, font_weight='bold')
+    #plt.show()
+
+    # Set the distance matrix
+    print(minimum_distances(G))
@@ -0,0 +1,239 @@
+# The functions written in this file generate benchmark instances on
+# the warehouse layouts built by floydwarshall.generator, at the sizes
+# of the picking lists met in practice (from a few to 1000 picks).
+#
+# The popularity of the SKUs follows an ABC curve, the most popular
+# ones being stored closest to the depot, and the picks of each order
+# are clustered around a few locations.
+#
+# A family of instances (one layout, many orders) is saved in a single
+# compressed .npz file: the distance matrix, the node positions, and
+# the orders stored back to back with their offsets.
+#
+
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import json
+import numbers
+import numpy as np
+
+from .floydwarshall import generator
+
+
+# The default ABC curve: (share of the SKUs, share of the picks) of each class
+ABC : Tuple[Tuple[float, float], ...] = ((0.2, 0.8), (0.3, 0.15), (0.5, 0.05))
+
+
+class Instance:
+    """
+    An instance of this class is a family of picking lists on the same warehouse.
+    Iterating over it, or indexing it, returns the picking lists.
+
+    """
+    def __init__(self, distances : np.ndarray, orders : List[List[int]], positions : Optional[np.ndarray] = None, params : Optional[Dict[str, Any]] = None):
+        """
+        Initialize.
+
+        :param distances: The distance matrix (node 0 is the depot).
+        :param orders: The picking lists.
+        :param positions: The (x, y) coordinates of each node.
+        :param params: The parameters used to generate the instance.
+
+        """
+        self.distances = distances
+        self.orders = orders
+        self.positions = positions
+        self.params = params or {}
+
+    def __len__(self) -> int:
+        return len(self.orders)
+
+    def __iter__(self) -> Iterator[List[int]]:
+        return iter(self.orders)
+
+    def __getitem__(self, i : int) -> List[int]:
+        return self.orders[i]
+
+    @property
+    def sizes(self) -> List[int]:
+        return [len(order) for order in self.orders]
+
+    def save(self, path : str, dtype : Any = np.float32) -> None:
+        """
+        Save the instance in a compressed .npz file.
+
+        :param path: The file.
+        :param dtype: The type used to store the distances.
+
+        """
+        offsets = np.cumsum([0] + self.sizes, dtype=np.int64)
+        picks = np.fromiter((node for order in self.orders for node in order), dtype=np.int32, count=int(offsets[-1]))
+        arrays = {"distances" : np.asarray(self.distances, dtype=dtype), "picks" : picks, "offsets" : offsets,
+                  "params" : np.array(json.dumps(self.params, default=_plain))}
+        if self.positions is not None:
+            arrays["positions"] = np.asarray(self.positions, dtype=np.float32)
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path : str) -> "Instance":
+        """
+        Load an instance saved by <save>.
+
+        """
+        with np.load(path) as data:
+            picks, offsets = data["picks"].tolist(), data["offsets"].tolist()
+            orders = [picks[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+            positions = data["positions"] if "positions" in data.files else None
+            return cls(data["distances"], orders, positions, json.loads(str(data["params"])))
+
+
+def _plain(value : Any) -> Any:
+    """
+    Convert the numpy values of the parameters to python ones, for JSON.
+
+    """
+    if isinstance(value, (np.generic, np.ndarray)):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def popularity(locations : Sequence[int], distances : np.ndarray, abc : Sequence[Tuple[float, float]] = ABC) -> np.ndarray:
+    """
+    Return the probability to pick each storage location, following an ABC
+    curve: the SKUs of the first class are stored closest to the depot, those
+    of the second class right after, and so on.
+
+    :param locations: The storage locations.
+    :param distances: The distance matrix.
+    :param abc: (share of the SKUs, share of the picks) of each class.
+    :return: The probabilities, in the order of <locations>.
+
+    """
+    order = np.argsort(distances[0, np.asarray(locations)], kind="stable")
+    p = np.empty(len(locations))
+    start = 0
+    for k, (skus, picks) in enumerate(abc):
+        end = len(locations) if k == len(abc) - 1 else min(len(locations), start + int(round(skus * len(locations))))
+        if end > start:
+            p[order[start:end]] = picks / (end - start)
+        start = end
+    return p / p.sum()
+
+
+def _order_size(size : Union[int, Tuple[int, int]], rng : np.random.Generator) -> int:
+    """
+    Return the size of an order: <size> itself, or a number drawn log-uniformly
+    in the range <size> = (min, max).
+
+    """
+    if isinstance(size, numbers.Integral):
+        return int(size)
+    low, high = size
+    return int(round(np.exp(rng.uniform(np.log(low), np.log(high + 1))) - 0.5)) if high > low else int(low)
+
+
+def warehouse(**layout : Any) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Build a warehouse layout.
+
+    :param layout: The parameters of the layout (see floydwarshall.generator.layout).
+    :return: The distance matrix, the (x, y) coordinates of the nodes, and the storage locations.
+
+    """
+    G, pos = generator.layout(**layout)
+    distances = generator.minimum_distances(G)
+    positions = np.array([pos[i] for i in range(len(pos))])
+    locations = np.array(generator.storage_locations(**{k : layout[k] for k in ("aisles", "cross_aisles", "locations") if k in layout}))
+    return distances, positions, locations
+
+
+def sample_orders(distances : np.ndarray,
+                  locations : np.ndarray,
+                  orders : int,
+                  size : Union[int, Tuple[int, int]],
+                  rng : np.random.Generator,
+                  abc : Sequence[Tuple[float, float]] = ABC,
+                  clusters : int = 3,
+                  clustering : float = 0.5,
+                  spread : float = 10.0) -> List[List[int]]:
+    """
+    Draw orders on the storage locations of a warehouse.
+    The parameters are the same of <generate>.
+
+    :return: The picking lists.
+
+    """
+    p = popularity(locations, distances, abc)
+    picking_lists : List[List[int]] = []
+    for _ in range(orders):
+        n = _order_size(size, rng)
+        if n > len(locations):
+            raise ValueError(f"An order of {n} picks does not fit in a layout with {len(locations)} storage locations")
+
+        # The picks are attracted by a few (popular) locations
+        weights = p
+        if clusters > 0 and clustering > 0:
+            centres = rng.choice(locations, size=clusters, p=p)
+            kernel = np.exp(-distances[np.ix_(centres, locations)] / spread).sum(axis=0)
+            weights = (1 - clustering) * p + clustering * p * kernel / (p * kernel).sum()
+            weights /= weights.sum()
+
+        picking_lists.append(rng.choice(locations, size=n, replace=False, p=weights).tolist())
+    return picking_lists
+
+
+def generate(orders : int = 100,
+             size : Union[int, Tuple[int, int]] = (5, 50),
+             abc : Sequence[Tuple[float, float]] = ABC,
+             clusters : int = 3,
+             clustering : float = 0.5,
+             spread : float = 10.0,
+             seed : Any = None,
+             **layout : Any) -> Instance:
+    """
+    Generate a family of orders on a warehouse layout.
+
+    :param orders: The number of orders.
+    :param size: The number of picks per order, or a range (min, max) in which it is drawn log-uniformly.
+    :param abc: (share of the SKUs, share of the picks) of each popularity class.
+    :param clusters: The number of locations around which the picks of an order are clustered.
+    :param clustering: The share of the picks attracted by the clusters (0 for no clustering).
+    :param spread: The distance within which a location is close to a cluster.
+    :param seed: The seed (an int or a numpy SeedSequence).
+    :param layout: The parameters of the layout (see floydwarshall.generator.layout).
+    :return: The instance.
+
+    """
+    rng = np.random.default_rng(seed)
+    distances, positions, locations = warehouse(**layout)
+    picking_lists = sample_orders(distances, locations, orders, size, rng, abc, clusters, clustering, spread)
+    size = int(size) if isinstance(size, numbers.Integral) else [int(s) for s in size]
+    params = dict(layout, orders=orders, size=size, abc=[list(c) for c in abc], clusters=clusters, clustering=clustering, spread=spread)
+    return Instance(distances, picking_lists, positions, params)
+
+
+def family(sizes : Sequence[int] = (5, 10, 25, 50, 100, 300, 1000), orders : int = 10, seed : Any = None, **kwargs : Any) -> Instance:
+    """
+    Generate a family of orders of increasing sizes, <orders> per size, on a layout
+    large enough for the biggest one (unless the number of aisles is given).
+
+    :param sizes: The numbers of picks.
+    :param orders: The number of orders per size.
+    :param seed: The seed (an int or a numpy SeedSequence).
+    :param kwargs: The other parameters of <generate>.
+    :return: The instance.
+
+    """
+    options = {k : kwargs.pop(k) for k in ("abc", "clusters", "clustering", "spread") if k in kwargs}
+    if "aisles" not in kwargs:
+        per_aisle = (kwargs.get("cross_aisles", generator.CROSS_AISLES) + 1) * kwargs.get("locations", generator.LOCATIONS)
+        kwargs["aisles"] = max(generator.AISLES, -(-int(1.2 * max(sizes)) // per_aisle))
+
+    distances, positions, locations = warehouse(**kwargs)
+    picking_lists : List[List[int]] = []
+    for n, s in zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes))):
+        picking_lists.extend(sample_orders(distances, locations, orders, n, np.random.default_rng(s), **options))
+
+    options["abc"] = [list(c) for c in options.get("abc", ABC)]
+    params = dict(kwargs, **options, orders=orders * len(sizes), size=[int(s) for s in sizes])
+    return Instance(distances, picking_lists, positions, params)
@@ -0,0 +1,373 @@
+# The class Islands written in this file runs a swarm-based algorithm
+# (i.e., Mattia_PSO, SpeedPSO, Zhou_PSO, Zhong_PSO) with an island
+# model: the swarm is split across several processes, each island
+# evolves independently, and every <interval> iterations the best
+# solutions found are exchanged through pipes.
+#
+# The class Colonies does the same for the AntColony: several colonies
+# build solutions in parallel and every <interval> iterations their
+# pheromone matrices, kept in shared memory, are merged.
+#
+
+from typing import Any, List, Optional, Tuple, cast
+from multiprocessing import Pipe, Process
+
+import copy
+import math
+import os
+import time
+import numpy as np
+
+from .utils import share_solvers, load_solver, seed_solver, SharedMatrix
+from .algorithms.common import History
+
+
+def _iterations_attribute(solver : Any) -> str:
+    """
+    Return the name of the attribute which defines the number of
+    iterations of a solver.
+
+    """
+    return "era" if hasattr(solver, "era") else "max_iter"
+
+
+def _immigrate(solver : Any, tour : List[int], cost : int) -> None:
+    """
+    Replace the personal best of the worst particle of the swarm
+    with a solution coming from another island.
+
+    :param solver: The solver which receives the solution.
+    :param tour: The solution.
+    :param cost: The cost of the solution.
+
+    """
+    worst = max(solver.swarm, key=lambda p: p.vpbest)
+    if cost < worst.vpbest:
+        worst.pbest, worst.vpbest = list(tour), cost
+
+
+def _island_worker(blob : bytes, seed : np.random.SeedSequence, conn : Any) -> None:
+    solver = load_solver(blob)
+    seed_solver(solver, seed)
+    solver.reset()
+    finalsearch = getattr(solver, "finalsearch", False)
+    while True:
+        message = conn.recv()
+        if message is None:
+            break
+        migrants, last = message
+        for tour, cost in migrants:
+            _immigrate(solver, tour, cost)
+        # The final search (if any) is only done at the end of the last epoch
+        if finalsearch is True:
+            solver.finalsearch = last
+        best, best_c = solver.run()
+        conn.send((list(best), best_c, solver.history, solver.computations))
+    conn.close()
+
+
+class Islands:
+    """
+    An instance of this class runs a swarm-based solver with an island model.
+    The swarm of the solver is split into <islands> sub-swarms, each one
+    running in its own process. Every <interval> iterations the islands
+    send their best solution to the others, which replace the personal
+    best of their worst particle with it.
+
+    Like the solvers, the instance has run, reset, history, computations and
+    computational_time; it has no run_iter, termination criteria, stats or
+    warm_start, so it cannot be used in a Portfolio or a Benchmark.
+
+    """
+    def __init__(self, solver : Any, islands : Optional[int] = None, interval : int = 50, migrants : int = 1) -> None:
+        """
+        Initialize.
+
+        :param solver: The swarm-based solver (its number of iterations and of
+                        iterations with no improvement are those of the whole run).
+        :param islands: The number of islands (by default the number of cores).
+        :param interval: The number of iterations between two migrations.
+        :param migrants: The number of best solutions received by each island.
+
+        :attr history: The history of the best solutions found.
+        :attr computations: The number of solutions explored before finding the best.
+        :attr computational_time: The time needed.
+
+        """
+        self.solver = solver
+        self.islands = min(islands or os.cpu_count() or 1, len(solver.swarm))
+        self.interval = interval
+        self.migrants = migrants
+
+        self.history : History = History()
+        self.computations : int = 0
+        self.computational_time : float = 0.0
+
+    def reset(self) -> None:
+        self.solver.reset()
+        self.history = History()
+        self.computations = 0
+        self.computational_time = 0.0
+
+    def _split(self) -> List[Any]:
+        """
+        Return a copy of the solver for each island, with its share of the swarm.
+
+        """
+        attribute = _iterations_attribute(self.solver)
+        parts = []
+        for k in range(self.islands):
+            island = copy.copy(self.solver)
+            island.swarm = self.solver.swarm[k::self.islands]
+            if hasattr(island, "particles"):
+                island.particles = len(island.swarm)
+            setattr(island, attribute, self.interval)
+            parts.append(island)
+        return parts
+
+    def run(self, verbose : bool = False) -> Tuple[List[int], int]:
+        """
+        This method represents the execution of the algorithm.
+
+        :param verbose: If TRUE the best is logged after every migration.
+        :return: The best solution found and its cost.
+
+        """
+        start = time.time()
+        iterations = getattr(self.solver, _iterations_attribute(self.solver))
+        epochs = max(1, math.ceil(iterations / self.interval))
+        max_noimp = self.solver.max_noimp
+
+        blobs, shared = share_solvers(self._split())
+        pipes = [Pipe() for _ in blobs]
+        seeds = self.solver.rng.spawn(len(blobs))
+        processes = [Process(target=_island_worker, args=(blob, seed, child), daemon=True)
+                     for blob, seed, (_, child) in zip(blobs, seeds, pipes)]
+
+        best : List[int] = []
+        vbest = cast(int, float("inf"))
+        migrants : List[Tuple[List[int], int]] = []
+        self.history = History(max_points=getattr(self.solver, "history_points", None))
+        noimp = 0
+        try:
+            for p in processes:
+                p.start()
+
+            for epoch in range(epochs):
+                last = epoch == epochs - 1 or noimp + self.interval > max_noimp
+                for parent, _ in pipes:
+                    parent.send((migrants, last))
+                results = [parent.recv() for parent, _ in pipes]
+
+                # Merge the histories of the islands and update the best
+                length = max(len(h) for _, _, h, _ in results)
+                for i in range(length):
+                    self.history.append(min(h[min(i, len(h) - 1)] for _, _, h, _ in results))
+
+                results.sort(key=lambda r: r[1])
+                if results[0][1] < vbest:
+                    best, vbest = results[0][0], results[0][1]
+                    self.computations = sum(r[3] for r in results)
+                    noimp = 0
+                else:
+                    noimp += self.interval
+
+                migrants = [(tour, cost) for tour, cost, _, _ in results[:self.migrants]]
+
+                if verbose is True:
+                    print('Epoch', epoch, ' Best: ', vbest)
+
+                if last:
+                    break
+        finally:
+            for parent, _ in pipes:
+                try:
+                    parent.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+            for p in processes:
+                p.join()
+            for s in shared:
+                s.release()
+
+        self.computational_time = time.time() - start
+
+        return best, vbest
+
+
+
+def _export_pheromone(colony : Any, out : np.ndarray) -> None:
+    """
+    Copy the pheromone of a colony into an array, whose rows and
+    columns follow the order of <colony.nodes>.
+
+    """
+    pheromone = colony.pheromone
+    for a, i in enumerate(colony.nodes):
+        row = pheromone[i]
+        out[a] = [row[j] for j in colony.nodes]
+
+
+def _import_pheromone(colony : Any, matrix : np.ndarray) -> None:
+    """
+    Set the pheromone of a colony from an array, whose rows and
+    columns follow the order of <colony.nodes>.
+
+    """
+    values = matrix.tolist()
+    for a, i in enumerate(colony.nodes):
+        colony.pheromone[i] = dict(zip(colony.nodes, values[a]))
+
+
+def _colony_worker(blob : bytes, seed : np.random.SeedSequence, conn : Any, slots : Tuple[str, Tuple[int, ...], str], k : int) -> None:
+    colony = load_solver(blob)
+    seed_solver(colony, seed)
+    colony.reset()
+    table = SharedMatrix(*slots)
+    while True:
+        message = conn.recv()
+        if message is None:
+            break
+        merged, migrant = message
+
+        # Read the merged pheromone and/or reinforce the trails of the global best
+        if merged is True:
+            _import_pheromone(colony, table.array[-1])
+        if migrant is not None and migrant[1] < colony.vbest:
+            colony.best, colony.vbest = list(migrant[0]), migrant[1]
+            colony._update()
+
+        colony.run()
+        _export_pheromone(colony, table.array[k])
+        # Every run starts a new history, so it only covers this epoch
+        conn.send((list(colony.best), colony.vbest, colony.history, colony.computations))
+    table.release()
+    conn.close()
+
+
+class Colonies:
+    """
+    An instance of this class runs several ant colonies in parallel on the same
+    picking list, each one in its own process. Every <interval> iterations the
+    colonies stop and share what they learnt:
+
+        - "average": the pheromone matrices (kept in shared memory) are averaged
+                    and every colony continues from the merged trails;
+        - "best": the global best is broadcast and every colony reinforces its
+                    trails on it.
+
+    Like the solvers, the instance has run, reset, history, computations and
+    computational_time; it has no run_iter, termination criteria, stats or
+    warm_start, so it cannot be used in a Portfolio or a Benchmark.
+
+    """
+    def __init__(self, colony : Any, colonies : Optional[int] = None, interval : int = 100, merge : str = "average") -> None:
+        """
+        Initialize.
+
+        :param colony: The AntColony (its number of iterations and of iterations
+                        with no improvement are those of the whole run).
+        :param colonies: The number of colonies (by default the number of cores).
+        :param interval: The number of iterations between two merges.
+        :param merge: How the colonies share what they learnt ("average" or "best").
+
+        :attr history: The history of the best solutions found.
+        :attr computations: The number of iterations needed to find the best.
+        :attr computational_time: The time needed.
+
+        """
+        if merge not in ("average", "best"):
+            raise ValueError(f"Unknown merge {merge}")
+        self.colony = colony
+        self.colonies = colonies or os.cpu_count() or 1
+        self.interval = interval
+        self.merge = merge
+
+        self.history : History = History()
+        self.computations : int = 0
+        self.computational_time : float = 0.0
+
+    def reset(self) -> None:
+        self.colony.reset()
+        self.history = History()
+        self.computations = 0
+        self.computational_time = 0.0
+
+    def run(self, verbose : bool = False) -> Tuple[List[int], int]:
+        """
+        This method represents the execution of the algorithm.
+
+        :param verbose: If TRUE the best is logged after every merge.
+        :return: The best solution found and its cost.
+
+        """
+        start = time.time()
+        epochs = max(1, math.ceil(self.colony.max_iter / self.interval))
+        max_noimp = self.colony.max_noimp
+
+        template = copy.copy(self.colony)
+        template.max_iter = self.interval
+        blobs, shared = share_solvers([template])
+
+        # One slot per colony, plus the merged pheromone
+        size = len(self.colony.nodes)
+        table = SharedMatrix.create(np.zeros((self.colonies + 1, size, size)))
+        shared.append(table)
+
+        pipes = [Pipe() for _ in range(self.colonies)]
+        seeds = self.colony.rng.spawn(self.colonies)
+        processes = [Process(target=_colony_worker, args=(blobs[0], seeds[k], child, (table.name, table.shape, table.dtype), k), daemon=True)
+                     for k, (_, child) in enumerate(pipes)]
+
+        best : List[int] = []
+        vbest = cast(int, float("inf"))
+        message : Tuple[bool, Optional[Tuple[List[int], int]]] = (False, None)
+        self.history = History(max_points=self.colony.history_points)
+        noimp = 0
+        try:
+            for p in processes:
+                p.start()
+
+            for epoch in range(epochs):
+                for parent, _ in pipes:
+                    parent.send(message)
+                results = [parent.recv() for parent, _ in pipes]
+
+                # Merge the histories of the colonies and update the best
+                length = max(len(h) for _, _, h, _ in results)
+                for i in range(length):
+                    self.history.append(min(h[min(i, len(h) - 1)] for _, _, h, _ in results if len(h) > 0))
+
+                results.sort(key=lambda r: r[1])
+                if results[0][1] < vbest:
+                    best, vbest = results[0][0], results[0][1]
+                    self.computations = epoch * self.interval + results[0][3]
+                    noimp = 0
+                else:
+                    noimp += self.interval
+
+                if self.merge == "average":
+                    table.array[-1] = table.array[:-1].mean(axis=0)
+                    message = (True, None)
+                else:
+                    message = (False, (best, vbest))
+
+                if verbose is True:
+                    print('Epoch', epoch, ' Best: ', vbest)
+
+                if noimp > max_noimp:
+                    break
+        finally:
+            for parent, _ in pipes:
+                try:
+                    parent.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+            for p in processes:
+                p.join()
+            for s in shared:
+                s.release()
+
+        self.computational_time = time.time() - start
+
+        return best, vbest
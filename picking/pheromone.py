@@ -0,0 +1,124 @@
+# The class PheromoneStore written in this file keeps a pheromone trail
+# on every pair of locations of a warehouse, learned from the best tours
+# of the orders already routed, so that a new AntColony starts from the
+# trails of the whole warehouse instead of a uniform <pher_init>.
+#
+# The trails are a float32 matrix which can live in a .npy file mapped in
+# memory: one process updates it (deposit and decay), while the worker
+# processes open it read-only and share the same pages.
+#
+
+from typing import Any, Optional, Sequence
+
+import os
+import numpy as np
+
+
+class PheromoneStore:
+    """
+    An instance of this class is the pheromone of a warehouse, e.g.
+
+        store = PheromoneStore.create("warehouse.pher", len(distances))
+        colony = AntColony(distances, picking_list, store=store)
+        tour, cost = colony.run()
+        store.update(tour, cost)
+        store.decay()
+
+    and in a worker process:
+
+        store = PheromoneStore.open("warehouse.pher")
+
+    """
+    def __init__(self, trails : np.ndarray, pher_init : float = 0.1, ro : float = 0.99, Q : float = 2.0):
+        """
+        Initialize.
+
+        :param trails: The matrix of the trails (a numpy array or a memory map).
+        :param pher_init: The pheromone of the arcs never used.
+        :param ro: The share of the learned pheromone kept at every decay.
+        :param Q: The pheromone deposited by a tour (shared by its arcs in proportion to 1 / cost).
+
+        """
+        self.trails = trails
+        self.pher_init = pher_init
+        self.ro = ro
+        self.Q = Q
+
+    @classmethod
+    def create(cls, path : Optional[str], size : int, pher_init : float = 0.1, **kwargs : Any) -> "PheromoneStore":
+        """
+        Create a new store, in memory or in a file (which is overwritten).
+
+        :param path: The file (None to keep the trails in memory).
+        :param size: The number of locations (origin included).
+        :param pher_init: The initial pheromone.
+        :return: The store.
+
+        """
+        if path is None:
+            trails = np.full((size, size), pher_init, dtype=np.float32)
+        else:
+            trails = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(size, size))
+            trails[...] = pher_init
+        np.fill_diagonal(trails, 0)
+        return cls(trails, pher_init, **kwargs)
+
+    @classmethod
+    def open(cls, path : str, readonly : bool = True, **kwargs : Any) -> "PheromoneStore":
+        """
+        Open a store saved in a file, mapping it in memory.
+
+        :param path: The file.
+        :param readonly: If TRUE the trails cannot be updated (e.g., in the worker processes).
+        :return: The store.
+
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        return cls(np.load(path, mmap_mode="r" if readonly else "r+"), **kwargs)
+
+    def __len__(self) -> int:
+        return self.trails.shape[0]
+
+    def update(self, tour : Sequence[int], cost : float) -> None:
+        """
+        Deposit the pheromone on the arcs of a tour (starting and finishing in the origin).
+
+        :param tour: The tour.
+        :param cost: The cost of the tour.
+
+        """
+        if not self.trails.flags.writeable:
+            raise ValueError("The store is read-only")
+        if len(tour) == 0:
+            return
+        nodes = np.fromiter(tour, dtype=np.intp, count=len(tour))
+        np.add.at(self.trails, (np.concatenate(([0], nodes)), np.concatenate((nodes, [0]))), self.Q / max(cost, 1e-9))
+
+    def decay(self, ro : Optional[float] = None) -> None:
+        """
+        Evaporate the pheromone learned, i.e. move the trails towards <pher_init>.
+
+        :param ro: The share of the learned pheromone kept (by default <ro>).
+
+        """
+        ro = self.ro if ro is None else ro
+        self.trails -= self.pher_init
+        self.trails *= ro
+        self.trails += self.pher_init
+        np.fill_diagonal(self.trails, 0)
+
+    def submatrix(self, nodes : Sequence[int]) -> np.ndarray:
+        """
+        Return the trails between some nodes, as a float64 array.
+
+        """
+        return self.trails[np.ix_(nodes, nodes)].astype(np.float64)
+
+    def flush(self) -> None:
+        """
+        Write the trails to the file (if they are mapped in memory).
+
+        """
+        if isinstance(self.trails, np.memmap):
+            self.trails.flush()
@@ -0,0 +1,189 @@
+# The class Portfolio written in this file runs several algorithms
+# on the same picking list at the same time, each in its own process,
+# and returns the best solution found within a deadline.
+#
+# The processes share the incumbent best solution: every solver which
+# restarts before the deadline is warm-started from it, and as soon as
+# one of them reaches the target cost, or the deadline expires, all of
+# them are asked to stop, and every solver interrupts its current run.
+#
+
+from typing import Any, Callable, List, Optional, Tuple
+from multiprocessing import Array, Event, Lock, Process, Value
+
+import time
+import numpy as np
+
+from .utils import share_solvers, load_solver, seed_solver
+
+
+class Incumbent:
+    """
+    The best solution found so far by a group of processes, kept in shared memory.
+
+    """
+    def __init__(self, size : int):
+        """
+        Initialize.
+
+        :param size: The length of the picking list.
+
+        :attr lock: The lock protecting the incumbent.
+        :attr cost: The cost of the incumbent.
+        :attr tour: The incumbent (in its first <length> elements).
+        :attr length: The length of the incumbent.
+        :attr owner: The index of the solver which found the incumbent (-1 if none).
+
+        """
+        self.lock = Lock()
+        self.cost = Value("d", float("inf"), lock=False)
+        self.tour = Array("q", size, lock=False)
+        self.length = Value("i", 0, lock=False)
+        self.owner = Value("i", -1, lock=False)
+
+    def offer(self, tour : List[int], cost : float, owner : int) -> bool:
+        """
+        Replace the incumbent if the given solution is better.
+
+        :return: TRUE if the incumbent has been replaced.
+
+        """
+        with self.lock:
+            if cost < self.cost.value:
+                self.cost.value = cost
+                self.tour[:len(tour)] = list(tour)
+                self.length.value = len(tour)
+                self.owner.value = owner
+                return True
+        return False
+
+    def get(self) -> Tuple[List[int], float, int]:
+        """
+        Return the incumbent, its cost and the index of the solver which found it
+        (an empty tour, an infinite cost and -1 if no solution has been offered).
+
+        """
+        # A process terminated while offering a solution may never release the lock
+        locked = self.lock.acquire(timeout=1.0)
+        try:
+            if self.owner.value < 0:
+                return [], float("inf"), -1
+            return list(self.tour[:self.length.value]), self.cost.value, self.owner.value
+        finally:
+            if locked:
+                self.lock.release()
+
+
+def _portfolio_worker(blob : bytes, index : int, seed : np.random.SeedSequence, incumbent : Incumbent, stop : Any, deadline : float, target_cost : Optional[float]) -> None:
+    solver = load_solver(blob)
+    seed_solver(solver, seed)
+    while not stop.is_set() and time.time() < deadline:
+        solver.reset()
+        # A restart begins from the best solution found by the whole portfolio
+        if incumbent.owner.value >= 0 and hasattr(solver, "warm_start"):
+            tour, _, _ = incumbent.get()
+            if len(tour) > 0:
+                solver.warm_start([tour])
+        for _, _, best, best_c in solver.run_iter(time_limit=deadline - time.time(), target_cost=target_cost, cancel_event=stop):
+            # Every improvement is published as soon as it is found
+            if best_c < incumbent.cost.value:
+                incumbent.offer(best, best_c, index)
+            if target_cost is not None and best_c <= target_cost:
+                stop.set()
+
+
+def _picking_list_of(solver : Any) -> List[int]:
+    """
+    Return the picking list of a solver.
+
+    """
+    if hasattr(solver, "picking_list"):
+        return solver.picking_list
+    if hasattr(solver, "problem"):
+        return list(solver.problem.picking_list)
+    return solver.particle_data["picking_list"]
+
+
+class Portfolio:
+    """
+    An instance of this class runs a portfolio of solvers on the same picking list
+    concurrently. Every process restarts its solver, warm-started from the incumbent
+    of the portfolio, until the deadline expires or any of them reaches the target
+    cost: the runs are bounded by the same deadline and cancelled as soon as the
+    portfolio stops.
+
+    """
+    def __init__(self, solvers : List[Any], grace : float = 1.0, callback : Optional[Callable[[List[int], float, str], None]] = None,
+                 seed : Any = None):
+        """
+        Initialize.
+
+        :param solvers: The solvers (all on the same picking list).
+        :param grace: The seconds given to the processes to stop before being terminated.
+        :param callback: A function called as callback(best, cost, alg) when the portfolio ends.
+        :param seed: The root seed of the solvers (an int or a numpy SeedSequence; by default fresh entropy).
+
+        :attr best: The best solution found.
+        :attr vbest: The cost of the best solution.
+        :attr winner: The name of the algorithm which found the best.
+        :attr seed_sequence: The SeedSequence from which the seed of every solver is spawned.
+        :attr computational_time: The time needed.
+
+        """
+        if len(solvers) == 0:
+            raise ValueError("A portfolio needs at least one solver")
+        self.solvers = solvers
+        self.grace = grace
+        self.callback = callback
+        self.seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+
+        self.best : List[int] = []
+        self.vbest : float = float("inf")
+        self.winner : Optional[str] = None
+        self.computational_time : float = 0.0
+
+    def __call__(self, time_limit : float, target_cost : Optional[float] = None) -> Tuple[List[int], float]:
+        """
+        Run the portfolio.
+
+        :param time_limit: The seconds available.
+        :param target_cost: A cost which, if reached, stops the portfolio before the deadline.
+        :return: The best solution found and its cost (an empty tour and an infinite cost if
+                no solver found a solution in time).
+
+        """
+        start = time.time()
+        incumbent = Incumbent(len(_picking_list_of(self.solvers[0])))
+        stop = Event()
+
+        blobs, shared = share_solvers(self.solvers)
+        seeds = self.seed_sequence.spawn(len(blobs))
+        processes = [Process(target=_portfolio_worker, args=(blob, index, seed, incumbent, stop, start + time_limit, target_cost), daemon=True)
+                     for index, (blob, seed) in enumerate(zip(blobs, seeds))]
+        try:
+            for p in processes:
+                p.start()
+
+            stop.wait(max(0.0, time_limit - (time.time() - start)))
+            stop.set()
+
+            deadline = time.time() + self.grace
+            for p in processes:
+                p.join(max(0.0, deadline - time.time()))
+            for p in processes:
+                if p.is_alive():
+                    p.terminate()
+                    p.join()
+        finally:
+            for s in shared:
+                s.release()
+
+        best, vbest, owner = incumbent.get()
+        self.best, self.vbest = best, vbest
+        self.winner = self.solvers[owner].__class__.__name__ if owner >= 0 else None
+        self.computational_time = time.time() - start
+
+        if self.callback is not None:
+            self.callback(self.best, self.vbest, self.winner)
+
+        return self.best, self.vbest
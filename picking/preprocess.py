@@ -0,0 +1,95 @@
+# The class Reduction written in this file shrinks a picking list before
+# it is solved: the lines of the order on the same storage location, and
+# the locations at zero distance from each other (e.g., the two faces of
+# an aisle collapsed by the generator of the layouts), become a single
+# node. The reduced picking list is solved by any algorithm, and its tour
+# is expanded back to the original locations and lines.
+#
+# Since the distances are minimum distances, two locations at zero
+# distance have the same distance from every other location, so the
+# expanded tour has exactly the cost of the reduced one.
+#
+
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from .algorithms.common import submatrix
+
+
+class Reduction:
+    """
+    An instance of this class is the reduction of a picking list, e.g.
+
+        reduction = Reduction(picking_list, distances)
+        tour, cost = AntColony(distances, reduction.picking_list).run()
+        tour = reduction.expand(tour)
+        lines = reduction.line_order(tour)
+
+    """
+    def __init__(self, picking_list : Sequence[int], distances : Any, tolerance : float = 0.0):
+        """
+        Initialize.
+
+        :param picking_list: The locations of the lines of the order (duplicates allowed).
+        :param distances: The distance matrix.
+        :param tolerance: The maximum distance between two locations collapsed (0 to keep the
+                        cost of the tours exact).
+
+        :attr lines: The original picking list.
+        :attr groups: The locations represented by each node of the reduced picking list (the
+                    origin 0 represents the locations at zero distance from it).
+        :attr picking_list: The reduced picking list.
+
+        """
+        self.lines = list(picking_list)
+        self.tolerance = tolerance
+
+        nodes = [0] + [node for node in dict.fromkeys(self.lines) if node != 0]
+        matrix = submatrix(nodes, distances)
+        close = (matrix <= tolerance) & (matrix.T <= tolerance)
+
+        # The clusters of close locations (union-find, the root is the first of the cluster)
+        parent = list(range(len(nodes)))
+
+        def find(i : int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for i, j in zip(*np.nonzero(np.triu(close, 1))):
+            a, b = find(int(i)), find(int(j))
+            if a != b:
+                parent[max(a, b)] = min(a, b)
+
+        self.groups : Dict[int, List[int]] = {}
+        for i, node in enumerate(nodes):
+            self.groups.setdefault(nodes[find(i)], []).append(node)
+        self.picking_list : List[int] = [node for node in self.groups if node != 0]
+
+    def __len__(self) -> int:
+        return len(self.picking_list)
+
+    def expand(self, tour : Sequence[int]) -> List[int]:
+        """
+        Return the tour of the original locations (each visited once), given the tour of
+        the reduced picking list. The locations at zero distance from the origin are
+        visited first.
+
+        """
+        expanded = list(self.groups[0][1:])
+        for node in tour:
+            expanded.extend(self.groups[node])
+        return expanded
+
+    def line_order(self, tour : Sequence[int]) -> List[int]:
+        """
+        Return the indexes of the lines of the original picking list in the order in which
+        they are picked, given the expanded tour.
+
+        """
+        lines : Dict[int, List[int]] = {}
+        for index, node in enumerate(self.lines):
+            lines.setdefault(node, []).append(index)
+        return [index for node in [0] + list(tour) for index in lines.get(node, ())]
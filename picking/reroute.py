@@ -0,0 +1,150 @@
+# The functions written in this file update the tour of an order which
+# is already being picked, when lines are added to it (e.g., a rush line)
+# or removed from it, instead of solving the order again from scratch.
+#
+# The locations already visited are never moved: the removed locations
+# are dropped and the added ones are inserted where they cost the least
+# (both with delta costing), then a short local search, bounded in time
+# and in number of trials, improves only the part of the tour still to
+# be walked, by means of the operators of the algorithms (the 2-Opt of
+# Mattia_PSO and the swap / insert / inverse of Zhong_PSO).
+#
+
+from typing import Any, Collection, List, Optional, Sequence, Tuple
+
+import time
+
+from .algorithms.common import RandomStream
+from .algorithms.pso import _two_opt, _compute_distance
+from .algorithms.zhong import Particle as _Zhong
+from .batch import _cost
+
+
+def remove_nodes(tour : List[int], position : int, removed : Collection[int], distances : Any) -> Tuple[List[int], float]:
+    """
+    Drop from the part of the tour still to be walked the removed locations.
+
+    :param tour: The tour.
+    :param position: The number of locations of the tour already visited.
+    :param removed: The locations removed from the order.
+    :param distances: The distance matrix.
+    :return: The new tour and the variation of its cost.
+
+    """
+    new_tour, delta = list(tour[:position]), 0.0
+    for k in range(position, len(tour)):
+        node = tour[k]
+        if node not in removed:
+            new_tour.append(node)
+            continue
+        prev = new_tour[-1] if len(new_tour) > 0 else 0
+        succ = tour[k + 1] if k + 1 < len(tour) else 0
+        delta += distances[prev][succ] - distances[prev][node] - distances[node][succ]
+    return new_tour, delta
+
+
+def insert_nodes(tour : List[int], position : int, added : Sequence[int], distances : Any) -> Tuple[List[int], float]:
+    """
+    Insert the added locations in the part of the tour still to be walked, each one
+    where it increases the cost the least (cheapest insertion).
+
+    :param tour: The tour.
+    :param position: The number of locations of the tour already visited.
+    :param added: The locations added to the order (those already in the tour are ignored).
+    :param distances: The distance matrix.
+    :return: The new tour and the variation of its cost.
+
+    """
+    tour, delta = list(tour), 0.0
+    present = set(tour)
+    for node in added:
+        if node == 0 or node in present:
+            continue
+        best_pos, best_delta = len(tour), float("inf")
+        for pos in range(position, len(tour) + 1):
+            prev = tour[pos - 1] if pos > 0 else 0
+            succ = tour[pos] if pos < len(tour) else 0
+            d = distances[prev][node] + distances[node][succ] - distances[prev][succ]
+            if d < best_delta:
+                best_pos, best_delta = pos, d
+        tour.insert(best_pos, node)
+        present.add(node)
+        delta += best_delta
+    return tour, delta
+
+
+def improve_suffix(tour : List[int], position : int, distances : Any, cost : Optional[float] = None, trials : int = 200,
+                   time_limit : Optional[float] = 0.005, rng : Any = None) -> Tuple[List[int], float]:
+    """
+    Improve the part of the tour still to be walked with random moves (2-Opt, swap,
+    insert and inverse), accepting only the improving ones.
+
+    :param tour: The tour.
+    :param position: The number of locations of the tour already visited.
+    :param distances: The distance matrix.
+    :param cost: The cost of the tour (computed if not given).
+    :param trials: The maximum number of moves tried.
+    :param time_limit: The maximum seconds of the search (None for no limit).
+    :param rng: The random stream, or a seed for it.
+    :return: The improved tour and its cost.
+
+    """
+    cost = _cost(tour, distances) if cost is None else cost
+    if len(tour) - position < 2:
+        return list(tour), cost
+
+    rng = RandomStream.create(rng)
+    deadline = time.time() + time_limit if time_limit is not None else None
+    tour = list(tour)
+    for _ in range(trials):
+        if deadline is not None and time.time() > deadline:
+            break
+        # Two positions of the suffix, the first one possibly the current location of the picker
+        i, j = sorted((rng.randint(position - 1, len(tour) - 1), rng.randint(position, len(tour) - 1)))
+        if i == j:
+            continue
+        move = rng.randint(0, 3)
+        if move == 0:
+            if i < position:
+                continue
+            candidate = _two_opt(tour, i, j + 1)
+            candidate_cost = _compute_distance(candidate, distances)
+        else:
+            edge = (tour[i] if i >= 0 else 0, tour[j])
+            if move == 1:
+                candidate, candidate_cost = _Zhong._swap(edge, tour, distances)
+            elif move == 2:
+                candidate, candidate_cost = _Zhong._insert(edge, tour, distances, rng)
+            else:
+                candidate, candidate_cost = _Zhong._inverse(edge, tour, distances)
+        if candidate_cost < cost:
+            tour, cost = list(candidate), candidate_cost
+    return tour, cost
+
+
+def reroute(tour : Sequence[int], position : int, distances : Any, added : Sequence[int] = (), removed : Collection[int] = (),
+            trials : int = 200, time_limit : Optional[float] = 0.005, rng : Any = None) -> Tuple[List[int], float]:
+    """
+    Update the tour of an order being picked after some locations have been added
+    to the order or removed from it.
+
+    :param tour: The current tour (origin excluded).
+    :param position: The number of locations of the tour already visited (the picker is in
+                    the last of them, or in the origin if 0).
+    :param distances: The distance matrix.
+    :param added: The locations added to the order.
+    :param removed: The locations removed from the order (those already visited are ignored).
+    :param trials: The maximum number of moves tried by the local search (0 not to do it).
+    :param time_limit: The maximum seconds of the local search.
+    :param rng: The random stream of the local search, or a seed for it.
+    :return: The new tour and its cost.
+
+    """
+    cost = _cost(tour, distances)
+    new_tour, delta = remove_nodes(list(tour), position, set(removed), distances)
+    cost += delta
+    new_tour, delta = insert_nodes(new_tour, position, added, distances)
+    cost += delta
+    if trials > 0:
+        new_tour, cost = improve_suffix(new_tour, position, distances, cost, trials, time_limit, rng)
+    return new_tour, cost
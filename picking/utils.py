@@ -1,45 +1,354 @@
-# The class Race written in this file can be used 
+# The class Race written in this file can be used
 # for parallel computing, testing different algorithms
 # at the same time.
 #
+# The pool of workers is kept alive for the whole life of the Race
+# when used as a context manager, and the results are streamed back
+# as soon as each run is completed.
 #
+# The distance matrices of the solvers are placed in shared memory
+# once, and each solver is sent once to every worker when the pool
+# starts: the tasks only contain the index of the solver and a seed.
+# If the solvers are changed while the pool is open, the workers are
+# restarted with the new ones (the matrices already shared are kept).
+#
+# Race.halving compares the solvers by successive halving, so that the
+# runs are spent on the most promising ones.
+#
+# Every run is seeded with its own child of a numpy SeedSequence, so that
+# the runs are independent and the whole race can be reproduced.
 #
 
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
 
+import io
+import math
+import pickle
 import random
 import numpy as np
 
 
-def worker(args):
-    random.seed(None)
-    np.random.seed(None)
+# The solvers and the shared matrices known by a worker process
+_solvers : List[bytes] = []
+_attached : Dict[str, "SharedMatrix"] = {}
+
+
+class SharedMatrix:
+    """
+    An instance of this class is a square distance matrix stored in shared memory.
+    It can be used in place of the distance matrix by every solver: rows are
+    accessed via matrix[i] and iterating over it returns the nodes.
+
+    The rows are views of the shared array, so that no process holds its own copy
+    of the matrix (solvers needing fast access build the dense submatrix of their
+    picking list, see algorithms.common.submatrix).
+
+    """
+    def __init__(self, name : str, shape : Tuple[int, ...], dtype : str, owner : bool = False):
+        """
+        Attach to an existing block of shared memory.
+
+        :param name: The name of the shared memory block.
+        :param shape: The shape of the matrix.
+        :param dtype: The type of the elements.
+        :param owner: If TRUE the block is unlinked when released.
+
+        """
+        self.shm = SharedMemory(name=name)
+        self.shape = tuple(shape)
+        self.dtype = dtype
+        self.owner = owner
+        self.array = np.ndarray(self.shape, dtype=np.dtype(dtype), buffer=self.shm.buf)
+
+    @classmethod
+    def create(cls, matrix : np.ndarray) -> "SharedMatrix":
+        """
+        Copy a matrix into a new block of shared memory.
+
+        :param matrix: The matrix to share.
+        :return: The shared matrix, owner of the block.
+
+        """
+        matrix = np.ascontiguousarray(matrix)
+        shm = SharedMemory(create=True, size=max(matrix.nbytes, 1))
+        np.ndarray(matrix.shape, dtype=matrix.dtype, buffer=shm.buf)[...] = matrix
+        shared = cls(shm.name, matrix.shape, matrix.dtype.str, owner=True)
+        shm.close()
+        return shared
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def __getitem__(self, i):
+        return self.array[i]
+
+    def __iter__(self):
+        return iter(range(self.shape[0]))
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def release(self) -> None:
+        """
+        Detach from the shared memory and, if owner, free it.
+
+        """
+        self.array = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _as_array(distances : Any) -> Optional[np.ndarray]:
+    """
+    Return the distance matrix as a numpy array, or None if it cannot be
+    shared (i.e., it is not a square array or a dictionary whose keys
+    are the nodes 0, 1, ..., n-1).
+
+    """
+    if isinstance(distances, np.ndarray):
+        return distances if distances.ndim == 2 else None
+    if isinstance(distances, dict) and list(distances.keys()) == list(range(len(distances))):
+        return np.array([[distances[i][j] for j in range(len(distances))] for i in range(len(distances))])
+    return None
+
+
+def _matrices_of(solver : Any) -> List[Any]:
+    """
+    Return the distance matrices referenced by a solver.
+
+    """
+    matrices = [getattr(solver, "distances", None)]
+    problem = getattr(solver, "problem", None)
+    if problem is not None:
+        matrices += [problem.distances, problem.matrix]
+    matrices.append(getattr(solver, "particle_data", {}).get("distances"))
+    return [m for m in matrices if m is not None]
+
+
+class _SharingPickler(pickle.Pickler):
+    """
+    A pickler which replaces the shared matrices with a reference to
+    their block of shared memory.
+
+    """
+    def __init__(self, file, table : Dict[int, Tuple[Any, SharedMatrix]]):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.table = table
+
+    def persistent_id(self, obj):
+        entry = self.table.get(id(obj))
+        if entry is not None and entry[0] is obj:
+            shared = entry[1]
+            return (shared.name, shared.shape, shared.dtype, isinstance(obj, np.ndarray))
+        return None
+
+
+class _SharingUnpickler(pickle.Unpickler):
+    """
+    An unpickler which attaches the references to the shared matrices.
+
+    """
+    def persistent_load(self, pid):
+        name, shape, dtype, is_array = pid
+        if name not in _attached:
+            _attached[name] = SharedMatrix(name, shape, dtype)
+        shared = _attached[name]
+        return shared.array if is_array else shared
+
+
+def share_solvers(solvers : List[Any], table : Optional[Dict[int, Tuple[Any, SharedMatrix]]] = None) -> Tuple[List[bytes], List[SharedMatrix]]:
+    """
+    Place the distance matrices of the solvers in shared memory and
+    serialize each solver once, without its distance matrices.
+    The serialized solvers can be restored in any process with <load_solver>.
+
+    :param solvers: The solvers.
+    :param table: The matrices already in shared memory, as id -> (matrix, shared matrix),
+                which is updated with the new ones (by default none).
+    :return: The serialized solvers and the new shared matrices, which must be
+            released by the caller when the solvers are no longer used.
+
+    """
+    table = {} if table is None else table
+    created : List[SharedMatrix] = []
+    for solver in solvers:
+        for matrix in _matrices_of(solver):
+            entry = table.get(id(matrix))
+            if entry is not None and entry[0] is matrix:
+                continue
+            array = _as_array(matrix)
+            if array is not None:
+                table[id(matrix)] = (matrix, SharedMatrix.create(array))
+                created.append(table[id(matrix)][1])
+
+    blobs = []
+    for solver in solvers:
+        buffer = io.BytesIO()
+        _SharingPickler(buffer, table).dump(solver)
+        blobs.append(buffer.getvalue())
+    return blobs, created
+
+
+def load_solver(blob : bytes) -> Any:
+    """
+    Restore a solver serialized by <share_solvers>, attaching its
+    distance matrices from shared memory.
+
+    """
+    return _SharingUnpickler(io.BytesIO(blob)).load()
+
+
+def seed_solver(solver : Any, seed : Optional[np.random.SeedSequence]) -> None:
+    """
+    Reseed the random stream of a solver (shared by all its components) and
+    the global generators of random and numpy, for the solvers still using them.
+
+    :param solver: The solver.
+    :param seed: The seed (if None fresh entropy is used).
+
+    """
+    rng = getattr(solver, "rng", None)
+    if rng is not None:
+        rng.seed(seed)
+    state = None if seed is None else int(seed.generate_state(1)[0])
+    random.seed(state)
+    np.random.seed(state)
+
+
+def _init_worker(solvers : List[bytes]) -> None:
+    global _solvers
+    _solvers = solvers
+
+
+def worker(args : Tuple[int, int, int, Optional[np.random.SeedSequence]]) -> Dict[str, Any]:
+    index, _, n, seed = args
+
+    solver = load_solver(_solvers[index])
+    seed_solver(solver, seed)
 
-    solver, _, n = args
-    
-    print(f"{solver.__class__.__name__} [{_+1}/{n}]")
-    
     solver.reset()
     best, best_c = solver.run()
-    
-    return {"alg" : solver.__class__.__name__, "cost" : best_c, "computations" : solver.computations, "computational_time" : solver.computational_time, "solution" : best, "history" : list(solver.history)}
+
+    return {"alg" : solver.__class__.__name__, "solver" : index, "run" : _, "cost" : best_c, "computations" : solver.computations, "computational_time" : solver.computational_time, "solution" : best, "history" : solver.history}
+
+
+def log_progress(result : Dict[str, Any], done : int, total : int) -> None:
+    """
+    A progress callback which logs every completed run.
+
+    :param result: The result of the run just completed.
+    :param done: The number of runs completed so far.
+    :param total: The total number of runs.
+
+    """
+    print(f"{result['alg']} [{done}/{total}] cost: {result['cost']}")
 
 
 class Race:
-    def __init__(self, solvers):
+    def __init__(self, solvers, processes : Optional[int] = None, chunksize : int = 1, callback : Optional[Callable[[Dict[str, Any], int, int], None]] = None, seed : Any = None):
+        """
+        Initialize.
+
+        :param solvers: The solvers to compare.
+        :param processes: The number of worker processes (by default the number of cores).
+        :param chunksize: The number of runs sent to a worker at once.
+        :param callback: A function called as callback(result, done, total) every time
+                        a run is completed.
+        :param seed: The root seed of the runs (an int or a numpy SeedSequence; by default fresh entropy).
+
+        :attr seed_sequence: The SeedSequence from which the seed of every run is spawned.
+
+        """
         self.solvers = solvers
+        self.processes = processes
+        self.chunksize = chunksize
+        self.callback = callback
+        self.seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.n = 0
         self.__results = []
+        self.__pool = None
+        self.__blobs : List[bytes] = []
+        self.__table : Dict[int, Tuple[Any, SharedMatrix]] = {}
+        self.__shared : List[SharedMatrix] = []
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        self.close(terminate=exc_type is not None)
+
+    def open(self):
+        """
+        Start the pool of workers, which is then reused by every call until
+        the Race is closed.
+
+        """
+        if self.__pool is None:
+            self.__blobs = self._share()
+            self.__pool = Pool(self.processes, initializer=_init_worker, initargs=(self.__blobs,))
+        return self
+
+    def close(self, terminate : bool = False):
+        """
+        Close the pool of workers and wait for them to exit.
+
+        :param terminate: If TRUE the runs still queued or running are abandoned,
+                        otherwise they are completed first.
+
+        """
+        if self.__pool is not None:
+            if terminate:
+                self.__pool.terminate()
+            else:
+                self.__pool.close()
+            self.__pool.join()
+            self.__pool = None
+        for shared in self.__shared:
+            shared.release()
+        self.__shared = []
+        self.__table = {}
+        self.__blobs = []
+
+    def _share(self) -> List[bytes]:
+        """
+        Place the distance matrices of the solvers in shared memory and
+        serialize each solver once, without its distance matrices.
+
+        :return: The serialized solvers.
+
+        """
+        blobs, shared = share_solvers(self.solvers, self.__table)
+        self.__shared.extend(shared)
+        return blobs
+
+    def _refresh(self) -> None:
+        """
+        Restart the workers if the solvers (or their parameters) have changed since
+        they were sent, so that no race runs a stale copy.
+
+        """
+        blobs = self._share()
+        if blobs != self.__blobs:
+            self.__pool.close()
+            self.__pool.join()
+            self.__blobs = blobs
+            self.__pool = Pool(self.processes, initializer=_init_worker, initargs=(self.__blobs,))
 
     def __call__(self, n=2):
-        self.n = n
-        self.results = self._parallel()
+        self.results = list(self.stream(n))
         return self
 
     @property
     def todo(self):
-        for solver in self.solvers:
+        seeds = iter(self.seed_sequence.spawn(len(self.solvers) * self.n))
+        for index in range(len(self.solvers)):
             for _ in range(self.n):
-                yield (solver, _, self.n)
+                yield (index, _, self.n, next(seeds))
 
     @property
     def results(self):
@@ -49,11 +358,104 @@ class Race:
     def results(self, value):
         self.__results = value
 
-    def _parallel(self):
+    def stream(self, n=2) -> Iterator[Dict[str, Any]]:
+        """
+        Run every solver <n> times and yield the results in the order in which
+        they are completed.
+        If the Race is not open, a pool is created for this call only.
+
+        :param n: The number of runs per solver.
+        :return: A generator of results.
+
+        """
+        self.n = n
+        owner = self.__pool is None
+        self.open()
+        completed = False
+        try:
+            yield from self._parallel()
+            completed = True
+        finally:
+            # If the consumer stops early the remaining runs are not waited for
+            if owner:
+                self.close(terminate=not completed)
+
+    def halving(self, n=2, eta=2, z=1.96, max_rounds=None):
+        """
+        Race the solvers by successive halving.
+        At each round every surviving solver is run <n> * <eta>^round more times,
+        then the survivors are ranked by their mean cost: only the best
+        1/<eta> are kept (at least one solver is eliminated), and among them those statistically dominated by the best
+        one (i.e., whose mean cost is worse by more than <z> standard errors) are
+        eliminated too. The race stops when a single solver survives.
+
+        :param n: The number of runs per solver in the first round.
+        :param eta: The fraction of solvers eliminated at each round is (eta - 1) / eta (it must be greater than 1).
+        :param z: The number of standard errors beyond which a solver is dominated.
+        :param max_rounds: The maximum number of rounds (by default until one solver survives).
+
+        :attr survivors: The indexes of the solvers still in the race.
+        :attr eliminated: For each eliminated solver, the round in which it has been eliminated.
+
+        """
+        if eta <= 1:
+            raise ValueError(f"eta must be greater than 1, got {eta}")
+        owner = self.__pool is None
+        self.open()
+        self.results = []
+        self.survivors = list(range(len(self.solvers)))
+        self.eliminated = {}
+        costs = {index : [] for index in self.survivors}
+        runs, rnd = 0, 0
+        try:
+            while len(self.survivors) > 1 and (max_rounds is None or rnd < max_rounds):
+                budget = int(math.ceil(n * eta ** rnd))
+                seeds = iter(self.seed_sequence.spawn(len(self.survivors) * budget))
+                tasks = [(index, runs + _, runs + budget, next(seeds)) for index in self.survivors for _ in range(budget)]
+                for result in self._dispatch(tasks):
+                    result["round"] = rnd
+                    costs[result["solver"]].append(result["cost"])
+                    self.results.append(result)
+                runs += budget
+
+                stats = {index : _mean_se(costs[index]) for index in self.survivors}
+                ranking = sorted(self.survivors, key=lambda index: stats[index][0])
+                best_mean, best_se = stats[ranking[0]]
+                # At least one solver is eliminated, so that the race always ends
+                keep = ranking[:max(1, min(len(ranking) - 1, math.ceil(len(ranking) / eta)))]
+                keep = [index for index in keep if stats[index][0] - best_mean <= z * math.sqrt(stats[index][1] ** 2 + best_se ** 2)]
+                for index in self.survivors:
+                    if index not in keep:
+                        self.eliminated[index] = rnd
+                self.survivors = sorted(keep)
+                rnd += 1
+        finally:
+            if owner:
+                self.close()
+
+        return self
+
+    def _parallel(self) -> Iterator[Dict[str, Any]]:
+        yield from self._dispatch(self.todo, len(self.solvers) * self.n)
+
+    def _dispatch(self, tasks, total=None) -> Iterator[Dict[str, Any]]:
+        self._refresh()
+        if total is None:
+            tasks = list(tasks)
+            total = len(tasks)
+        for done, result in enumerate(self.__pool.imap_unordered(worker, tasks, chunksize=self.chunksize), start=1):
+            if self.callback is not None:
+                self.callback(result, done, total)
+            yield result
+
 
-        results = []
-        pool = Pool()
-        multiple_results = pool.map_async(worker, self.todo, callback=results.extend)
-        multiple_results.wait()
+def _mean_se(values : List[float]) -> Tuple[float, float]:
+    """
+    Return the mean of the values and its standard error.
 
-        return results
+    """
+    mean = sum(values) / len(values)
+    if len(values) < 2:
+        return mean, 0.0
+    var = sum((v - mean) ** 2 for v in values) / (len(values) - 1)
+    return mean, math.sqrt(var / len(values))
@@ -0,0 +1,48 @@
+import pytest
+
+from picking.batch import POLICY, Router, _cost, canonical, choose, route
+from picking.instances import generate
+
+
+def _orders():
+    instance = generate(orders=6, size=(3, 10), seed=9, aisles=4)
+    orders = [list(order) for order in instance]
+    # Duplicates (in another order and with the origin) are solved once
+    orders += [list(reversed(orders[0])) + [0], list(orders[2])]
+    return instance.distances, orders
+
+
+def _check(results, distances, orders):
+    assert sorted(result["index"] for result in results) == list(range(len(orders)))
+    for result in results:
+        order = orders[result["index"]]
+        assert sorted(result["tour"]) == list(canonical(order))
+        assert result["cost"] == pytest.approx(_cost(result["tour"], distances))
+
+
+def test_canonical_and_choose():
+    assert canonical([5, 0, 3, 5]) == (3, 5)
+    assert choose(POLICY, 3) is POLICY[0][1] and choose(POLICY, 1000) is POLICY[-1][1]
+    with pytest.raises(ValueError):
+        choose(POLICY[:1], 100)
+
+
+@pytest.mark.parametrize("processes", [0, 2])
+def test_route_answers_every_order(processes):
+    distances, orders = _orders()
+    router = Router(distances, processes=processes, seed=0)
+    results = list(router.route(orders))
+    _check(results, distances, orders)
+    assert router.routed == 8 and router.solved == 6
+    assert sum(result["duplicate"] for result in results) == 2
+
+
+def test_route_is_reproducible_and_uses_the_cache():
+    distances, orders = _orders()
+    first = sorted((r["index"], r["cost"]) for r in route(orders, distances, processes=0, seed=1))
+    assert sorted((r["index"], r["cost"]) for r in route(orders, distances, processes=2, seed=1)) == first
+
+    with Router(distances, processes=0, seed=1) as router:
+        list(router.route(orders))
+        again = list(router.route(orders))
+    assert all(result["duplicate"] for result in again) and router.solved == 6
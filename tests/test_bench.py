@@ -0,0 +1,55 @@
+import itertools
+import json
+
+import pytest
+
+from picking.bench import SOLVERS, Benchmark, compare, exact_cost, main
+from picking.instances import generate
+
+
+def _instance():
+    return generate(orders=2, size=6, seed=1, aisles=4)
+
+
+def test_exact_cost_is_a_lower_bound_reached_by_some_tour():
+    instance = _instance()
+    d, picking_list = instance.distances, instance[0]
+    best = min(sum(d[a][b] for a, b in zip((0,) + tour, tour + (0,))) for tour in itertools.permutations(picking_list))
+    assert exact_cost(d, picking_list) == pytest.approx(best)
+
+
+def test_benchmark_records_runs_and_gaps(tmp_path):
+    solvers = {name : SOLVERS[name] for name in ("AntColony", "LinKernighan")}
+    bench = Benchmark(_instance(), solvers, seeds=(0, 1), memory=False)()
+    assert len(bench.runs) == 2 * 2 * 2
+    # The picking lists are small, so the gaps are to the exact cost
+    assert all(bench.exact.values()) and all(run["gap"] >= -1e-9 for run in bench.runs)
+    assert set(bench.scaling()) == set(solvers)
+
+    path = str(tmp_path / "bench.json")
+    bench.save(path)
+    with open(path) as file:
+        saved = json.load(file)
+    assert [row["verdict"] for row in compare(saved, saved)] == ["same"] * len(solvers)
+
+
+def _results(wall):
+    return {"scaling" : {"A" : {"10" : {"wall" : wall, "gap" : 0.0}}}}
+
+
+@pytest.mark.parametrize("before, after", [(0.0, 1.0), (1.0, None), (None, 1.0)])
+def test_compare_without_a_ratio(before, after, tmp_path, capsys):
+    rows = compare(_results(before), _results(after))
+    assert rows[0]["ratio"] is None and rows[0]["verdict"] == "same"
+
+    old, new = str(tmp_path / "old.json"), str(tmp_path / "new.json")
+    for path, wall in ((old, before), (new, after)):
+        with open(path, "w") as file:
+            json.dump(_results(wall), file)
+    main(["compare", old, new])
+    assert "n/a" in capsys.readouterr().out
+
+
+def test_compare_verdicts():
+    assert compare(_results(1.0), _results(2.0))[0]["verdict"] == "slower"
+    assert compare(_results(1.0), _results(0.5))[0]["verdict"] == "faster"
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from picking.cache import RouteCache, fingerprint
+
+
+def test_fingerprint_depends_only_on_the_values():
+    matrix = np.arange(9, dtype=float).reshape(3, 3)
+    table = {i : {j : float(matrix[i, j]) for j in range(3)} for i in range(3)}
+    assert fingerprint(matrix) == fingerprint(table) == fingerprint(matrix.astype(int).tolist())
+    other = matrix.copy()
+    other[1, 2] += 1
+    assert fingerprint(other) != fingerprint(matrix)
+
+
+def test_get_is_keyed_by_the_set_of_locations():
+    cache = RouteCache()
+    cache.put([3, 1, 2], "a", [1, 2, 3], 10.0, "lk")
+    assert cache.get([0, 2, 3, 1, 1], "a") == ([1, 2, 3], 10.0, "lk")
+    assert cache.get([1, 2, 3], "b") is None
+    # Only a better route replaces the stored one
+    cache.put([1, 2, 3], "a", [3, 2, 1], 12.0)
+    cache.put([1, 2, 3], "a", [2, 1, 3], 8.0)
+    assert cache.get([1, 2, 3], "a")[1] == 8.0
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_routes_are_evicted():
+    cache = RouteCache(maxsize=2)
+    cache.put([1], "a", [1], 1.0)
+    cache.put([2], "a", [2], 1.0)
+    cache.get([1], "a")
+    cache.put([3], "a", [3], 1.0)
+    assert cache.get([2], "a") is None and cache.get([1], "a") is not None
+    assert cache.evictions == 1
+
+    cache = RouteCache(maxsize=None, max_locations=5)
+    cache.put([1, 2, 3], "a", [1, 2, 3], 1.0)
+    cache.put([4, 5, 6], "a", [4, 5, 6], 1.0)
+    assert len(cache) == 1 and cache.locations == 3
+    assert cache.similar([1, 2, 3], "a") == []
+
+
+def test_similar_ranks_by_jaccard_similarity():
+    cache = RouteCache()
+    cache.put([1, 2, 3, 4], "a", [1, 2, 3, 4], 4.0)
+    cache.put([1, 2, 3, 9], "a", [9, 1, 2, 3], 5.0)
+    cache.put([1, 2, 3, 4], "b", [4, 3, 2, 1], 1.0)
+    cache.put([7, 8], "a", [7, 8], 1.0)
+    similar = cache.similar([1, 2, 3, 4], "a", k=5, min_similarity=0.5)
+    assert [(s, tour) for s, tour, _ in similar] == [(1.0, [1, 2, 3, 4]), (0.6, [9, 1, 2, 3])]
+
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / "routes.cache")
+    cache = RouteCache(path=path)
+    cache.put([1, 2], "a", [2, 1], 3.0, "lk")
+    cache.save()
+    loaded = RouteCache(path=path)
+    assert loaded.get([1, 2], "a") == ([2, 1], 3.0, "lk")
+    assert loaded.similar([1, 2], "a")[0][1] == [2, 1]
+    with pytest.raises(ValueError):
+        RouteCache().save()
@@ -0,0 +1,187 @@
+import numpy as np
+import pytest
+
+from picking import algorithms
+from picking.algorithms import common
+from picking.algorithms.common import greedy_tour, nearest_neighbour, submatrix
+from picking.instances import generate
+
+
+def _matrix(n, seed):
+    points = np.random.default_rng(seed).random((n, 2)) * 100
+    return np.abs(points[:, None, :] - points[None, :, :]).sum(axis=2)
+
+
+def test_greedy_tour_is_the_nearest_neighbour():
+    d = _matrix(10, 0)
+    picking_list = [3, 7, 1, 9, 5]
+    nodes = [0] + picking_list
+    assert greedy_tour(picking_list, d) == [nodes[i] for i in nearest_neighbour(submatrix(nodes, d))]
+
+
+def test_greedy_memo_is_bound_to_the_matrix():
+    common._greedy_memo.clear()
+    d1, d2 = _matrix(10, 1), _matrix(10, 2)
+    picking_list = [2, 4, 6, 8]
+    tour = greedy_tour(picking_list, d1)
+    assert greedy_tour(picking_list, d1) == tour
+    # The same picking list on another matrix is not served from the memo
+    assert greedy_tour(picking_list, d2) == greedy_tour(picking_list, d2.tolist())
+    # The solutions returned are copies
+    greedy_tour(picking_list, d1).reverse()
+    assert greedy_tour(picking_list, d1) == greedy_tour(picking_list, d1.tolist())
+
+
+def test_greedy_memo_is_bounded_and_skips_dicts(monkeypatch):
+    monkeypatch.setattr(common, "GREEDY_MEMO_SIZE", 3)
+    common._greedy_memo.clear()
+    d = _matrix(10, 3)
+    for i in range(1, 6):
+        greedy_tour([i, i + 1], d)
+    assert list(common._greedy_memo) == [(3, 4), (4, 5), (5, 6)]
+
+    table = {i : dict(enumerate(row)) for i, row in enumerate(d.tolist())}
+    tour = greedy_tour([1, 2, 3], table)
+    assert (1, 2, 3) not in common._greedy_memo
+    assert tour == greedy_tour([1, 2, 3], d)
+
+
+def test_greedy_memo_does_not_keep_the_matrix_alive():
+    common._greedy_memo.clear()
+    d = _matrix(10, 4)
+    greedy_tour([1, 2, 3], d)
+    reference = common._greedy_memo[(1, 2, 3)][0]
+    del d
+    assert reference() is None
+
+
+def _tour_cost(tour, d):
+    nodes = [0] + list(tour) + [0]
+    return sum(d[i][j] for i, j in zip(nodes, nodes[1:]))
+
+
+def test_problem_cost_matches_the_full_matrix():
+    d = _matrix(12, 5)
+    problem = common.Problem(d, [4, 8, 2, 11])
+    assert problem.nodes == (0, 4, 8, 2, 11)
+    assert problem.cost([2, 11, 4, 8]) == pytest.approx(_tour_cost([2, 11, 4, 8], d))
+    assert problem.vgreedy == pytest.approx(_tour_cost(problem.greedy, d))
+    with pytest.raises(ValueError):
+        problem.matrix[0, 1] = 0
+
+
+def test_problem_keeps_only_the_paths_of_the_picking_list():
+    d = _matrix(8, 6)
+    paths = {0: {4: {1, 2, 3}, 2: set()}, 2: {4: {3}}}
+    problem = common.Problem(d, [2, 4], paths)
+    assert problem.paths[0] == {4: frozenset({2}), 2: frozenset()}
+    assert problem.paths[2] == {4: frozenset()}
+    assert problem.paths[4] == {}
+
+
+def test_particles_share_the_problem():
+    d = _matrix(12, 7)
+    swarm = algorithms.SpeedPSO(distances=d, picking_list=[1, 3, 5, 7, 9], particles=5, rng=0)
+    assert all(particle.problem is swarm.problem for particle in swarm.swarm)
+    assert not hasattr(swarm.swarm[0], "__dict__")
+    with pytest.raises(AttributeError):
+        swarm.problem.other = None
+
+
+def test_stats_laps_records_and_hooks():
+    seen = []
+    stats = common.Stats(hooks={"improvement" : [lambda s, i, c: seen.append((i, c))]})
+    with pytest.raises(ValueError):
+        stats.on("restart", lambda s, i, c: None)
+    stats.start()
+    t = stats.lap("construction", 0.0)
+    stats.lap("evaluation", t)
+    stats.evaluations += 3
+    stats.iteration(1, 10.0)
+    stats.accepted += 1
+    stats.iteration(2, 10.0)
+    stats.iteration(3, 8.0)
+    assert stats.calls["construction"] == stats.calls["evaluation"] == 1
+    assert [record[:3] for record in stats.records] == [(1, 3, 0), (2, 0, 1), (3, 0, 0)]
+    assert seen == [(1, 10.0), (3, 8.0)]
+    assert stats.as_dict()["iterations"] == 3
+
+
+@pytest.mark.parametrize("name", ["Mattia_PSO", "SpeedPSO", "Zhou_PSO", "Zhong_PSO", "AntColony", "LinKernighan"])
+def test_solvers_fill_the_stats(name):
+    instance = generate(orders=1, size=10, seed=7, aisles=4)
+    d, picking_list = instance.distances, list(instance[0])
+    solver_class = getattr(algorithms, name)
+    if name == "Mattia_PSO":
+        solver = solver_class(distances=d, picking_list=picking_list, era=10, particles=4, particle_data={}, rng=0)
+    elif name == "SpeedPSO":
+        solver = solver_class(distances=d, picking_list=picking_list, era=10, particles=4, rng=0)
+    elif name in ("Zhou_PSO", "Zhong_PSO"):
+        solver = solver_class(distances=d, picking_list=picking_list, particles=4, max_iter=10, rng=0)
+    else:
+        solver = solver_class(d, picking_list, max_iter=10, rng=0)
+    solver.stats = common.Stats()
+    solver.run()
+    data = solver.stats.as_dict()
+    assert set(data["times"]) == set(common.Stats.PHASES)
+    assert sum(data["calls"].values()) > 0 and data["iterations"] == len(data["records"]) > 0
+    assert all(time >= 0 for time in data["times"].values())
+
+
+def test_history_stores_only_the_change_points():
+    costs = [10, 10, 8, 8, 8, 5, 5]
+    history = common.History(costs)
+    assert len(history) == 7 and history.full() == costs == list(history)
+    assert [(i, c) for i, _, c in history.change_points()] == [(0, 10), (2, 8), (5, 5)]
+    assert history[0] == 10 and history[4] == 8 and history[-1] == 5 and history[1:3] == [10, 8]
+    with pytest.raises(IndexError):
+        history[7]
+    times = [t for _, t, _ in history.change_points()]
+    assert times == sorted(times)
+
+
+def test_history_is_downsampled_to_max_points():
+    history = common.History(range(100, 0, -1), max_points=8)
+    points = history.change_points()
+    assert len(points) <= 8 and len(history) == 100
+    assert points[0][0] == 0 and points[-1][0] == 99 and history[-1] == 1
+    assert list(history) == sorted(history, reverse=True)
+
+
+def test_random_stream_is_reproducible():
+    a, b = common.RandomStream(42), common.RandomStream(42)
+    assert [a.random() for _ in range(2000)] == [b.random() for _ in range(2000)]
+    assert a.floats(5) == b.floats(5) and a.randint(1, 6) == b.randint(1, 6)
+    lst = list(range(10))
+    a.shuffle(lst)
+    assert sorted(lst) == list(range(10))
+    assert common.RandomStream.create(a) is a
+    a.seed(42)
+    assert a.random() == common.RandomStream(42).random()
+
+
+def test_spawned_streams_are_independent_and_reproducible():
+    seeds = common.RandomStream(1).spawn(3)
+    again = common.RandomStream(1).spawn(3)
+    streams = [[common.RandomStream(seed).random() for _ in range(5)] for seed in seeds]
+    assert streams == [[common.RandomStream(seed).random() for _ in range(5)] for seed in again]
+    assert len({tuple(stream) for stream in streams}) == 3
+
+
+@pytest.mark.parametrize("name", ["SpeedPSO", "Zhou_PSO", "AntColony", "LinKernighan"])
+def test_same_seed_same_run(name):
+    instance = generate(orders=1, size=10, seed=8, aisles=4)
+    d, picking_list = instance.distances, list(instance[0])
+    solver_class = getattr(algorithms, name)
+
+    def run(seed):
+        if name == "SpeedPSO":
+            solver = solver_class(distances=d, picking_list=picking_list, era=30, particles=4, rng=seed)
+        elif name == "Zhou_PSO":
+            solver = solver_class(distances=d, picking_list=picking_list, particles=4, max_iter=30, rng=seed)
+        else:
+            solver = solver_class(d, picking_list, max_iter=30, rng=seed)
+        tour, cost = solver.run()
+        return tour, cost, solver.history.full()
+
+    assert run(3) == run(3)
@@ -0,0 +1,54 @@
+import itertools
+
+import pytest
+
+from picking.batch import _cost
+from picking.decomposition import Decomposition, stitch, two_opt, zones_by_aisle, zones_by_tour
+from picking.instances import generate
+
+
+def _instance(size):
+    instance = generate(orders=1, size=size, seed=11, aisles=6)
+    return instance.distances, list(instance[0]), instance.positions
+
+
+def test_zones_cover_the_picks():
+    d, picking_list, positions = _instance(60)
+    for zones in (zones_by_aisle(picking_list, positions, 15), zones_by_tour(picking_list, d, 15)):
+        assert sorted(node for zone in zones for node in zone) == sorted(picking_list)
+        assert all(0 < len(zone) <= 15 for zone in zones)
+    # The zones by aisle go from left to right
+    xs = [[positions[node][0] for node in zone] for zone in zones_by_aisle(picking_list, positions, 15)]
+    assert all(max(a) <= min(b) for a, b in zip(xs, xs[1:]))
+
+
+def test_stitch_finds_the_best_openings():
+    d, picking_list, _ = _instance(6)
+    paths = [picking_list[:3], picking_list[3:]]
+    best = float("inf")
+    for r, s in itertools.product(range(3), repeat=2):
+        for a, b in itertools.product((False, True), repeat=2):
+            first, second = paths[0][r:] + paths[0][:r], paths[1][s:] + paths[1][:s]
+            tour = (first[::-1] if a else first) + (second[::-1] if b else second)
+            best = min(best, _cost(tour, d))
+    tour = stitch(paths, d)
+    assert sorted(tour) == sorted(picking_list)
+    assert _cost(tour, d) == pytest.approx(best)
+    assert stitch([[], []], d) == []
+
+
+def test_two_opt_never_worsens_the_tour():
+    d, picking_list, _ = _instance(40)
+    tour = two_opt(list(picking_list), d)
+    assert sorted(tour) == sorted(picking_list)
+    assert _cost(tour, d) <= _cost(picking_list, d)
+
+
+@pytest.mark.parametrize("with_positions", [True, False])
+def test_decomposition_returns_a_valid_tour(with_positions):
+    d, picking_list, positions = _instance(120)
+    solver = Decomposition(d, picking_list, positions=positions if with_positions else None, zone_size=30, processes=0, seed=0)
+    tour, cost = solver.run()
+    assert sorted(tour) == sorted(picking_list)
+    assert cost == pytest.approx(_cost(tour, d))
+    assert len(solver.zones) >= 4 and solver.computational_time > 0
@@ -0,0 +1,46 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from picking.floydwarshall import backends, fast_floyd_warshall, generator, layout, minimum_distances, storage_locations
+
+
+@pytest.fixture(scope="module")
+def graph():
+    G, _ = layout(aisles=4, cross_aisles=1, locations=5)
+    return G
+
+
+@pytest.mark.parametrize("backend", sorted(backends.BACKENDS))
+def test_backends_agree_with_fast_floyd_warshall(graph, backend):
+    expected = fast_floyd_warshall(nx.to_numpy_array(graph, nodelist=sorted(graph.nodes), nonedge=np.inf))
+    assert np.allclose(backends.distance_matrix(graph, backend), expected)
+
+
+def test_automatic_backend(graph):
+    assert backends.select(graph.number_of_nodes(), backends.density(graph)) in backends.BACKENDS
+    assert np.allclose(minimum_distances(graph), backends.distance_matrix(graph, "networkx"))
+    with pytest.raises(ValueError):
+        backends.distance_matrix(graph, "unknown")
+
+
+def test_fast_floyd_warshall_copies_its_input_unless_inplace():
+    A = np.array([[5.0, 1.0, 9.0], [1.0, 5.0, 2.0], [9.0, 2.0, 5.0]])
+    before = A.copy()
+    D = fast_floyd_warshall(A)
+    assert np.array_equal(A, before)
+    assert np.array_equal(D, [[0, 1, 3], [1, 0, 2], [3, 2, 0]])
+    assert fast_floyd_warshall(A, inplace=True) is A and np.array_equal(A, D)
+
+
+def test_storage_locations_exclude_the_cross_aisles():
+    locations = storage_locations(aisles=4, cross_aisles=1, locations=5)
+    assert len(locations) == 4 * 2 * 5 and 0 not in locations
+
+
+def test_module_attributes_of_the_default_warehouse():
+    assert generator.cross_points == [0, 11, 22]
+    assert generator.G.number_of_nodes() == generator.AISLES * generator.locations_per_longaisle
+    assert generator.distance_matrix.shape == (generator.G.number_of_nodes(),) * 2
+    with pytest.raises(AttributeError):
+        generator.unknown
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from picking.instances import ABC, Instance, family, generate, popularity
+
+
+def test_generate_is_reproducible_with_a_seed():
+    a = generate(orders=5, size=(5, 20), seed=3, aisles=4)
+    b = generate(orders=5, size=(5, 20), seed=3, aisles=4)
+    assert a.orders == b.orders
+    assert all(5 <= n <= 20 for n in a.sizes)
+
+
+def test_orders_have_distinct_storage_locations():
+    instance = generate(orders=10, size=15, seed=1, aisles=4)
+    assert instance.sizes == [15] * 10
+    for order in instance:
+        assert len(set(order)) == len(order)
+        assert 0 not in order
+
+
+def test_numpy_integer_sizes_are_accepted():
+    instance = generate(orders=3, size=np.int64(7), seed=1, aisles=4)
+    assert instance.sizes == [7, 7, 7]
+    assert instance.params["size"] == 7 and type(instance.params["size"]) is int
+
+
+def test_order_too_large_for_the_layout():
+    with pytest.raises(ValueError):
+        generate(orders=1, size=10_000, seed=1, aisles=4)
+
+
+def test_save_and_load_round_trip(tmp_path):
+    instance = generate(orders=4, size=np.int64(6), seed=2, aisles=4)
+    path = str(tmp_path / "instance.npz")
+    instance.save(path)
+    loaded = Instance.load(path)
+    assert loaded.orders == instance.orders
+    assert loaded.params == instance.params
+    assert np.allclose(loaded.distances, instance.distances)
+    assert np.allclose(loaded.positions, instance.positions)
+
+
+def test_family_sizes_and_saved_params(tmp_path):
+    instance = family(sizes=np.array([5, 10]), orders=2, seed=0)
+    assert instance.sizes == [5, 5, 10, 10]
+    path = str(tmp_path / "family.npz")
+    instance.save(path)
+    assert Instance.load(path).params["size"] == [5, 10]
+
+
+def test_popularity_follows_the_abc_curve():
+    instance = generate(orders=1, size=5, seed=1, aisles=4)
+    locations = np.arange(1, len(instance.distances))
+    p = popularity(locations, instance.distances)
+    assert p.sum() == pytest.approx(1.0)
+    # The closest locations (class A) are the most popular
+    closest = np.argsort(instance.distances[0, locations], kind="stable")[:int(round(ABC[0][0] * len(locations)))]
+    assert p[closest].sum() == pytest.approx(ABC[0][1])
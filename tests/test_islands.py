@@ -0,0 +1,65 @@
+import pytest
+
+from picking.algorithms import AntColony, SpeedPSO, Zhou_PSO
+from picking.batch import _cost
+from picking.instances import generate
+from picking.islands import Colonies, Islands
+
+
+def _colony(max_iter):
+    instance = generate(orders=1, size=(10, 10), seed=1, aisles=4)
+    return AntColony(instance.distances, list(instance[0]), max_iter=max_iter, max_noimp=10_000, rng=0)
+
+
+def test_colonies_history_covers_every_epoch():
+    lengths = []
+    for epochs in (1, 3):
+        colonies = Colonies(_colony(epochs * 20), colonies=2, interval=20)
+        colonies.run()
+        lengths.append(len(colonies.history))
+    # Every epoch adds the initial point and one point per iteration of a colony
+    assert lengths == [21, 63]
+
+
+def _swarm(solver_class):
+    instance = generate(orders=1, size=12, seed=2, aisles=4)
+    d, picking_list = instance.distances, list(instance[0])
+    if solver_class is SpeedPSO:
+        return SpeedPSO(distances=d, picking_list=picking_list, era=40, particles=8, max_noimp=1000, rng=0), d, picking_list
+    return Zhou_PSO(distances=d, picking_list=picking_list, particles=8, max_iter=40, max_noimp=1000, rng=0), d, picking_list
+
+
+@pytest.mark.parametrize("solver_class", [SpeedPSO, Zhou_PSO])
+def test_islands_return_a_valid_tour(solver_class):
+    solver, d, picking_list = _swarm(solver_class)
+    islands = Islands(solver, islands=2, interval=10)
+    tour, cost = islands.run()
+    assert sorted(tour) == sorted(picking_list)
+    assert cost == pytest.approx(_cost(tour, d))
+    # One merged history point per iteration of each epoch (plus the initial one)
+    assert len(islands.history) >= 4 * 10 and islands.history[-1] == cost
+    assert islands.computational_time > 0
+
+
+def test_islands_split_the_swarm():
+    islands = Islands(_swarm(SpeedPSO)[0], islands=3, interval=10)
+    parts = islands._split()
+    assert sorted(len(part.swarm) for part in parts) == [2, 3, 3]
+    assert all(part.era == 10 for part in parts)
+
+
+@pytest.mark.parametrize("merge", ["average", "best"])
+def test_colonies_return_a_valid_tour(merge):
+    colony = _colony(60)
+    colonies = Colonies(colony, colonies=2, interval=20, merge=merge)
+    tour, cost = colonies.run()
+    assert sorted(tour) == sorted(colony.picking_list)
+    assert cost == pytest.approx(_cost(tour, colony.distances))
+    costs = [colonies.history[i] for i in range(len(colonies.history))]
+    assert all(b <= a for a, b in zip(costs, costs[1:])) and costs[-1] == cost
+    assert colonies.computational_time > 0
+
+
+def test_colonies_reject_an_unknown_merge():
+    with pytest.raises(ValueError):
+        Colonies(_colony(20), colonies=2, merge="sum")
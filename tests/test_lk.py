@@ -0,0 +1,53 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from picking.algorithms import LinKernighan, LocalSearch
+from picking.batch import _cost
+from picking.instances import generate
+
+
+def _instance(size, seed=14):
+    instance = generate(orders=1, size=size, seed=seed, aisles=6)
+    return instance.distances, list(instance[0])
+
+
+def test_lk_finds_the_optimum_of_small_lists():
+    for seed in range(3):
+        d, picking_list = _instance(7, seed)
+        optimum = min(_cost(list(tour), d) for tour in itertools.permutations(picking_list))
+        tour, cost = LinKernighan(d, picking_list, max_iter=50, rng=0).run()
+        assert cost == pytest.approx(optimum)
+
+
+def test_lk_is_not_worse_than_the_greedy_or_the_local_search():
+    d, picking_list = _instance(60)
+    solver = LinKernighan(d, picking_list, max_iter=100, rng=0)
+    greedy = solver.vbest
+    tour, cost = solver.run()
+    assert sorted(tour) == sorted(picking_list)
+    assert cost == pytest.approx(_cost(tour, d))
+    assert cost <= greedy and cost <= LocalSearch(d, picking_list)(solver.start)[1] + 1e-9
+
+
+def test_kick_and_descent_keep_the_tour_valid():
+    d, picking_list = _instance(30)
+    search = LinKernighan(d, picking_list, rng=0).search
+    rng = LinKernighan(d, picking_list, rng=1).rng
+    search._set([0] + list(range(1, len(search.nodes))))
+    for _ in range(10):
+        touched = search.kick(rng)
+        assert sorted(search._tour) == list(range(len(search.nodes)))
+        assert all(search._tour[search._pos[i]] == i for i in range(len(search.nodes)))
+        search._descend(touched)
+        tour, cost = search._result()
+        assert sorted(tour) == sorted(picking_list) and cost == pytest.approx(_cost(tour, d))
+
+
+def test_warm_start_from_a_better_tour():
+    d, picking_list = _instance(20)
+    best, _ = LinKernighan(d, picking_list, max_iter=100, rng=0).run()
+    solver = LinKernighan(d, picking_list, max_iter=0, rng=0)
+    assert solver.warm_start([list(np.random.default_rng(0).permutation(picking_list)), best]) == 2
+    assert solver.start == best and solver.vbest == pytest.approx(_cost(best, d))
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from picking.algorithms import LocalSearch
+from picking.algorithms.localsearch import post_optimize
+from picking.batch import _cost
+from picking.instances import generate
+
+
+def _instance(size=20, seed=13):
+    instance = generate(orders=1, size=size, seed=seed, aisles=6)
+    return instance.distances, list(instance[0])
+
+
+MOVES = [("2opt",), ("oropt",), ("3opt",), ("2opt", "oropt", "3opt")]
+
+
+@pytest.mark.parametrize("moves", MOVES)
+def test_search_returns_a_better_valid_tour(moves):
+    d, picking_list = _instance()
+    search = LocalSearch(d, picking_list, moves=moves)
+    for seed in range(5):
+        tour = list(np.random.default_rng(seed).permutation(picking_list))
+        improved, cost = search(tour)
+        assert sorted(improved) == sorted(picking_list)
+        assert cost == pytest.approx(_cost(improved, d))
+        assert cost <= _cost(tour, d) + 1e-9
+
+
+def test_two_opt_reaches_a_local_optimum():
+    d, picking_list = _instance(12)
+    search = LocalSearch(d, picking_list, neighbours=len(picking_list), moves=("2opt",))
+    tour, cost = search(list(reversed(picking_list)))
+    for i in range(len(tour)):
+        for j in range(i + 2, len(tour) + 1):
+            assert _cost(tour[:i] + tour[i:j][::-1] + tour[j:], d) >= cost - 1e-9
+
+
+def test_max_moves_and_small_tours():
+    d, picking_list = _instance()
+    search = LocalSearch(d, picking_list, max_moves=2)
+    search(list(np.random.default_rng(0).permutation(picking_list)))
+    assert search.applied <= 2
+    small = LocalSearch(d, picking_list[:2])
+    assert small(picking_list[:2]) == (picking_list[:2], pytest.approx(_cost(picking_list[:2], d)))
+
+
+def test_asymmetric_matrix():
+    rng = np.random.default_rng(1)
+    d = rng.integers(1, 100, size=(10, 10)).astype(float)
+    np.fill_diagonal(d, 0)
+    picking_list = list(range(1, 10))
+    search = LocalSearch(d, picking_list)
+    assert not search.symmetric
+    tour, cost = search(picking_list)
+    assert sorted(tour) == picking_list and cost == pytest.approx(_cost(tour, d))
+    assert cost <= _cost(picking_list, d)
+    assert post_optimize(picking_list, d)[1] == pytest.approx(cost)
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from picking.algorithms import AntColony
+from picking.instances import generate
+from picking.pheromone import PheromoneStore
+
+
+def test_update_and_decay():
+    store = PheromoneStore.create(None, 5, pher_init=0.1, ro=0.5, Q=2.0)
+    assert np.all(np.diag(store.trails) == 0)
+    store.update([2, 4], 4.0)
+    assert store.trails[0, 2] == store.trails[2, 4] == store.trails[4, 0] == pytest.approx(0.6)
+    assert store.trails[2, 0] == pytest.approx(0.1)
+    store.decay()
+    assert store.trails[0, 2] == pytest.approx(0.35) and store.trails[1, 3] == pytest.approx(0.1)
+    assert np.allclose(store.submatrix([0, 2]), [[0, 0.35], [0.1, 0]])
+
+
+def test_store_in_a_file_is_shared(tmp_path):
+    path = str(tmp_path / "warehouse.npy")
+    store = PheromoneStore.create(path, 4)
+    store.update([1, 3], 1.0)
+    store.flush()
+    reader = PheromoneStore.open(path)
+    assert reader.trails[0, 1] == store.trails[0, 1] and len(reader) == 4
+    with pytest.raises(ValueError):
+        reader.update([1], 1.0)
+    with pytest.raises(ValueError):
+        reader.decay()
+    with pytest.raises(FileNotFoundError):
+        PheromoneStore.open(str(tmp_path / "missing.npy"))
+
+
+def test_colony_starts_from_the_store():
+    instance = generate(orders=1, size=8, seed=10, aisles=4)
+    d, picking_list = instance.distances, list(instance[0])
+    store = PheromoneStore.create(None, len(d))
+    store.update(picking_list, 1.0)
+    colony = AntColony(d, picking_list, max_iter=20, rng=0, store=store)
+    first, second = picking_list[0], picking_list[1]
+    assert colony.pheromone[first][second] == pytest.approx(float(store.trails[first, second]))
+    assert colony.pheromone[first][second] > colony.pheromone[second][first]
+    tour, _ = colony.run()
+    assert sorted(tour) == sorted(picking_list)
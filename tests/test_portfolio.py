@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from picking.algorithms import AntColony, LinKernighan
+from picking.portfolio import Incumbent, Portfolio
+from picking.instances import generate
+
+
+def _solvers():
+    instance = generate(orders=1, size=20, seed=1, aisles=4)
+    d, picking_list = instance.distances, list(instance[0])
+    return [AntColony(d, picking_list, max_iter=20, max_noimp=10), LinKernighan(d, picking_list, max_iter=20)]
+
+
+def test_portfolio_stops_at_the_target_cost():
+    solvers = _solvers()
+    target = solvers[1].vbest * 2
+    portfolio = Portfolio(solvers, seed=0)
+    tour, cost = portfolio(time_limit=30.0, target_cost=target)
+    assert cost <= target and portfolio.winner is not None
+    assert sorted(tour) == sorted(solvers[0].picking_list)
+    assert portfolio.computational_time < 10.0
+
+
+def test_portfolio_without_solutions():
+    tour, cost = Portfolio(_solvers(), seed=0)(time_limit=0.0)
+    assert tour == [] and cost == float("inf")
+
+
+def test_portfolio_seed():
+    a, b = Portfolio(_solvers(), seed=7), Portfolio(_solvers(), seed=np.random.SeedSequence(7))
+    assert [s.entropy for s in a.seed_sequence.spawn(2)] == [s.entropy for s in b.seed_sequence.spawn(2)]
+    assert [s.spawn_key for s in a.seed_sequence.spawn(2)] == [s.spawn_key for s in b.seed_sequence.spawn(2)]
+
+
+def test_portfolio_needs_solvers():
+    with pytest.raises(ValueError):
+        Portfolio([])
+
+
+def test_incumbent_keeps_the_best_offer():
+    incumbent = Incumbent(5)
+    assert incumbent.get() == ([], float("inf"), -1)
+    assert incumbent.offer([3, 1], 10.0, 0)
+    assert not incumbent.offer([1, 3], 12.0, 1)
+    assert incumbent.get() == ([3, 1], 10.0, 0)
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from picking.batch import _cost
+from picking.preprocess import Reduction
+
+
+def _matrix():
+    # 1 and 2 are the two faces of the same aisle, 4 is on the origin
+    points = np.array([0, 5, 5, 9, 0, 14], dtype=float)
+    return np.abs(points[:, None] - points[None, :])
+
+
+def test_duplicates_and_close_locations_are_collapsed():
+    d = _matrix()
+    reduction = Reduction([3, 1, 2, 1, 5, 4, 3], d)
+    assert reduction.picking_list == [3, 1, 5]
+    assert reduction.groups == {0: [0, 4], 3: [3], 1: [1, 2], 5: [5]}
+    assert len(reduction) == 3
+
+
+def test_expanded_tour_has_the_same_cost():
+    d = _matrix()
+    reduction = Reduction([3, 1, 2, 1, 5, 4, 3], d)
+    tour = [1, 3, 5]
+    expanded = reduction.expand(tour)
+    assert expanded == [4, 1, 2, 3, 5]
+    assert _cost(expanded, d) == pytest.approx(_cost(tour, d))
+    assert reduction.line_order(expanded) == [5, 1, 3, 2, 0, 6, 4]
+
+
+def test_tolerance_collapses_near_locations():
+    d = _matrix()
+    assert Reduction([1, 3, 5], d).picking_list == [1, 3, 5]
+    assert Reduction([1, 3, 5], d, tolerance=4).picking_list == [1, 5]
@@ -0,0 +1,61 @@
+import pytest
+
+from picking.algorithms import LinKernighan
+from picking.instances import generate
+from picking.utils import Race
+
+
+def _solvers():
+    instance = generate(orders=1, size=(5, 5), seed=1, aisles=4)
+    # Identical deterministic solvers: the costs are always tied
+    return [LinKernighan(instance.distances, list(instance[0]), rng=0) for _ in range(3)]
+
+
+@pytest.mark.parametrize("eta", [1, 0.5])
+def test_halving_rejects_eta_not_greater_than_one(eta):
+    with pytest.raises(ValueError):
+        Race(_solvers(), processes=1, seed=0).halving(n=1, eta=eta)
+
+
+def test_halving_with_float_eta_and_tied_costs_ends():
+    race = Race(_solvers(), processes=1, seed=0).halving(n=1, eta=1.5)
+    assert len(race.survivors) == 1
+    assert sorted(race.eliminated) == sorted(set(range(3)) - set(race.survivors))
+    # Rounds of ceil(1.5 ** round) runs per survivor: 3 * 1 + 2 * 2
+    assert len(race.results) == 7
+
+
+def _race(**kwargs):
+    instance = generate(orders=2, size=(6, 6), seed=2, aisles=4)
+    solvers = [LinKernighan(instance.distances, list(instance[i]), max_iter=20, rng=0) for i in range(2)]
+    return Race(solvers, processes=2, seed=0, **kwargs)
+
+
+def test_stream_yields_every_run_and_calls_back():
+    calls = []
+    race = _race(callback=lambda result, done, total: calls.append((done, total)))
+    results = list(race.stream(n=3))
+    assert sorted((result["solver"], result["run"]) for result in results) == [(i, r) for i in range(2) for r in range(3)]
+    assert calls == [(done, 6) for done in range(1, 7)]
+
+
+def test_stream_stops_early_and_closes_its_pool():
+    race = _race()
+    for result in race.stream(n=50):
+        break
+    assert race._Race__pool is None
+    # The race can still be run afterwards
+    assert len(race(n=1).results) == 2
+
+
+def test_open_race_reuses_the_pool_until_the_solvers_change():
+    with _race() as race:
+        pool = race._Race__pool
+        first = sorted(result["cost"] for result in race(n=1).results)
+        assert race._Race__pool is pool
+        race.solvers[0].max_iter = 0
+        race(n=1)
+        assert race._Race__pool is not pool
+    assert race._Race__pool is None
+    # Same seed, same solvers: same results
+    assert sorted(result["cost"] for result in _race()(n=1).results) == first
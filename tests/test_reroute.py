@@ -0,0 +1,38 @@
+import pytest
+
+from picking.batch import _cost
+from picking.instances import generate
+from picking.reroute import insert_nodes, remove_nodes, reroute
+
+
+def _tour():
+    instance = generate(orders=2, size=12, seed=12, aisles=4)
+    first, second = list(instance[0]), list(instance[1])
+    added = [node for node in second if node not in first][:3]
+    return instance.distances, first, added
+
+
+@pytest.mark.parametrize("position", [0, 4, 11])
+def test_delta_costs_are_exact(position):
+    d, tour, added = _tour()
+    removed = set(tour[5:8]) | {tour[2]}
+    new_tour, delta = remove_nodes(tour, position, removed, d)
+    assert new_tour[:position] == tour[:position]
+    assert _cost(new_tour, d) == pytest.approx(_cost(tour, d) + delta)
+    inserted, delta = insert_nodes(new_tour, position, added + [new_tour[0], 0], d)
+    assert inserted[:position] == tour[:position] and len(inserted) == len(new_tour) + len(added)
+    assert _cost(inserted, d) == pytest.approx(_cost(new_tour, d) + delta)
+
+
+@pytest.mark.parametrize("trials", [0, 200])
+def test_reroute_keeps_the_visited_locations(trials):
+    d, tour, added = _tour()
+    position = 5
+    removed = {tour[1], tour[7], tour[9]}
+    new_tour, cost = reroute(tour, position, d, added=added, removed=removed, trials=trials, time_limit=None, rng=0)
+    assert new_tour[:position] == tour[:position]
+    expected = [node for node in tour if node not in removed or tour.index(node) < position] + added
+    assert sorted(new_tour) == sorted(expected)
+    assert cost == pytest.approx(_cost(new_tour, d))
+    if trials > 0:
+        assert cost <= reroute(tour, position, d, added=added, removed=removed, trials=0)[1] + 1e-9
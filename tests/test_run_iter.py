@@ -0,0 +1,80 @@
+import pytest
+
+from picking.algorithms import AntColony, LinKernighan, LocalSearch, Mattia_PSO, SpeedPSO, Zhong_PSO, Zhou_PSO
+from picking.batch import _cost
+from picking.instances import generate
+
+
+def _instance():
+    instance = generate(orders=1, size=12, seed=4, aisles=4)
+    return instance.distances, list(instance[0])
+
+
+def _solver(solver_class, d, picking_list):
+    if solver_class is Mattia_PSO:
+        return Mattia_PSO(distances=d, picking_list=picking_list, era=30, particles=6, max_noimp=30, particle_data={}, rng=0)
+    if solver_class is SpeedPSO:
+        return SpeedPSO(distances=d, picking_list=picking_list, era=30, particles=6, max_noimp=30, rng=0)
+    if solver_class in (Zhou_PSO, Zhong_PSO):
+        return solver_class(distances=d, picking_list=picking_list, particles=6, max_iter=30, max_noimp=30, rng=0)
+    return solver_class(d, picking_list, max_iter=30, max_noimp=30, rng=0)
+
+
+SOLVERS = [Mattia_PSO, SpeedPSO, Zhou_PSO, Zhong_PSO, AntColony, LinKernighan]
+
+
+@pytest.mark.parametrize("solver_class", SOLVERS)
+def test_run_iter_yields_improvements(solver_class):
+    d, picking_list = _instance()
+    solver = _solver(solver_class, d, picking_list)
+    steps = list(solver.run_iter())
+    assert steps[0][0] == 0
+    costs = [cost for _, _, _, cost in steps]
+    assert all(b < a for a, b in zip(costs, costs[1:]))
+    assert all(b >= a for (_, a, _, _), (_, b, _, _) in zip(steps, steps[1:]))
+    for _, _, tour, cost in steps:
+        assert sorted(tour) == sorted(picking_list)
+        assert cost == pytest.approx(_cost(tour, d))
+    assert solver.history[-1] == costs[-1]
+    assert solver.computational_time > 0
+
+
+@pytest.mark.parametrize("solver_class", SOLVERS)
+def test_run_returns_the_last_yield(solver_class):
+    d, picking_list = _instance()
+    last = list(_solver(solver_class, d, picking_list).run_iter())[-1]
+    assert _solver(solver_class, d, picking_list).run() == (last[2], last[3])
+
+
+@pytest.mark.parametrize("solver_class", SOLVERS)
+def test_post_optimizer_improves_the_best(solver_class):
+    d, picking_list = _instance()
+    solver = _solver(solver_class, d, picking_list)
+    solver.post_optimizer = LocalSearch(d, picking_list)
+    tour, cost = solver.run()
+    assert LocalSearch(d, picking_list)(tour)[1] == pytest.approx(cost)
+    assert solver.history[-1] == pytest.approx(cost)
+
+
+def test_post_optimizer_updates_the_best_of_the_colony():
+    d, picking_list = _instance()
+    colony = _solver(AntColony, d, picking_list)
+    calls = []
+
+    def post_optimizer(tour, stop):
+        calls.append(tour)
+        return list(reversed(tour)), -1
+
+    colony.post_optimizer = post_optimizer
+    tour, cost = colony.run()
+    assert len(calls) == 1 and cost == -1
+    assert colony.best == tour and colony.vbest == -1
+
+
+def test_closing_run_iter_sets_the_computational_time():
+    d, picking_list = _instance()
+    solver = _solver(LinKernighan, d, picking_list)
+    steps = solver.run_iter()
+    next(steps)
+    steps.close()
+    assert solver.computational_time > 0
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from picking import utils
+from picking.algorithms import SpeedPSO, Zhou_PSO
+from picking.instances import generate
+from picking.utils import SharedMatrix, load_solver, share_solvers
+
+
+@pytest.fixture
+def detach():
+    yield
+    for shared in utils._attached.values():
+        shared.release()
+    utils._attached.clear()
+
+
+def test_shared_matrix_is_a_view_of_the_block():
+    matrix = np.arange(16, dtype=float).reshape(4, 4)
+    shared = SharedMatrix.create(matrix)
+    other = SharedMatrix(shared.name, shared.shape, shared.dtype)
+    try:
+        assert len(other) == 4 and list(other) == [0, 1, 2, 3]
+        assert other[2][3] == 11
+        shared.array[2, 3] = -1
+        assert other[2][3] == -1
+    finally:
+        other.release()
+        shared.release()
+
+
+def test_solvers_are_restored_on_the_shared_matrix(detach):
+    instance = generate(orders=2, size=8, seed=5, aisles=4)
+    d = instance.distances
+    solvers = [SpeedPSO(distances=d, picking_list=list(instance[0]), particles=4, rng=0),
+               Zhou_PSO(distances=d, picking_list=list(instance[1]), particles=4, rng=0)]
+    table = {}
+    blobs, shared = share_solvers(solvers, table)
+    try:
+        # The matrix is shared once, and not serialized with the solvers
+        assert shared[0].shape == np.asarray(d).shape
+        assert all(len(blob) < np.asarray(d).nbytes for blob in blobs)
+        restored = [load_solver(blob) for blob in blobs]
+        assert np.array_equal(np.asarray(restored[0].distances), np.asarray(d))
+        assert np.shares_memory(restored[0].problem.distances, restored[1].particle_data["distances"])
+        assert restored[0].run()[1] == pytest.approx(solvers[0].run()[1])
+
+        # Sharing again with the same table creates no new block
+        assert share_solvers(solvers, table)[1] == []
+    finally:
+        for matrix in shared:
+            matrix.release()
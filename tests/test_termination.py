@@ -0,0 +1,65 @@
+import threading
+import time
+
+import pytest
+
+from picking.algorithms import AntColony, LinKernighan, Mattia_PSO, SpeedPSO, Zhong_PSO, Zhou_PSO
+from picking.algorithms.common import Termination
+from picking.instances import generate
+
+
+def _solver(solver_class):
+    instance = generate(orders=1, size=12, seed=6, aisles=4)
+    d, picking_list = instance.distances, list(instance[0])
+    if solver_class is Mattia_PSO:
+        return Mattia_PSO(distances=d, picking_list=picking_list, era=10_000, particles=6, max_noimp=10_000, particle_data={}, rng=0)
+    if solver_class is SpeedPSO:
+        return SpeedPSO(distances=d, picking_list=picking_list, era=10_000, particles=6, max_noimp=10_000, rng=0)
+    if solver_class in (Zhou_PSO, Zhong_PSO):
+        return solver_class(distances=d, picking_list=picking_list, particles=6, max_iter=10_000, max_noimp=10_000, rng=0)
+    return solver_class(d, picking_list, max_iter=10_000, max_noimp=10_000, rng=0)
+
+
+SOLVERS = [Mattia_PSO, SpeedPSO, Zhou_PSO, Zhong_PSO, AntColony, LinKernighan]
+
+
+def test_termination_criteria():
+    assert Termination.create() is None
+    assert Termination(target_cost=10)(10) and not Termination(target_cost=10)(11)
+    assert Termination(time_limit=0, start=time.time() - 1).expired()
+    assert not Termination(time_limit=60)(0)
+    event = threading.Event()
+    stop = Termination(cancel_event=event)
+    assert not stop.expired()
+    event.set()
+    assert stop.expired() and stop(float("inf"))
+
+
+@pytest.mark.parametrize("solver_class", SOLVERS)
+def test_run_stops_at_the_deadline(solver_class):
+    solver = _solver(solver_class)
+    start = time.time()
+    solver.run(time_limit=0.2)
+    assert time.time() - start < 2
+
+
+@pytest.mark.parametrize("solver_class", SOLVERS)
+def test_run_stops_at_the_target_cost(solver_class):
+    solver = _solver(solver_class)
+    steps = list(solver.run_iter(target_cost=float("inf")))
+    # The target is reached by the initial best, so the run stops at the first iteration
+    assert len(solver.history) <= 2 and steps[-1][0] <= 1
+
+
+@pytest.mark.parametrize("solver_class", SOLVERS)
+def test_run_stops_when_cancelled(solver_class):
+    solver = _solver(solver_class)
+    event = threading.Event()
+    timer = threading.Timer(0.1, event.set)
+    timer.start()
+    start = time.time()
+    try:
+        solver.run(cancel_event=event)
+    finally:
+        timer.cancel()
+    assert time.time() - start < 2
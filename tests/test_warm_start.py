@@ -0,0 +1,60 @@
+import pytest
+
+from picking.algorithms import AntColony, Mattia_PSO, SpeedPSO, Zhong_PSO, Zhou_PSO
+from picking.algorithms.common import project_tour, seed_swarm
+from picking.batch import _cost
+from picking.instances import generate
+
+
+def _instance():
+    instance = generate(orders=2, size=10, seed=3, aisles=4)
+    return instance.distances, list(instance[0]), list(instance[1])
+
+
+def _solver(solver_class, d, picking_list):
+    if solver_class is Mattia_PSO:
+        return Mattia_PSO(distances=d, picking_list=picking_list, era=20, particles=6, max_noimp=20, particle_data={}, rng=0)
+    if solver_class is SpeedPSO:
+        return SpeedPSO(distances=d, picking_list=picking_list, era=20, particles=6, max_noimp=20, rng=0)
+    return solver_class(distances=d, picking_list=picking_list, particles=6, max_iter=20, max_noimp=20, rng=0)
+
+
+def test_project_tour_visits_the_picking_list():
+    d, picking_list, other = _instance()
+    tour = project_tour(other + picking_list[:3], picking_list, d)
+    assert sorted(tour) == sorted(picking_list)
+
+
+@pytest.mark.parametrize("solver_class", [Mattia_PSO, SpeedPSO, Zhou_PSO, Zhong_PSO])
+def test_warm_start_seeds_a_share_of_the_swarm(solver_class):
+    d, picking_list, other = _instance()
+    solver = _solver(solver_class, d, picking_list)
+    assert solver.warm_start([other, list(reversed(other)), other], share=0.5) == 3
+    seeded = project_tour(other, picking_list, d)
+    assert solver.swarm[0].current == seeded and solver.swarm[0].pbest == seeded
+    # The other particles keep their random solutions
+    assert solver.warm_start([other] * 10, share=0.5) == 3
+
+    tour, cost = solver.run()
+    assert sorted(tour) == sorted(picking_list)
+    assert cost == pytest.approx(_cost(tour, d))
+
+
+def test_seed_swarm_sets_the_costs_of_plain_particles():
+    d, picking_list, other = _instance()
+    solver = _solver(Zhou_PSO, d, picking_list)
+    seed_swarm(solver.swarm, [other], picking_list, d, share=0.0)
+    particle = solver.swarm[0]
+    assert particle.vcurrent == particle.vpbest == pytest.approx(_cost(particle.current, d))
+
+
+def test_warm_start_of_the_colony_deposits_the_tours():
+    d, picking_list, other = _instance()
+    colony = AntColony(d, picking_list, max_iter=20, rng=0)
+    before = {i : dict(row) for i, row in colony.pheromone.items()}
+    assert colony.warm_start([other, picking_list]) == 2
+    seeded = project_tour(other, picking_list, d)
+    assert colony.pheromone[seeded[0]][seeded[1]] > before[seeded[0]][seeded[1]]
+    assert colony.vbest <= _cost(seeded, d) and colony.history[-1] == colony.vbest
+    tour, cost = colony.run()
+    assert sorted(tour) == sorted(picking_list) and cost <= _cost(seeded, d)